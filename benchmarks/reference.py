@@ -0,0 +1,303 @@
+# reference.py
+# -*- coding: utf-8 -*-
+"""
+reference.py
+------------
+processing.py の高速化前の行単位（apply / iterrows / 二重ループ）の実装を、出力の照合用に保持します。
+最適化した実装の出力がこれらと構造的に一致することを benchmarks/run.py の --check で確認します。
+いずれも計算量が大きいため、小規模なネットワークでのみ用います。
+"""
+
+import math
+import numpy as np
+import pandas as pd
+
+
+def access_from_row(row):
+    """GMNS の行から access（例："both_B_B"）を求める（行単位の参照実装）。"""
+    ped = str(row.get("ped_facility", "")).lower()
+    facility_type = str(row.get("facility_type", "")).lower()
+    try:
+        dir_flag = int(row.get("dir_flag", 0))
+    except Exception:
+        dir_flag = 0
+    if ped == "none":
+        base = "vehicle"
+    elif ped == "offstreet_path":
+        base = "pedestrian"
+    else:
+        base = "both"
+    if facility_type in ["highway", "expressway", "motorway"]:
+        base = "vehicle"
+    if facility_type in ["footway"]:
+        base = "pedestrian"
+    suffix0 = {1: "FT", -1: "TF"}.get(dir_flag, "B")
+    if dir_flag in (1, -1) and facility_type in ["motorway", "trunk", "primary", "secondary"]:
+        suffix1 = suffix0
+    elif facility_type in ["footway", "gaishu"]:
+        suffix1 = "TF"
+    else:
+        suffix1 = "B"
+    return f"{base}_{suffix0}_{suffix1}"
+
+
+def access(ori_link):
+    return ori_link.apply(access_from_row, axis=1)
+
+
+def calc_macro_link(df, s_col="s", t_col="t"):
+    def _calc(row):
+        try:
+            s_val = int(row[s_col])
+            t_val = int(row[t_col])
+        except Exception:
+            return ""
+        if s_val == t_val:
+            return "-1"
+        return f"{min(s_val, t_val)}_{max(s_val, t_val)}"
+    df = df.copy()
+    df["macro_link"] = df.apply(_calc, axis=1)
+    return df
+
+
+def compute_link_centers(net_link, net_node):
+    net_link = net_link.copy()
+    net_link["center_x"] = net_link.apply(
+        lambda row: (net_node.loc[row["s"], "x_display"] + net_node.loc[row["t"], "x_display"]) / 2, axis=1)
+    net_link["center_y"] = net_link.apply(
+        lambda row: (net_node.loc[row["s"], "y_display"] + net_node.loc[row["t"], "y_display"]) / 2, axis=1)
+    return net_link
+
+
+def generate_augmented_nodes(net_link, net_node, offset_angle, scale, access_suffix, left_driving):
+    """交差点ごとに接続リンクを走査して出入口ノードを生成する（極座標の計算は math によりスカラーで行う）。"""
+    new_nodes = []
+    new_node_index = 0
+    sign = 2 * int(left_driving) - 1
+    intersection = net_node["intersection"] if "intersection" in net_node.columns else pd.Series(-1, index=net_node.index)
+    for attr_val in intersection.unique():
+        if attr_val == -1:
+            continue
+        base_node = net_node[intersection == attr_val].iloc[0]
+        base_id = base_node["id"]
+        ox, oy = base_node["x"], base_node["y"]
+        connected = net_link[(net_link["s"] == base_id) | (net_link["t"] == base_id)]
+        for _, link_row in connected.iterrows():
+            access = link_row.get("access", "both_B_B").split("_")[access_suffix + 1]
+            if base_id == link_row["s"]:
+                create_in, create_out = access != "FT", access != "TF"
+            elif base_id == link_row["t"]:
+                create_in, create_out = access != "TF", access != "FT"
+            else:
+                continue
+            degree = math.degrees(math.atan2(link_row["center_y"] - oy, link_row["center_x"] - ox))
+            for in_out, create, offset in [("out", create_out, offset_angle), ("in", create_in, -offset_angle)]:
+                if not create:
+                    continue
+                rad = math.radians(degree + offset * sign)
+                new_nodes.append({"id": new_node_index, "x": scale * math.cos(rad) + ox, "y": scale * math.sin(rad) + oy,
+                                  "original_id": base_id, "_original_link_id": link_row["id"], "in_out": in_out})
+                new_node_index += 1
+    if not new_nodes:
+        return pd.DataFrame(columns=["id", "x", "y", "original_id", "_original_link_id", "in_out"])
+    return pd.DataFrame(new_nodes)
+
+
+def generate_normal_links(ori_link, augmented_nodes):
+    links = []
+    for link_id in ori_link["id"].unique():
+        original_s = ori_link.loc[ori_link["id"] == link_id, "s"].values[0]
+        original_t = ori_link.loc[ori_link["id"] == link_id, "t"].values[0]
+        for start, end in [(original_s, original_t), (original_t, original_s)]:
+            source = augmented_nodes[(augmented_nodes["original_id"] == start) &
+                                     (augmented_nodes["_original_link_id"] == link_id) & (augmented_nodes["in_out"] == "out")]
+            target = augmented_nodes[(augmented_nodes["original_id"] == end) &
+                                     (augmented_nodes["_original_link_id"] == link_id) & (augmented_nodes["in_out"] == "in")]
+            if not (source.empty or target.empty):
+                links.append({"id": len(links), "s": source.iloc[0]["id"], "t": target.iloc[0]["id"],
+                              "original_id": link_id, "_original_node_id": None, "turn": None})
+    return pd.DataFrame(links)
+
+
+def _center(orig_id, ori_nodes_df, group):
+    if orig_id in ori_nodes_df["id"].values:
+        row = ori_nodes_df.loc[ori_nodes_df["id"] == orig_id].iloc[0]
+        return row["x"], row["y"]
+    return group.iloc[0]["x"], group.iloc[0]["y"]
+
+
+def generate_turn_links(nodes_df, ori_nodes_df, threshold_deg=45):
+    """交差点内の全ノード対の角度差を二重ループで比較して横断リンクを生成する。"""
+    link_list = []
+    threshold_rad = threshold_deg * np.pi / 180.0
+    for orig_id, group in nodes_df.groupby("original_id"):
+        if group.shape[0] < 2:
+            continue
+        cx, cy = _center(orig_id, ori_nodes_df, group)
+        for i in group.index:
+            angle_i = np.arctan2(group.loc[i, "y"] - cy, group.loc[i, "x"] - cx)
+            best_rad, best_o = None, None
+            for j in group.index:
+                if i == j:
+                    continue
+                angle_j = np.arctan2(group.loc[j, "y"] - cy, group.loc[j, "x"] - cx)
+                diff = np.arctan2(np.sin(angle_j - angle_i), np.cos(angle_j - angle_i))
+                if diff < 0:
+                    diff += 2 * np.pi
+                if best_rad is None or diff < best_rad:
+                    best_rad, best_o = diff, j
+            if best_rad is not None:
+                link_list.append({"id": len(link_list), "s": i, "t": best_o, "original_id": orig_id,
+                                  "turn": "cross" if best_rad < np.pi - threshold_rad else "notcross"})
+    return pd.DataFrame(link_list)
+
+
+def generate_turn_links_veh(nodes_df, ori_nodes_df, ori_links_df, make_uturn=False, threshold_deg=45):
+    """交差点ごとに in ノードと out ノードの全組み合わせを iterrows で分類して右左折リンクを生成する。"""
+    link_centers = ori_links_df.set_index("id")[["center_x", "center_y"]].to_dict("index")
+    link_list = []
+    for orig_id, group in nodes_df.groupby("original_id"):
+        in_nodes = group[group["in_out"] == "in"]
+        out_nodes = group[group["in_out"] == "out"]
+        if in_nodes.empty or out_nodes.empty:
+            continue
+        cx, cy = _center(orig_id, ori_nodes_df, group)
+        for i, in_node in in_nodes.iterrows():
+            in_link_id = in_node["_original_link_id"]
+            if in_link_id not in link_centers:
+                continue
+            angle_in = np.arctan2(link_centers[in_link_id]["center_y"] - cy, link_centers[in_link_id]["center_x"] - cx)
+            candidates = out_nodes if make_uturn else out_nodes[out_nodes["_original_link_id"] != in_link_id]
+            for j, out_node in candidates.iterrows():
+                out_link_id = out_node["_original_link_id"]
+                if out_link_id not in link_centers:
+                    continue
+                angle_out = np.arctan2(link_centers[out_link_id]["center_y"] - cy, link_centers[out_link_id]["center_x"] - cx)
+                diff = np.arctan2(np.sin(angle_out - angle_in), np.cos(angle_out - angle_in))
+                if diff < 0:
+                    diff += 2 * np.pi
+                if diff < np.pi / 180:
+                    turn = "u-turn"
+                elif diff < np.pi - threshold_deg * np.pi / 180:
+                    turn = "right"
+                elif diff < np.pi + threshold_deg * np.pi / 180:
+                    turn = "straight"
+                elif diff < 2 * np.pi - np.pi / 180:
+                    turn = "left"
+                else:
+                    turn = "u-turn"
+                link_list.append({"id": len(link_list), "s": i, "t": j, "original_id": orig_id, "turn": turn})
+    return pd.DataFrame(link_list)
+
+
+def adjust_display_coordinates(nodes_df, ori_nodes_df, scale_factor=10):
+    display_nodes = nodes_df.copy()
+    for i, row in display_nodes.iterrows():
+        orig_id = row.get("original_id", row["id"])
+        center_row = ori_nodes_df[ori_nodes_df["id"] == orig_id]
+        if not center_row.empty:
+            center_x, center_y = center_row.iloc[0]["x"], center_row.iloc[0]["y"]
+        else:
+            center_x, center_y = row["x"], row["y"]
+        display_nodes.at[i, "x"] = (row["x"] - center_x) * scale_factor + center_x
+        display_nodes.at[i, "y"] = (row["y"] - center_y) * scale_factor + center_y
+    return display_nodes
+
+
+def _reorder_macro(macro):
+    try:
+        a, b = (int(v) for v in str(macro).split("_"))
+    except Exception:
+        return ""
+    return f"{min(a, b)}_{max(a, b)}"
+
+
+def postprocess_network(integrated_nodes, integrated_links, ori_links, ori_nodes, split=True):
+    """
+    属性付与（文字列の macro_link / bidirectionalpair_id を行単位で計算）、リンク分割、歩行者リンクの双方向化を行う。
+    並行するマクロリンクの重みは original_id が一致するものを優先する（processing.finalize_network と同じ規則）。
+    """
+    nodes = integrated_nodes.rename(columns={"original_id": "macro_node", "_original_link_id": "macro_link_id"})
+    info = nodes[["id", "macro_node"]].rename(columns={"id": "node_id", "macro_node": "macro_id"})
+    links = integrated_links.merge(info, left_on="s", right_on="node_id", how="left").rename(columns={"macro_id": "macro_node_id_s"})
+    links = links.merge(info, left_on="t", right_on="node_id", how="left").rename(columns={"macro_id": "macro_node_id_t"})
+    links["macro_node_id"] = links.apply(
+        lambda row: row["macro_node_id_s"] if row["macro_node_id_s"] == row["macro_node_id_t"] else -1, axis=1)
+    links = calc_macro_link(links, s_col="macro_node_id_s", t_col="macro_node_id_t")
+
+    ori = calc_macro_link(ori_links.drop_duplicates(subset=["id"]))
+    by_id = ori.set_index("id")
+    by_macro = ori.drop_duplicates(subset=["macro_link"]).set_index("macro_link")
+    def weight(row):
+        if row["macro_link"] in ("", "-1"):
+            return np.nan
+        if row["original_id"] in by_id.index and by_id.loc[row["original_id"], "macro_link"] == row["macro_link"]:
+            return by_id.loc[row["original_id"], "weight"]
+        return by_macro.loc[row["macro_link"], "weight"] if row["macro_link"] in by_macro.index else np.nan
+    links["weight"] = links.apply(weight, axis=1)
+
+    coords = nodes.drop_duplicates(subset=["id"]).set_index("id")[["x", "y"]]
+    macro_coords = ori_nodes.drop_duplicates(subset=["id"]).set_index("id")[["x", "y"]]
+    def ped_pair(row):
+        macro = row["macro_link"]
+        try:
+            a, b = (int(v) for v in macro.split("_"))
+        except Exception:
+            return -1
+        if a not in macro_coords.index or b not in macro_coords.index or row["s"] not in coords.index or row["t"] not in coords.index:
+            return macro
+        Ax, Ay = macro_coords.loc[a]
+        Bx, By = macro_coords.loc[b]
+        mid_x = (coords.loc[row["s"], "x"] + coords.loc[row["t"], "x"]) / 2.0
+        mid_y = (coords.loc[row["s"], "y"] + coords.loc[row["t"], "y"]) / 2.0
+        signed_distance = (By - Ay) * mid_x + (Ax - Bx) * mid_y + (Bx * Ay - Ax * By)
+        return macro + ("_0" if signed_distance >= 0 else "_1")
+    is_ped = links["layer_id"] == 1
+    links["bidirectionalpair_id"] = [
+        ped_pair(row) if ped else (_reorder_macro(row["macro_link"]) if row["macro_link"] != "" else -1)
+        for ped, (_, row) in zip(is_ped, links.iterrows())]
+
+    if split:
+        nodes, links = _split_links(nodes, links)
+    else:
+        nodes["split"] = np.nan
+        links["split"] = np.nan
+
+    veh = links[links["layer_id"] == 0]
+    ped = links[links["layer_id"] == 1].copy()
+    reverse = ped.copy()
+    reverse["s"], reverse["t"] = ped["t"], ped["s"]
+    for df, suffix in [(ped, ".1"), (reverse, ".2")]:
+        df["bidirectionalpair_id"] = [b if (isinstance(b, int) and b == -1) else f"{b}{suffix}" for b in df["bidirectionalpair_id"]]
+    links = pd.concat([veh, ped, reverse])
+    links["id"] = np.arange(len(links))
+    return nodes, links
+
+
+def _split_links(final_nodes, final_links):
+    new_links, new_nodes = [], []
+    new_node_id = final_nodes["id"].max() + 1 if not final_nodes.empty else 1
+    nodes_dict = final_nodes.drop_duplicates(subset=["id"]).set_index("id").to_dict(orient="index")
+    for _, row in final_links.iterrows():
+        if pd.notnull(row.get("turn", "")) and row["turn"] != "":
+            new_link = row.copy()
+            new_link["id"] = len(new_links)
+            new_links.append(new_link)
+            continue
+        s, t = row["s"], row["t"]
+        if s not in nodes_dict or t not in nodes_dict:
+            continue
+        bidir = row["bidirectionalpair_id"]
+        new_nodes.append({"id": new_node_id, "x": (nodes_dict[s]["x"] + nodes_dict[t]["x"]) / 2.0,
+                          "y": (nodes_dict[s]["y"] + nodes_dict[t]["y"]) / 2.0, "macro_node": -1,
+                          "layer_id": row["layer_id"], "macro_link_id": row["macro_link"], "split": 1})
+        for part, (a, b) in enumerate([(s, new_node_id), (new_node_id, t)], start=1):
+            link = row.copy()
+            link["id"] = len(new_links)
+            link["s"], link["t"] = a, b
+            link["weight"] = row["weight"] / 2.0
+            link["bidirectionalpair_id"] = f"{bidir}.{part}" if bidir != "" else ""
+            link["split"] = 1
+            new_links.append(link)
+        new_node_id += 1
+    return pd.concat([final_nodes, pd.DataFrame(new_nodes)], ignore_index=True), pd.DataFrame(new_links)
@@ -0,0 +1,349 @@
+# run.py
+# -*- coding: utf-8 -*-
+"""
+run.py
+------
+合成ネットワーク（synthetic.py）を用いて、processing.py の各ステージと develop_hosha_network 全体の
+経過時間・CPU時間・メモリ使用量を、シナリオとリンク数ごとに計測します。
+--check を指定した場合は、リンク数が --check-max-links 以下のネットワークについて、
+各ステージの出力が参照実装（reference.py、ノード縮約は networkx による contract_network_and_extract）の出力と
+構造的に一致する（行・カラムの値が一致し、実数は許容誤差内）ことを確認し、不一致があれば終了コード 1 で終了します。
+
+例:
+  python benchmarks/run.py --sizes 1000 10000 --check
+  python benchmarks/run.py --scenarios grid hub --sizes 1000000 --skip export_final_network --json result.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from hosha_network.interface import make_config, develop_hosha_network  # noqa: E402
+from hosha_network.processing import (  # noqa: E402
+    get_utm_epsg,
+    preprocess_original_links,
+    preprocess_original_nodes,
+    branch_network_types,
+    compute_link_centers,
+    generate_augmented_nodes,
+    generate_normal_links,
+    generate_turn_links,
+    generate_turn_links_veh,
+    integrate_turn_links,
+    contract_network_unionfind,
+    contract_network_and_extract,
+    integrate_vehicle_and_pedestrian_networks,
+    finalize_network,
+    split_links,
+    birdirectionzie_ped_links,
+    adjust_display_coordinates,
+    build_export_tables,
+    export_final_network,
+    macro_link_pair,
+    render_macro_link,
+    render_link_keys,
+    render_node_keys,
+)
+from hosha_network.profiling import StageProfiler  # noqa: E402
+
+import reference  # noqa: E402
+from synthetic import SCENARIOS, make_network  # noqa: E402
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+NODE_COLUMNS = ["id", "x", "y", "original_id", "_original_link_id", "in_out"]
+LINK_COLUMNS = ["id", "s", "t", "original_id", "turn"]
+FINAL_NODE_COLUMNS = ["id", "x", "y", "macro_node", "macro_link_id", "in_out", "layer_id", "split"]
+FINAL_LINK_COLUMNS = ["id", "s", "t", "original_id", "turn", "layer_id", "macro_node_id", "macro_link", "weight",
+                      "bidirectionalpair_id", "split"]
+
+
+# === 出力の照合 ===
+def _norm(value):
+    """比較用に値を正規化する（欠損は "<NA>"、整数値の実数は整数として扱う）。"""
+    if value is None or value is pd.NA or (isinstance(value, (float, np.floating)) and np.isnan(value)):
+        return "<NA>"
+    if isinstance(value, (bool, np.bool_)):
+        return str(bool(value))
+    if isinstance(value, (int, np.integer)) or (isinstance(value, (float, np.floating)) and float(value).is_integer()):
+        return str(int(value))
+    if isinstance(value, (float, np.floating)):
+        return f"{value:.4f}"
+    return str(value)
+
+
+def _canonical(df, columns, sort):
+    df = df[columns].reset_index(drop=True)
+    if sort:
+        keys = pd.DataFrame({col: df[col].map(_norm) for col in columns})
+        df = df.iloc[keys.sort_values(columns, kind="stable").index].reset_index(drop=True)
+    return df
+
+
+def compare_frames(actual, expected, columns, sort=False, atol=1e-6):
+    """
+    actual と expected の columns の値を比較し、不一致の内容（一致すれば空のリスト）を返す。
+    sort=True の場合は行の順序（と行の順序に依存する id）を無視して比較する。
+    """
+    missing = [col for col in columns if col not in actual.columns or col not in expected.columns]
+    if missing:
+        return [f"カラムがありません: {missing}"]
+    if len(actual) != len(expected):
+        return [f"行数が異なります: {len(actual)} != {len(expected)}"]
+    if sort:
+        columns = [col for col in columns if col != "id"]
+    actual, expected = _canonical(actual, columns, sort), _canonical(expected, columns, sort)
+    errors = []
+    for col in columns:
+        a, e = actual[col], expected[col]
+        if pd.api.types.is_numeric_dtype(a.dtype) and pd.api.types.is_numeric_dtype(e.dtype) \
+                and not pd.api.types.is_bool_dtype(a.dtype):
+            a, e = a.to_numpy(dtype=float), e.to_numpy(dtype=float)
+            diff = ~np.isclose(a, e, rtol=1e-12, atol=atol, equal_nan=True)
+        else:
+            diff = (a.map(_norm) != e.map(_norm)).to_numpy()
+        if diff.any():
+            row = int(np.flatnonzero(diff)[0])
+            errors.append(f"{col}: {int(diff.sum())} 行が不一致（例: 行 {row}: {a[row]!r} != {e[row]!r}）")
+    return errors
+
+
+# === 計測 ===
+class Benchmark:
+    """
+    1つの合成ネットワークについて、ステージを順に計測し、照合結果を記録する。
+    """
+    def __init__(self, profiler, skip=(), check=False):
+        self.profiler = profiler
+        self.skip = set(skip)
+        self.check = check
+        self.checks = []
+
+    def run(self, stage, func, *args, rows=None, required=True):
+        """
+        func(*args) を stage として計測して実行する。
+        --skip で指定したステージは計測せず、後続のステージが出力を用いる場合（required=True）のみ実行する。
+        """
+        if stage in self.skip:
+            return func(*args) if required else None
+        with self.profiler.stage(stage) as counts:
+            result = func(*args)
+            if rows is not None:
+                counts.update(rows(result))
+        return result
+
+    def verify(self, stage, actual, reference_func, columns, sort=False):
+        """
+        reference_func() の出力と actual を比較して記録する（--check を指定しない場合、ステージを実行しなかった場合は何もしない）。
+        """
+        if not self.check or actual is None:
+            return
+        errors = compare_frames(actual, reference_func(), columns, sort=sort)
+        self.checks.append({"stage": stage, "ok": not errors, "errors": errors})
+
+
+def _frame_rows(df):
+    return {"rows": len(df)}
+
+
+def _pair_rows(result):
+    nodes, links = result
+    return {"nodes": len(nodes), "links": len(links)}
+
+
+def _chained_nodes(augmented, merged):
+    """
+    縮約リンク（turn="cross" かつ両端の _original_link_id と in_out が異なるリンク）が連鎖する交差点の出入口ノードのIDを返す。
+    """
+    nodes = augmented.set_index("id")
+    cross = merged[merged["turn"] == "cross"]
+    s, t = nodes.loc[cross["s"]], nodes.loc[cross["t"]]
+    mask = (s["_original_link_id"].to_numpy() != t["_original_link_id"].to_numpy()) & \
+           (s["in_out"].to_numpy() != t["in_out"].to_numpy())
+    ends = pd.Series(np.concatenate([cross["s"].to_numpy()[mask], cross["t"].to_numpy()[mask]]))
+    counts = ends.value_counts()
+    intersections = nodes.loc[counts.index[counts > 1], "original_id"].unique()
+    return augmented.loc[augmented["original_id"].isin(intersections), "id"].to_numpy()
+
+
+def benchmark_network(link_gdf, node_gdf, profiler, skip=(), check=False, contract=False, **kwargs):
+    """
+    processing.py の公開ステージを develop_hosha_network と同じ順に実行して計測し、最後に develop_hosha_network 全体を計測する。
+
+    Returns:
+      checks : list of dict
+          照合結果（"stage", "ok", "errors"）
+    """
+    bench = Benchmark(profiler, skip, check)
+    # ノード縮約は Union-Find のモードを計測し、networkx による既定の縮約（参照実装）と照合する
+    kwargs.setdefault("contract_method", "unionfind")
+    config = make_config(None, contract=contract, **kwargs)
+    link_df, node_df = link_gdf.copy(), node_gdf.copy()
+
+    # --- 前処理 ---
+    def project():
+        config["crs"]["projected_crs"] = get_utm_epsg(node_df["y_coord"].median(), node_df["x_coord"].median())
+        return gpd.GeoDataFrame(node_df, geometry=gpd.points_from_xy(node_df["x_coord"], node_df["y_coord"]),
+                                crs=config["crs"]["input_crs"]).to_crs(config["crs"]["projected_crs"])
+    # develop_hosha_network と同様に、出力では前処理後（投影後）の入力データを用いる
+    node_df = project()
+    processed_link = bench.run("preprocess_original_links", preprocess_original_links, link_df, rows=_frame_rows)
+    processed_node = bench.run("preprocess_original_nodes", preprocess_original_nodes, node_df, processed_link,
+                               rows=_frame_rows)
+    bench.verify("access", processed_link, lambda: pd.DataFrame({"access": reference.access(link_gdf)}), ["access"])
+    bench.verify("macro_link", pd.DataFrame({"macro_link": render_macro_link(*macro_link_pair(processed_link["s"], processed_link["t"]))}),
+                 lambda: reference.calc_macro_link(processed_link), ["macro_link"])
+
+    # --- 分岐・リンク中心座標 ---
+    walk_link, walk_node, veh_link, veh_node = bench.run(
+        "branch_network_types", branch_network_types, processed_link, processed_node,
+        rows=lambda r: {"walk_links": len(r[0]), "veh_links": len(r[2])})
+    layers = {}
+    for layer, net_link, net_node in [("ped", walk_link, walk_node), ("veh", veh_link, veh_node)]:
+        centered = bench.run(f"compute_link_centers[{layer}]", compute_link_centers, net_link, net_node, rows=_frame_rows)
+        bench.verify(f"compute_link_centers[{layer}]", centered,
+                     lambda: reference.compute_link_centers(net_link, net_node), ["id", "center_x", "center_y"])
+        layers[layer] = (net_link, net_node, centered)
+
+    # --- 出入口ノード・ターンリンク・通常リンク ---
+    built = {}
+    for layer, (net_link, net_node, centered) in layers.items():
+        params = config[layer]
+        access_suffix = 1 if layer == "ped" else 0
+        augmented = bench.run(f"generate_augmented_nodes[{layer}]", generate_augmented_nodes, centered, net_node,
+                              params["offset_angle"], params["scale"], access_suffix, params["left_driving"], rows=_frame_rows)
+        bench.verify(f"generate_augmented_nodes[{layer}]", augmented,
+                     lambda: reference.generate_augmented_nodes(centered, net_node, params["offset_angle"], params["scale"],
+                                                                access_suffix, params["left_driving"]), NODE_COLUMNS)
+        if layer == "ped":
+            turn_args = (augmented, net_node, params["threshold_deg"])
+            turn_func, reference_turn = generate_turn_links, reference.generate_turn_links
+        else:
+            turn_args = (augmented, net_node, centered, params["make_uturn"], params["threshold_deg"])
+            turn_func, reference_turn = generate_turn_links_veh, reference.generate_turn_links_veh
+        turn_links = bench.run(f"{turn_func.__name__}[{layer}]", turn_func, *turn_args, rows=_frame_rows)
+        bench.verify(f"{turn_func.__name__}[{layer}]", turn_links, lambda: reference_turn(*turn_args), LINK_COLUMNS)
+        normal_links = bench.run(f"generate_normal_links[{layer}]", generate_normal_links, net_link, augmented, rows=_frame_rows)
+        bench.verify(f"generate_normal_links[{layer}]", normal_links,
+                     lambda: reference.generate_normal_links(net_link, augmented), LINK_COLUMNS + ["_original_node_id"])
+        merged = bench.run(f"integrate_turn_links[{layer}]", integrate_turn_links, normal_links, turn_links, rows=_frame_rows)
+        built[layer] = (augmented, merged)
+
+    # --- ノード縮約（歩行者） ---
+    augmented, merged = built["ped"]
+    contracted = bench.run("contract_network_unionfind", contract_network_unionfind, augmented, merged, walk_node,
+                           rows=_pair_rows)
+    if bench.check:
+        # 縮約リンクが連鎖する交差点（縮約の成分が3ノード以上）では、networkx による逐次の縮約は順序に依存し、
+        # Union-Find による一括の併合と結果が異なるため、2ノードの縮約のみからなる交差点で照合する
+        chained = _chained_nodes(augmented, merged)
+        reference_nodes, reference_links = contract_network_and_extract(augmented, merged, walk_node)
+        def pairwise(result):
+            nodes, links = result
+            return nodes[~nodes["id"].isin(chained)], links[~(links["s"].isin(chained) | links["t"].isin(chained))]
+        (nodes, links), (reference_nodes, reference_links) = pairwise(contracted), pairwise((reference_nodes, reference_links))
+        bench.verify("contract_network_unionfind[nodes]", nodes, lambda: reference_nodes,
+                     ["id", "x", "y", "original_id", "_original_link_id", "in_out"], sort=True)
+        bench.verify("contract_network_unionfind[links]", links, lambda: reference_links,
+                     ["s", "t", "original_id", "turn"], sort=True)
+        bench.checks[-1]["excluded_intersections"] = int(augmented.loc[augmented["id"].isin(chained), "original_id"].nunique())
+    if contract:
+        built["ped"] = contracted
+
+    # --- 統合・属性付与・リンク分割・双方向化 ---
+    integrated_nodes, integrated_links = bench.run(
+        "integrate_vehicle_and_pedestrian_networks", integrate_vehicle_and_pedestrian_networks,
+        built["ped"][0].copy(), built["ped"][1], built["veh"][0].copy(), built["veh"][1], rows=_pair_rows)
+    final = bench.run("finalize_network", finalize_network, integrated_nodes.copy(), integrated_links, processed_link,
+                      processed_node, rows=_pair_rows)
+    if config["method"]["split"]:
+        final = bench.run("split_links", split_links, *final, rows=_pair_rows)
+    else:
+        final[0]["split"], final[1]["split"] = np.nan, np.nan
+    final_nodes, final_links = bench.run("birdirectionzie_ped_links", birdirectionzie_ped_links, *final, rows=_pair_rows)
+    if bench.check:
+        reference_nodes, reference_links = reference.postprocess_network(
+            integrated_nodes, integrated_links, processed_link, processed_node, split=config["method"]["split"])
+        bench.verify("postprocess_network[nodes]", render_node_keys(final_nodes), lambda: reference_nodes,
+                     [col for col in FINAL_NODE_COLUMNS if col in final_nodes.columns])
+        bench.verify("postprocess_network[links]", render_link_keys(final_links), lambda: reference_links, FINAL_LINK_COLUMNS)
+
+    # --- 表示用座標・出力 ---
+    display_nodes = bench.run("adjust_display_coordinates", adjust_display_coordinates, final_nodes, processed_node,
+                              rows=_frame_rows, required=False)
+    bench.verify("adjust_display_coordinates", display_nodes,
+                 lambda: reference.adjust_display_coordinates(final_nodes, processed_node), ["id", "x", "y"])
+    bench.run("build_export_tables", build_export_tables, final_nodes, final_links, node_df, link_df, config, rows=_pair_rows,
+              required=False)
+    with tempfile.TemporaryDirectory() as output_dir:
+        config["output"]["dir"] = output_dir
+        config["output"]["suffix"] = ""
+        bench.run("export_final_network", export_final_network, final_nodes, final_links, node_df, link_df, config,
+                  required=False)
+
+    # --- 全体 ---
+    bench.run("develop_hosha_network", lambda: tuple(develop_hosha_network(
+        link_gdf.copy(), node_gdf.copy(), output_dir=None, contract=contract, **kwargs)), rows=_pair_rows, required=False)
+    return bench.checks
+
+
+def _format_bytes(value):
+    return "-" if value is None else f"{value / 1024**2:,.0f}MB"
+
+
+def print_report(scenario, n_links, report, checks):
+    print(f"\n=== {scenario} : {n_links:,} links ===")
+    print(f"{'stage':<48}{'wall(s)':>10}{'cpu(s)':>10}{'peak_rss':>12}  rows")
+    for record in report["stages"]:
+        rows = ", ".join(f"{k}={v:,}" for k, v in record["rows"].items())
+        print(f"{record['stage']:<48}{record['wall_time']:>10.3f}{record['cpu_time']:>10.3f}"
+              f"{_format_bytes(record['peak_rss']):>12}  {rows}")
+    for check in checks:
+        note = f"（連鎖する縮約のため {check['excluded_intersections']} 交差点を除外）" if check.get("excluded_intersections") else ""
+        print(f"[{'OK' if check['ok'] else 'NG'}] {check['stage']}{note}")
+        for error in check["errors"]:
+            print(f"      {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="合成ネットワークによる構築処理のスケーリングベンチマーク")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="リンク数（1,000〜1,000,000 程度）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--contract", action="store_true", help="歩行者ネットワークのノード縮約を行う")
+    parser.add_argument("--check", action="store_true", help="参照実装の出力と照合する")
+    parser.add_argument("--check-max-links", type=int, default=1000, help="照合を行う最大のリンク数（参照実装は低速なため）")
+    parser.add_argument("--skip", nargs="+", default=[], help="計測しないステージ名")
+    parser.add_argument("--trace-memory", action="store_true", help="tracemalloc でステージ中のメモリのピークを計測する")
+    parser.add_argument("--json", help="計測結果を保存する JSON ファイル")
+    args = parser.parse_args(argv)
+
+    results = []
+    failed = False
+    for scenario in args.scenarios:
+        for n_links in args.sizes:
+            link_gdf, node_gdf = make_network(scenario, n_links, seed=args.seed)
+            profiler = StageProfiler(trace_memory=args.trace_memory)
+            checks = benchmark_network(link_gdf, node_gdf, profiler, skip=args.skip,
+                                       check=args.check and n_links <= args.check_max_links, contract=args.contract)
+            report = profiler.report()
+            print_report(scenario, n_links, report, checks)
+            failed |= not all(check["ok"] for check in checks)
+            results.append({"scenario": scenario, "n_links": n_links, "seed": args.seed, "contract": args.contract,
+                            **report, "checks": checks})
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+# synthetic.py
+# -*- coding: utf-8 -*-
+"""
+synthetic.py
+------------
+ベンチマーク用の合成マクロネットワーク（GMNS 形式のリンク・ノードの GeoDataFrame, EPSG:4326）を生成します。
+
+シナリオ:
+  - grid    : 格子状の道路網（すべて双方向、歩車共用）
+  - radial  : 放射環状の道路網（中心ノードが高次数）
+  - oneway  : 格子状の道路網に dir_flag（1, -1, 0）と幹線の facility_type を混在させたもの
+  - footway : 格子状の道路網に歩行者専用（footway, offstreet_path）・車両専用（ped_facility="none", motorway）のリンクを混在させたもの
+  - hub     : 斜めのリンクを加えた次数 8 の格子に、次数 16 以上のハブ交差点を加えたもの
+いずれもリンク数 n_links（1,000〜1,000,000 程度）を指定して生成し、同じ seed からは同じネットワークを生成します。
+"""
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+# 生成するネットワークの基準点（経度・緯度）とノード間隔（m）
+ORIGIN = (139.70, 35.68)
+SPACING = 100.0
+_M_PER_DEG_LAT = 110540.0
+_M_PER_DEG_LON = 111320.0 * np.cos(np.radians(ORIGIN[1]))
+
+
+def to_gmns(node_x, node_y, s, t, dir_flag=None, facility_type=None, ped_facility=None):
+    """
+    平面座標（m）のノードと、リンクの端点の位置（s, t）から GMNS 形式のリンク・ノードの GeoDataFrame を作成する。
+    ノード ID は位置 + 1、リンク ID は 1 からの連番とする。
+
+    Returns:
+      link_gdf, node_gdf : GeoDataFrame（EPSG:4326）
+    """
+    s = np.asarray(s, dtype=np.int64)
+    t = np.asarray(t, dtype=np.int64)
+    n_links = len(s)
+    lon = ORIGIN[0] + np.asarray(node_x) / _M_PER_DEG_LON
+    lat = ORIGIN[1] + np.asarray(node_y) / _M_PER_DEG_LAT
+
+    # リンクに接続するノードのみを残す
+    used = np.unique(np.concatenate([s, t]))
+    node_gdf = gpd.GeoDataFrame({
+        "node_id": used + 1,
+        "x_coord": lon[used],
+        "y_coord": lat[used],
+    }, geometry=gpd.points_from_xy(lon[used], lat[used]), crs="EPSG:4326")
+
+    coords = np.stack([np.column_stack([lon[s], lat[s]]), np.column_stack([lon[t], lat[t]])], axis=1)
+    link_gdf = gpd.GeoDataFrame({
+        "link_id": np.arange(1, n_links + 1),
+        "from_node_id": s + 1,
+        "to_node_id": t + 1,
+        "directed": False,
+        "dir_flag": np.zeros(n_links, dtype=np.int64) if dir_flag is None else dir_flag,
+        "length": np.hypot(node_x[t] - node_x[s], node_y[t] - node_y[s]).round(2),
+        "facility_type": "residential" if facility_type is None else facility_type,
+        "ped_facility": "sidewalk" if ped_facility is None else ped_facility,
+    }, geometry=shapely.linestrings(coords), crs="EPSG:4326")
+    return link_gdf, node_gdf
+
+
+def _grid_size(n_links, links_per_node):
+    """n_links 本以上のリンクを持つ k×k 格子の k を求める。"""
+    return max(2, int(np.ceil(np.sqrt(n_links / links_per_node))) + 1)
+
+
+def _grid_links(k, diagonal=False):
+    """k×k 格子の座標とリンク（横・縦、diagonal=True の場合は斜め2方向も）の端点の位置を返す。"""
+    iy, ix = np.divmod(np.arange(k * k), k)
+    x, y = ix * SPACING, iy * SPACING
+    pos = np.arange(k * k).reshape(k, k)
+    pairs = [(pos[:, :-1], pos[:, 1:]), (pos[:-1, :], pos[1:, :])]
+    if diagonal:
+        pairs += [(pos[:-1, :-1], pos[1:, 1:]), (pos[:-1, 1:], pos[1:, :-1])]
+    s = np.concatenate([a.ravel() for a, _ in pairs])
+    t = np.concatenate([b.ravel() for _, b in pairs])
+    # 空間的に近いリンクが近い行に並ぶよう、始点の位置で並べる
+    order = np.argsort(s, kind="stable")
+    return x.astype(float), y.astype(float), s[order], t[order]
+
+
+def grid_network(n_links, seed=0):
+    k = _grid_size(n_links, 2)
+    x, y, s, t = _grid_links(k)
+    return to_gmns(x, y, s[:n_links], t[:n_links])
+
+
+def radial_network(n_links, seed=0):
+    spokes = max(8, int(np.sqrt(n_links / 2)))
+    rings = max(1, int(np.ceil(n_links / (2 * spokes))))
+    ring, spoke = np.divmod(np.arange(rings * spokes), spokes)
+    angle = 2 * np.pi * spoke / spokes
+    radius = (ring + 1) * SPACING
+    # 位置 0 は中心ノード、位置 1 + ring * spokes + spoke は環上のノード
+    x = np.concatenate([[0.0], radius * np.cos(angle)])
+    y = np.concatenate([[0.0], radius * np.sin(angle)])
+    node = 1 + ring * spokes + spoke
+    inner = np.where(ring == 0, 0, node - spokes)
+    ring_next = 1 + ring * spokes + (spoke + 1) % spokes
+    s = np.column_stack([inner, node]).ravel()
+    t = np.column_stack([node, ring_next]).ravel()
+    return to_gmns(x, y, s[:n_links], t[:n_links])
+
+
+def oneway_network(n_links, seed=0):
+    rng = np.random.default_rng(seed)
+    k = _grid_size(n_links, 2)
+    x, y, s, t = _grid_links(k)
+    s, t = s[:n_links], t[:n_links]
+    dir_flag = rng.choice([1, -1, 0], size=len(s), p=[0.3, 0.3, 0.4])
+    facility_type = rng.choice(["primary", "secondary", "trunk", "residential"], size=len(s), p=[0.2, 0.2, 0.1, 0.5])
+    return to_gmns(x, y, s, t, dir_flag=dir_flag, facility_type=facility_type)
+
+
+def footway_network(n_links, seed=0):
+    rng = np.random.default_rng(seed)
+    k = _grid_size(n_links, 2)
+    x, y, s, t = _grid_links(k)
+    s, t = s[:n_links], t[:n_links]
+    kind = rng.choice(["road", "footway", "offstreet", "vehicle", "motorway"], size=len(s), p=[0.6, 0.15, 0.05, 0.1, 0.1])
+    facility_type = np.select([kind == "footway", kind == "motorway"], ["footway", "motorway"], "residential")
+    ped_facility = np.select([kind == "offstreet", kind == "vehicle"], ["offstreet_path", "none"], "sidewalk")
+    return to_gmns(x, y, s, t, facility_type=facility_type, ped_facility=ped_facility)
+
+
+def hub_network(n_links, seed=0, hub_every=50, hub_spokes=8):
+    k = _grid_size(n_links, 4)
+    x, y, s, t = _grid_links(k, diagonal=True)
+    # ハブ：hub_every 個おきのノードから周囲の新しいノードへ hub_spokes 本のリンクを追加する
+    hubs = np.arange(0, k * k, hub_every)
+    angle = 2 * np.pi * (np.arange(hub_spokes) + 0.5) / hub_spokes
+    leaf_x = (x[hubs][:, None] + 0.3 * SPACING * np.cos(angle)).ravel()
+    leaf_y = (y[hubs][:, None] + 0.3 * SPACING * np.sin(angle)).ravel()
+    leaves = k * k + np.arange(len(leaf_x))
+    x = np.concatenate([x, leaf_x])
+    y = np.concatenate([y, leaf_y])
+    s = np.concatenate([s, np.repeat(hubs, hub_spokes)])
+    t = np.concatenate([t, leaves])
+    n_hub = min(len(leaves), n_links // 4)
+    keep = np.concatenate([np.arange(n_links - n_hub), len(s) - len(leaves) + np.arange(n_hub)])
+    return to_gmns(x, y, s[keep], t[keep])
+
+
+SCENARIOS = {
+    "grid": grid_network,
+    "radial": radial_network,
+    "oneway": oneway_network,
+    "footway": footway_network,
+    "hub": hub_network,
+}
+
+
+def make_network(scenario, n_links, seed=0):
+    """
+    シナリオ名とリンク数から合成ネットワークを生成する。
+
+    Returns:
+      link_gdf, node_gdf : GeoDataFrame（EPSG:4326）
+    """
+    if scenario not in SCENARIOS:
+        raise ValueError(f"未対応のシナリオです: {scenario}")
+    return SCENARIOS[scenario](n_links, seed=seed)
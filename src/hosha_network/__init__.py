@@ -1 +1,2 @@
-from .interface import develop_hosha_network
\ No newline at end of file
+from .interface import develop_hosha_network, update_hosha_network, sweep_hosha_network, NetworkResult
+from .network import HoshaNetwork
\ No newline at end of file
@@ -0,0 +1,114 @@
+# cache.py
+# -*- coding: utf-8 -*-
+"""
+cache.py
+--------
+ネットワーク構築の各ステージ（前処理、レイヤごとの出入口ノード生成・ターンリンク生成、統合、属性付与、リンク分割）の
+中間結果をディスクに保存するキャッシュを実装します。
+
+各ステージの結果は、入力データと関係する config の部分辞書から計算したキー（SHA-256）で保存し、
+後段のステージのキーは前段のキーから連鎖的に求めます。出力側の設定（output_crs など）はキーに含まれないため、
+出力設定のみを変えた再実行では構築処理を再計算しません。保存容量が上限を超えた場合は、最後に使われた時刻の古いものから削除します。
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import pandas as pd
+import geopandas as gpd
+
+
+def _update_hash(h, obj):
+    if isinstance(obj, pd.DataFrame):
+        h.update(repr(list(obj.columns)).encode())
+        h.update(repr([str(d) for d in obj.dtypes]).encode())
+        h.update(pd.util.hash_pandas_object(obj.index).to_numpy().tobytes())
+        for col in obj.columns:
+            series = obj[col]
+            if isinstance(series.dtype, gpd.array.GeometryDtype):
+                for wkb in series.to_wkb():
+                    h.update(wkb if wkb is not None else b"")
+            else:
+                h.update(pd.util.hash_pandas_object(series, index=False).to_numpy().tobytes())
+    elif isinstance(obj, dict):
+        h.update(json.dumps(obj, sort_keys=True, default=str).encode())
+    else:
+        h.update(repr(obj).encode())
+
+
+def fingerprint(*parts):
+    """
+    DataFrame（ジオメトリは WKB）、辞書、その他の値（repr）の並びから SHA-256 のキーを計算する。
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(b"\x00")
+        _update_hash(h, part)
+    return h.hexdigest()
+
+
+class StageCache:
+    """
+    StageCache は、ステージの計算結果をキーごとに pickle で保存するディスクキャッシュです。
+    max_bytes を超えた場合は、最終利用時刻（ファイルの更新時刻）の古いものから削除します。
+    """
+    def __init__(self, cache_dir, max_bytes=2 * 1024**3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, *parts):
+        return fingerprint(*parts)
+
+    def path(self, stage, key):
+        return os.path.join(self.cache_dir, f"{stage}-{key}.pkl")
+
+    def get_or_compute(self, stage, key, compute):
+        """
+        stage, key に対応する結果がキャッシュにあれば読み込み、なければ compute() を実行して保存する。
+        """
+        path = self.path(stage, key)
+        if os.path.exists(path):
+            try:
+                value = pd.read_pickle(path)
+                os.utime(path)
+                return value
+            except Exception:
+                os.remove(path)
+        value = compute()
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        pd.to_pickle(value, tmp_path)
+        os.replace(tmp_path, path)
+        self.evict()
+        return value
+
+    def evict(self):
+        """
+        保存容量が max_bytes 以下になるまで、最終利用時刻の古いものから削除する。
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+
+
+def cached_stage(cache, stage, key_parts, compute):
+    """
+    cache が指定されていればステージの結果をキャッシュ経由で取得する（指定がなければ compute() をそのまま実行する）。
+
+    Returns:
+      value, key : ステージの結果と、そのキー（後段のステージのキーに用いる。cache が None の場合は None）
+    """
+    if cache is None:
+        return compute(), None
+    key = cache.key(stage, *key_parts)
+    return cache.get_or_compute(stage, key, compute), key
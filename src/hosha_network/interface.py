@@ -8,6 +8,7 @@ Created on Wed May 28 21:11:36 2025
 # src/hosha_network/interface.py
 
 import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import geopandas as gpd
 import numpy as np
 from .processing import (
@@ -16,63 +17,196 @@ from .processing import (
     branch_network_types,
     process_pedestrian_network,
     process_vehicle_network,
+    augment_pedestrian_network,
+    assemble_pedestrian_network,
+    augment_vehicle_network,
+    generate_turn_links,
+    generate_turn_links_veh,
+    generate_normal_links,
+    integrate_turn_links,
     integrate_vehicle_and_pedestrian_networks,
     finalize_network,
-    split_links,
+    split_network_links,
     birdirectionzie_ped_links,
+    postprocess_network,
+    ensure_link_centers,
     adjust_display_coordinates,
     export_final_network,
+    build_export_tables,
     get_utm_epsg
 )
+from .tiling import process_network_tiled
+from .incremental import update_network
+from .cache import StageCache, cached_stage
+from .network import HoshaNetwork
+from .profiling import StageProfiler, profile_stage, profiled_call, run_profiled_call, write_report
 
-def develop_hosha_network(link_df, node_df, output_dir="./output", **kwargs):
+def _build_pedestrian_layer(walk_link, walk_node, contract_option, config, cache=None, input_key=None):
     """
-    A user-facing function to construct a pedestrian-vehicle integrated network.
+    process_pedestrian_network と同じ処理を行う。cache（cache.StageCache）を指定した場合は、新規ノードの生成と
+    ターンリンクの生成の結果を input_key（入力データのキー）と config["ped"] の関係する値から求めたキーでキャッシュする。
+    """
+    if cache is None:
+        return process_pedestrian_network(walk_link, walk_node, contract_option, config)
+    ped = config["ped"]
+    if input_key is None:
+        input_key = cache.key(walk_link, walk_node)
+    updated_nodes, augment_key = cached_stage(cache, "ped_augment", [input_key, ped["offset_angle"], ped["scale"], ped["left_driving"]],
+                                              lambda: augment_pedestrian_network(walk_link, walk_node, ped))
+    turn_links, _ = cached_stage(cache, "ped_turn", [augment_key, ped["threshold_deg"]],
+                                 lambda: generate_turn_links(updated_nodes, walk_node, threshold_deg=ped["threshold_deg"]))
+    return assemble_pedestrian_network(walk_link, walk_node, updated_nodes, turn_links, contract_option, config)
 
-    Parameters:
-    - link_df (DataFrame): Link data in GMNS format.
-    - node_df (DataFrame): Node data in GMNS format.
-    - output_dir (str): Directory where the output files will be saved (default: "./output").
-    - **kwargs: Optional keyword arguments for fine-tuning the construction process.
+def _build_vehicle_layer(veh_link, veh_node, config, cache=None, input_key=None):
+    """
+    process_vehicle_network と同じ処理を行う。cache を指定した場合は、新規ノードの生成と
+    ターンリンクの生成の結果を input_key と config["veh"] の関係する値から求めたキーでキャッシュする。
+    """
+    if cache is None:
+        return process_vehicle_network(veh_link, veh_node, config)
+    veh = config["veh"]
+    if input_key is None:
+        input_key = cache.key(veh_link, veh_node)
+    (updated_links, updated_nodes), augment_key = cached_stage(cache, "veh_augment", [input_key, veh["offset_angle"], veh["scale"], veh["left_driving"]],
+                                                               lambda: augment_vehicle_network(veh_link, veh_node, veh))
+    turn_links, _ = cached_stage(cache, "veh_turn", [augment_key, veh["make_uturn"], veh["threshold_deg"]],
+                                 lambda: generate_turn_links_veh(updated_nodes, veh_node, updated_links, make_uturn=veh["make_uturn"], threshold_deg=veh["threshold_deg"]))
+    return updated_nodes, integrate_turn_links(generate_normal_links(veh_link, updated_nodes), turn_links)
 
-      Optional Keyword Arguments (kwargs):
-      - input_crs (str): Coordinate reference system (CRS) of input data (default: "EPSG:4326").
-      - output_crs (str): CRS to use for exported output data (default: "EPSG:4326").
-      - output_display (bool): Whether to export display-friendly files for visualization (default: False).
-      - output_name (str): Prefix for the names of output files (default: "hosha_").
+def _postprocess_stages(integrated_nodes, integrated_links, ori_links, ori_nodes, config, cache=None, input_key=None, profiler=None):
+    """
+    postprocess_network と同じ処理を行う。cache を指定した場合は、属性付与と分割・双方向化の結果を
+    input_key（統合結果のキー）から求めたキーでキャッシュする。
+    profiler（profiling.StageProfiler）を指定した場合は、"finalize", "split"（分割する場合）, "bidirectionalize" の各ステージを計測する。
+    """
+    if cache is not None and input_key is None:
+        input_key = cache.key(integrated_nodes, integrated_links, ori_links, ori_nodes)
+    (final_nodes, final_links), finalize_key = cached_stage(
+        cache, "finalize", [input_key],
+        lambda: profiled_call(profiler, "finalize", finalize_network, integrated_nodes, integrated_links, ori_links, ori_nodes))
+    def split():
+        if config["method"]["split"]:
+            nodes, links = profiled_call(profiler, "split", split_network_links, final_nodes, final_links, True)
+        else:
+            nodes, links = split_network_links(final_nodes, final_links, False)
+        return profiled_call(profiler, "bidirectionalize", birdirectionzie_ped_links, nodes, links)
+    return cached_stage(cache, "split", [finalize_key, config["method"]["split"]], split)[0]
 
-      - contract (bool): Whether to contract the pedestrian network (default: False).
-      - left_driving (bool): Whether the network assumes left-hand traffic (default: True).
-      - make_uturn (bool): Whether to allow U-turns in vehicle network construction (default: True).
-      - split (bool): Whether to split links at their midpoints (default: True).
-      
-      - veh_offset_angle (float): Angular offset (in degrees) when generating vehicle turning links (default: 10).
-      - veh_scale (float): Link length scaling factor for vehicle links (default: 0.5).
-      - veh_threshold_deg (float): Angular threshold (in degrees) to determine turn connections (default: 45).
+def build_layer_networks(walk_link, walk_node, veh_link, veh_node, contract_option, config, cache=None, input_key=None, profiler=None):
+    """
+    歩行者ネットワークと車両ネットワークを構築する。
+    両者は統合まで互いに独立なため、config["method"]["parallel_layers"] が "thread"（True）または
+    "process" の場合は2つのワーカーで同時に処理する。"thread" では入力データをコピーせずに共有する。
+    config["method"]["tile_size"] が指定されている場合は、各レイヤをタイル分割して構築する。
+    cache を指定した場合は、各レイヤのステージの結果を input_key（前処理結果のキー）から求めたキーでキャッシュする（タイル分割時を除く）。
+    profiler を指定した場合は、各レイヤの構築を "ped", "veh" のステージとして計測する（並列時はワーカー内で計測する）。
+    tracemalloc はプロセス全体で共有されるため、"thread" のワーカーでは peak_traced を計測しない（peak_rss などのみ記録する）。
 
-      - ped_offset_angle (float): Angular offset (in degrees) when generating pedestrian turning links (default: 10).
-      - ped_scale (float): Link length scaling factor for pedestrian links (default: 1.0).
-      - ped_threshold_deg (float): Angular threshold (in degrees) to determine pedestrian turn connections (default: 45).
-     
-    """   
-    
-    os.makedirs(output_dir, exist_ok=True)
+    Returns:
+      (final_ped_nodes, final_ped_links), (updated_veh_nodes, updated_veh_links)
+    """
+    if config["method"].get("tile_size"):
+        tasks = [(process_network_tiled, (walk_link, walk_node, "ped", config, contract_option)),
+                 (process_network_tiled, (veh_link, veh_node, "veh", config))]
+    else:
+        ped_key = cache.key("ped", input_key) if cache is not None and input_key is not None else None
+        veh_key = cache.key("veh", input_key) if cache is not None and input_key is not None else None
+        tasks = [(_build_pedestrian_layer, (walk_link, walk_node, contract_option, config, cache, ped_key)),
+                 (_build_vehicle_layer, (veh_link, veh_node, config, cache, veh_key))]
+
+    parallel = config["method"].get("parallel_layers", False)
+    if parallel is True:
+        parallel = "thread"
+    if not parallel:
+        return tuple(profiled_call(profiler, stage, func, *args) for stage, (func, args) in zip(("ped", "veh"), tasks))
+    if parallel not in ("thread", "process"):
+        raise ValueError(f"未対応の並列化方式です: {parallel}")
+    Executor = ThreadPoolExecutor if parallel == "thread" else ProcessPoolExecutor
+    with Executor(max_workers=len(tasks)) as pool:
+        if profiler is None:
+            futures = [pool.submit(func, *args) for func, args in tasks]
+            return tuple(f.result() for f in futures)
+        # スレッドのワーカーが tracemalloc を reset_peak / stop すると互いの計測（と呼び出し元の計測）を壊すため、プロセスのワーカーのみで追跡する
+        trace_memory = profiler.trace_memory and parallel == "process"
+        futures = [pool.submit(run_profiled_call, stage, func, args, trace_memory)
+                   for stage, (func, args) in zip(("ped", "veh"), tasks)]
+        results = []
+        for f in futures:
+            result, records = f.result()
+            profiler.extend(records)
+            results.append(result)
+        return tuple(results)
+
+class NetworkResult:
+    """
+    構築したネットワーク。nodes, links は出力ファイルと同じ GMNS 形式の GeoDataFrame（output_crs）で、
+    初めて参照したときに変換する。final_nodes, final_links は内部形式（投影座標系）のデータで、
+    update_hosha_network の previous として用いる。nodes, links = result のように展開することもできる。
+    network は final_nodes, final_links から初めて参照したときに作成する、NumPy 配列で保持する読み取り専用の表現（HoshaNetwork）。
+    作成後は final_nodes, final_links に加えて配列も保持するため、参照しなければ追加のメモリは使用しない。
+    profile は profile=True で構築した場合のステージごとの計測結果（profiling.StageProfiler.report）。
+    """
+    def __init__(self, final_nodes, final_links, node_df, link_df, config, profile=None):
+        self.final_nodes = final_nodes
+        self.profile = profile
+        self.final_links = final_links
+        self._node_df = node_df
+        self._link_df = link_df
+        self._config = config
+        self._tables = None
+        self._network = None
+
+    def _gmns_tables(self):
+        if self._tables is None:
+            self._tables = build_export_tables(self.final_nodes, self.final_links, self._node_df, self._link_df, self._config)
+        return self._tables
 
+    @property
+    def nodes(self):
+        return self._gmns_tables()[0]
+
+    @property
+    def links(self):
+        return self._gmns_tables()[1]
+
+    @property
+    def network(self):
+        if self._network is None:
+            self._network = HoshaNetwork.from_frames(self.final_nodes, self.final_links)
+        return self._network
+
+    def __iter__(self):
+        return iter(self._gmns_tables())
+
+def make_config(output_dir="./output", **kwargs):
+    """
+    develop_hosha_network のキーワード引数から処理設定（config）の辞書を作成する。
+    """
     config = {}
     config["output"]={}
     config["crs"]={}
     config["veh"]={}
     config["ped"]={}
     config["method"]={}
+    config["cache"]={}
+    config["profile"]={}
     
     config["crs"]["input_crs"] = kwargs.get("input_crs", "EPSG:4326")  #入力データのCRS（例: "EPSG:4326"）
     config["crs"]["export_crs"] = kwargs.get("output_crs", "EPSG:4326")  #出力データのCRS（例: "EPSG:4326"）
     config["output"]["display"] = kwargs.get("output_display", False)  #表示用データを出力するか（デフォルト: False）
     config["output"]["name"] = kwargs.get("output_name", "hosha_") #出力データの名前
     config["output"]["dir"] = output_dir
+    config["output"]["format"] = kwargs.get("output_format", "geojson")  #出力形式（"geojson", "parquet", "feather", "csv", "flatgeobuf"）
+    config["output"]["partition"] = kwargs.get("output_partition", False)  #layer_id ごとに分割して出力するか
+    config["output"]["chunk_size"] = kwargs.get("output_chunk_size", None)  #指定行数ごとに逐次出力する
+    config["output"]["precision"] = kwargs.get("output_precision", None)  #出力座標の小数桁数
 
     config["method"]["contract"]=kwargs.get("contract",False)
+    config["method"]["contract_method"]=kwargs.get("contract_method","networkx")
     config["method"]["split"] = kwargs.get("split", True)
+    config["method"]["tile_size"] = kwargs.get("tile_size", None)  #タイル分割して並列構築する場合のタイルの大きさ（m）
+    config["method"]["tile_workers"] = kwargs.get("tile_workers", None)  #タイル処理のプロセス数
+    config["method"]["parallel_layers"] = kwargs.get("parallel_layers", False)  #歩行者・車両レイヤを同時に構築するか（"thread", "process"）
 
     config["veh"]["offset_angle"]=kwargs.get("veh_offset_angle", 10)
     config["veh"]["scale"]=kwargs.get("veh_scale", 0.5)
@@ -85,38 +219,36 @@ def develop_hosha_network(link_df, node_df, output_dir="./output", **kwargs):
     config["ped"]["left_driving"]=kwargs.get("left_driving", True)
     config["ped"]["threshold_deg"]=kwargs.get("ped_threshold_deg", 45)
 
-    # --- 前処理 ---
-    config["crs"]["projected_crs"] = get_utm_epsg(node_df['y_coord'].median(),node_df['x_coord'].median())
-    node_df = gpd.GeoDataFrame(node_df, geometry=gpd.points_from_xy(node_df['x_coord'], node_df['y_coord']),crs=config["crs"]["input_crs"] ).to_crs(config["crs"]["projected_crs"])
-    
-    processed_link = preprocess_original_links(link_df)
-    processed_node = preprocess_original_nodes(node_df, processed_link)
+    config["cache"]["dir"] = kwargs.get("cache_dir", None)  #ステージキャッシュの保存先（None の場合はキャッシュしない）
+    config["cache"]["max_bytes"] = kwargs.get("cache_max_bytes", 2 * 1024**3)  #ステージキャッシュの容量上限（バイト）
 
-    # --- ネットワーク種別の分岐 ---
-    walk_link, walk_node, veh_link, veh_node = branch_network_types(processed_link, processed_node)
+    config["profile"]["enabled"] = kwargs.get("profile", False)  #ステージごとの時間・メモリを計測するか
+    config["profile"]["trace_memory"] = kwargs.get("profile_memory", False)  #tracemalloc でステージ中のメモリのピークを計測するか（処理が遅くなる）
+    return config
 
-    # --- 歩行者ネットワークの構築 ---
-    contract_option = "partial" if config["method"]["contract"] else "none"
-    final_ped_nodes, final_ped_links = process_pedestrian_network(walk_link, walk_node, contract_option,config)
+def prepare_inputs(link_df, node_df, config, cache=None):
+    """
+    入力データを投影座標系（config["crs"]["projected_crs"] に設定）へ変換し、前処理する。
+    cache を指定した場合は、入力データと input_crs から求めたキーで前処理結果をキャッシュする。
 
-    # --- 車両ネットワークの構築 ---
-    updated_veh_nodes, updated_veh_links = process_vehicle_network(veh_link, veh_node,config)
+    Returns:
+      link_df, node_df, processed_link, processed_node, key（cache が None の場合は None）
+    """
+    def preprocess():
+        projected_crs = get_utm_epsg(node_df['y_coord'].median(),node_df['x_coord'].median())
+        projected_node = gpd.GeoDataFrame(node_df, geometry=gpd.points_from_xy(node_df['x_coord'], node_df['y_coord']),crs=config["crs"]["input_crs"] ).to_crs(projected_crs)
+        processed_link = preprocess_original_links(link_df)
+        processed_node = preprocess_original_nodes(projected_node, processed_link)
+        return projected_crs, link_df, projected_node, processed_link, processed_node
 
-    # --- 統合と整理 ---
-    integrated_nodes, integrated_links = integrate_vehicle_and_pedestrian_networks(
-        final_ped_nodes, final_ped_links,
-        updated_veh_nodes, updated_veh_links
-    )
-    final_nodes, final_links = finalize_network(integrated_nodes, integrated_links, processed_link, processed_node)
-
-    # --- リンク分割と歩行者リンク双方向化 ---
-    if config["method"]["split"]:
-        final_nodes, final_links = split_links(final_nodes, final_links)
-    else:
-        final_nodes["split"] = np.nan
-        final_links["split"] = np.nan
-    final_nodes, final_links = birdirectionzie_ped_links(final_nodes, final_links)
+    (config["crs"]["projected_crs"], link_df, node_df, processed_link, processed_node), key = cached_stage(
+        cache, "preprocess", [link_df, node_df, config["crs"]["input_crs"]], preprocess)
+    return link_df, node_df, processed_link, processed_node, key
 
+def export_network(final_nodes, final_links, node_df, link_df, processed_node, config):
+    """
+    最終ネットワークを出力する（config["output"]["display"] が True の場合は表示用データも出力する）。
+    """
     # --- エクスポート（raw） ---
     config["output"]["suffix"] = ""
     export_final_network(final_nodes, final_links, node_df, link_df, config)
@@ -127,8 +259,216 @@ def develop_hosha_network(link_df, node_df, output_dir="./output", **kwargs):
         display_nodes = adjust_display_coordinates(final_nodes, processed_node, scale_factor=10)
         export_final_network(display_nodes, final_links, node_df, link_df, config)
 
+def develop_hosha_network(link_df, node_df, output_dir="./output", **kwargs):
+    """
+    A user-facing function to construct a pedestrian-vehicle integrated network.
+
+    Parameters:
+    - link_df (DataFrame): Link data in GMNS format.
+    - node_df (DataFrame): Node data in GMNS format.
+    - output_dir (str): Directory where the output files will be saved; None builds the network in memory only (default: "./output").
+    - **kwargs: Optional keyword arguments for fine-tuning the construction process.
+
+      Optional Keyword Arguments (kwargs):
+      - input_crs (str): Coordinate reference system (CRS) of input data (default: "EPSG:4326").
+      - output_crs (str): CRS to use for exported output data (default: "EPSG:4326").
+      - output_display (bool): Whether to export display-friendly files for visualization (default: False).
+      - output_name (str): Prefix for the names of output files (default: "hosha_").
+      - output_format (str): Output file format, "geojson" (node CSV and link GeoJSON), "parquet" (GeoParquet), "feather", "csv" or "flatgeobuf" (default: "geojson").
+      - output_partition (bool): Whether to partition GeoParquet/Feather outputs by layer_id (default: False).
+      - output_chunk_size (int): If set, write nodes and links in chunks of this many rows; links are written as GeoJSONSeq for "geojson" (default: None).
+      - output_precision (int): Number of decimal places for exported coordinates (default: None, no rounding).
+      - cache_dir (str): Directory of the on-disk stage cache; reruns only recompute the stages whose inputs or options changed (default: None, no cache).
+      - cache_max_bytes (int): Size limit of the stage cache; least recently used entries are evicted (default: 2 GiB).
+      - profile (bool): Record wall time, CPU time, peak RSS and row counts of each stage; the report is returned as
+        the profile attribute of the result and written to "<output_name>profile.json" in output_dir (default: False).
+      - profile_memory (bool): Also trace the peak Python memory of each stage with tracemalloc, which slows the build (default: False).
+
+      - contract (bool): Whether to contract the pedestrian network (default: False).
+      - contract_method (str): Contraction engine, "networkx" (reference) or "unionfind" (default: "networkx").
+        "unionfind" is much faster but not interchangeable: link order and IDs differ, and intersections whose
+        cross links chain over 3+ nodes are merged into a single node.
+      - left_driving (bool): Whether the network assumes left-hand traffic (default: True).
+      - make_uturn (bool): Whether to allow U-turns in vehicle network construction (default: True).
+      - split (bool): Whether to split links at their midpoints (default: True).
+      - tile_size (float): If set, build the networks in spatial tiles of this size (in meters) processed in parallel (default: None).
+      - tile_workers (int): Number of worker processes for tiled construction (default: None, the number of CPUs).
+      - parallel_layers (bool or str): Build the pedestrian and vehicle layers concurrently, True/"thread" (threads sharing the inputs) or "process" (default: False).
+      
+      - veh_offset_angle (float): Angular offset (in degrees) when generating vehicle turning links (default: 10).
+      - veh_scale (float): Link length scaling factor for vehicle links (default: 0.5).
+      - veh_threshold_deg (float): Angular threshold (in degrees) to determine turn connections (default: 45).
+
+      - ped_offset_angle (float): Angular offset (in degrees) when generating pedestrian turning links (default: 10).
+      - ped_scale (float): Link length scaling factor for pedestrian links (default: 1.0).
+      - ped_threshold_deg (float): Angular threshold (in degrees) to determine pedestrian turn connections (default: 45).
+
+    Returns:
+    - NetworkResult: The constructed network. Its nodes and links attributes are GeoDataFrames in the exported GMNS schema
+      (nodes, links = develop_hosha_network(...) also works).
+    """   
+    
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    config = make_config(output_dir, **kwargs)
+    cache = StageCache(config["cache"]["dir"], config["cache"]["max_bytes"]) if config["cache"]["dir"] else None
+    profiler = StageProfiler(config["profile"]["trace_memory"]) if config["profile"]["enabled"] else None
+
+    # --- 前処理 ---
+    with profile_stage(profiler, "preprocess") as rows:
+        link_df, node_df, processed_link, processed_node, input_key = prepare_inputs(link_df, node_df, config, cache)
+        rows.update(nodes=len(processed_node), links=len(processed_link))
+
+    # --- ネットワーク種別の分岐・歩行者・車両ネットワークの構築・統合 ---
+    contract_option = "partial" if config["method"]["contract"] else "none"
+    def build_and_integrate():
+        with profile_stage(profiler, "branch") as rows:
+            walk_link, walk_node, veh_link, veh_node = branch_network_types(processed_link, processed_node)
+            rows.update(walk_nodes=len(walk_node), walk_links=len(walk_link), veh_nodes=len(veh_node), veh_links=len(veh_link))
+        (final_ped_nodes, final_ped_links), (updated_veh_nodes, updated_veh_links) = build_layer_networks(
+            walk_link, walk_node, veh_link, veh_node, contract_option, config, cache, input_key, profiler)
+        return profiled_call(profiler, "integrate", integrate_vehicle_and_pedestrian_networks,
+                             final_ped_nodes, final_ped_links, updated_veh_nodes, updated_veh_links)
+    (integrated_nodes, integrated_links), integrate_key = cached_stage(
+        cache, "integrate", [input_key, config["ped"], config["veh"], contract_option, config["method"]["contract_method"]],
+        build_and_integrate)
+
+    # --- 整理・リンク分割と歩行者リンク双方向化 ---
+    final_nodes, final_links = _postprocess_stages(integrated_nodes, integrated_links, processed_link, processed_node, config,
+                                                   cache, integrate_key, profiler)
+
+    # --- エクスポート ---
+    if output_dir is not None:
+        with profile_stage(profiler, "export") as rows:
+            export_network(final_nodes, final_links, node_df, link_df, processed_node, config)
+            rows.update(nodes=len(final_nodes), links=len(final_links))
+
     # --- 統計出力 ---
     #print("【歩行者ネットワーク】ノード:", final_ped_nodes.shape[0], "リンク:", final_ped_links.shape[0])
     #print("【車両ネットワーク】ノード:", updated_veh_nodes.shape[0], "リンク:", updated_veh_links.shape[0])
     print("【構築ネットワーク】ノード:", final_nodes.shape[0], "リンク:", final_links.shape[0])
+    profile = None
+    if profiler is not None:
+        profile = profiler.report()
+        if output_dir is not None:
+            write_report(profile, os.path.join(output_dir, f"{config['output']['name']}profile.json"))
+    return NetworkResult(final_nodes, final_links, node_df, link_df, config, profile)
+
+def update_hosha_network(previous, link_df, node_df, changed_link_ids=(), changed_node_ids=(), output_dir="./output", **kwargs):
+    """
+    A user-facing function to update a previously constructed network after editing some macro links/nodes.
+    Only the in/out nodes, normal links and turn links of the affected intersections are regenerated;
+    untouched nodes and links keep their IDs.
+
+    Parameters:
+    - previous (NetworkResult): The network returned by develop_hosha_network or by a previous call of this function.
+    - link_df (DataFrame): Edited link data in GMNS format.
+    - node_df (DataFrame): Edited node data in GMNS format.
+    - changed_link_ids (iterable): IDs of changed, added or removed macro links.
+    - changed_node_ids (iterable): IDs of moved, added or removed macro nodes.
+    - output_dir (str): Directory where the output files will be saved; None skips writing (default: "./output").
+    - **kwargs: The same keyword arguments as develop_hosha_network (use the same construction options as the previous build).
+      Contracted networks (contract=True) are not supported.
+
+    Returns:
+    - NetworkResult: The updated network.
+    """
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    config = make_config(output_dir, **kwargs)
+    link_df, node_df, processed_link, processed_node, _ = prepare_inputs(link_df, node_df, config)
+
+    final_nodes, final_links = update_network(previous.final_nodes, previous.final_links, processed_link, processed_node,
+                                              changed_link_ids, changed_node_ids, config)
+
+    if output_dir is not None:
+        export_network(final_nodes, final_links, node_df, link_df, processed_node, config)
+    print("【構築ネットワーク】ノード:", final_nodes.shape[0], "リンク:", final_links.shape[0])
+    return NetworkResult(final_nodes, final_links, node_df, link_df, config)
+
+# パラメータスイープで構成ごとに変更できるオプション（前処理に影響しないもの）
+SWEEP_OPTIONS = {
+    "veh_offset_angle", "veh_scale", "veh_threshold_deg", "make_uturn", "left_driving",
+    "ped_offset_angle", "ped_scale", "ped_threshold_deg", "contract", "contract_method", "split",
+    "output_name", "output_crs", "output_display", "output_format", "output_partition", "output_chunk_size", "output_precision",
+}
+
+_sweep_inputs = {}
+
+def _init_sweep_worker(inputs):
+    """スイープのワーカープロセスごとに一度だけ、共通の前処理結果を受け取る。"""
+    _sweep_inputs.update(inputs)
+
+def _run_sweep_config(output_dir, options):
+    """
+    前処理済みの共通データ（_sweep_inputs）から、1つの構成のネットワークを構築する。
+    output_dir が指定されていれば出力してそのディレクトリを、なければ (final_nodes, final_links, config) を返す。
+    """
+    inputs = _sweep_inputs
+    config = make_config(output_dir, **options)
+    config["crs"]["projected_crs"] = inputs["projected_crs"]
+    contract_option = "partial" if config["method"]["contract"] else "none"
+    (final_ped_nodes, final_ped_links), (updated_veh_nodes, updated_veh_links) = build_layer_networks(
+        inputs["walk_link"], inputs["walk_node"], inputs["veh_link"], inputs["veh_node"], contract_option, config)
+    integrated_nodes, integrated_links = integrate_vehicle_and_pedestrian_networks(
+        final_ped_nodes, final_ped_links, updated_veh_nodes, updated_veh_links)
+    final_nodes, final_links = postprocess_network(integrated_nodes, integrated_links,
+                                                   inputs["processed_link"], inputs["processed_node"], config)
+    if output_dir is None:
+        return final_nodes, final_links, config
+    os.makedirs(output_dir, exist_ok=True)
+    export_network(final_nodes, final_links, inputs["node_df"], inputs["link_df"], inputs["processed_node"], config)
+    return output_dir
 
+def sweep_hosha_network(link_df, node_df, configs, output_dir=None, workers=None, **kwargs):
+    """
+    A user-facing function to construct the network for many parameter combinations.
+    Preprocessing, projection, branching and link-center computation run once; the per-configuration
+    stages run in a process pool.
+
+    Parameters:
+    - link_df (DataFrame): Link data in GMNS format.
+    - node_df (DataFrame): Node data in GMNS format.
+    - configs (list of dict): Keyword arguments of develop_hosha_network for each configuration
+      (only the options in SWEEP_OPTIONS, e.g. veh_offset_angle, ped_threshold_deg, make_uturn).
+    - output_dir (str): If set, each network is exported to output_dir/sweep_000, sweep_001, ... (default: None, no output files).
+    - workers (int): Number of worker processes (default: None, the number of CPUs; 1 runs in the current process).
+    - **kwargs: Keyword arguments of develop_hosha_network shared by all configurations.
+
+    Returns:
+    - list: For each configuration, the network (NetworkResult), or its output directory if output_dir is set.
+    """
+    for options in configs:
+        unknown = set(options) - SWEEP_OPTIONS
+        if unknown:
+            raise ValueError(f"スイープで変更できないオプションです: {sorted(unknown)}")
+
+    # --- 構成に依存しない処理（前処理・分岐・リンク中心座標） ---
+    config = make_config(output_dir, **kwargs)
+    link_df, node_df, processed_link, processed_node, _ = prepare_inputs(link_df, node_df, config)
+    walk_link, walk_node, veh_link, veh_node = branch_network_types(processed_link, processed_node)
+    inputs = {
+        "projected_crs": config["crs"]["projected_crs"],
+        "link_df": link_df, "node_df": node_df,
+        "processed_link": processed_link, "processed_node": processed_node,
+        "walk_link": ensure_link_centers(walk_link, walk_node), "walk_node": walk_node,
+        "veh_link": ensure_link_centers(veh_link, veh_node), "veh_node": veh_node,
+    }
+
+    # --- 構成ごとの処理 ---
+    tasks = [(None if output_dir is None else os.path.join(output_dir, f"sweep_{i:03d}"), {**kwargs, **options})
+             for i, options in enumerate(configs)]
+    workers = workers or os.cpu_count()
+    if workers == 1 or len(tasks) <= 1:
+        _init_sweep_worker(inputs)
+        try:
+            results = [_run_sweep_config(*task) for task in tasks]
+        finally:
+            _sweep_inputs.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_sweep_worker, initargs=(inputs,)) as pool:
+            results = list(pool.map(_run_sweep_config, *zip(*tasks)))
+    if output_dir is not None:
+        return results
+    # 元データはワーカーから受け取らず、共通のものを参照する
+    return [NetworkResult(final_nodes, final_links, node_df, link_df, config) for final_nodes, final_links, config in results]
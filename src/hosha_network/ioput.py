@@ -1,5 +1,6 @@
 # my_io.py
 import configparser
+import json
 import os
 import geopandas as gpd
 import pandas as pd
@@ -20,24 +21,110 @@ def load_config(config_path="config.ini"):
     }
     return conf
 
-def load_geojson(filepath, crs=None):
+# develop_hosha_network が用いる GMNS の列（access は元データにある場合のみ用いる）
+GMNS_LINK_COLUMNS = ["link_id", "from_node_id", "to_node_id", "directed", "dir_flag", "length",
+                     "facility_type", "ped_facility", "access"]
+GMNS_NODE_COLUMNS = ["node_id", "x_coord", "y_coord"]
+
+# Arrow 形式で読み込む拡張子（それ以外は GDAL ドライバで読み込む。.geojson / .fgb / .gpkg など）
+PARQUET_EXTS = (".parquet", ".geoparquet")
+FEATHER_EXTS = (".feather", ".arrow")
+
+def _has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def _filter_geometry(bbox, mask, crs):
+    """bbox / mask を crs の座標系の shapely ジオメトリ（両方指定時は共通部分）にする。"""
+    import shapely
+    geoms = []
+    if bbox is not None:
+        geoms.append(shapely.box(*bbox))
+    if mask is not None:
+        if isinstance(mask, (gpd.GeoSeries, gpd.GeoDataFrame)):
+            if mask.crs is not None and crs is not None:
+                mask = mask.to_crs(crs)
+            mask = mask.union_all()
+        geoms.append(mask)
+    return shapely.intersection_all(geoms) if len(geoms) > 1 else geoms[0]
+
+def _read_arrow_file(filepath, ext, columns, bbox, mask):
     """
-    GeoJSONファイルを読み込み、必要に応じてCRS変換を行ったGeoDataFrameを返す。
+    GeoParquet / Feather を列を絞って読み込む。
+    GeoParquet に bbox 列（covering）がある場合は bbox で行グループを読み飛ばし、それ以外は読み込み後に絞り込む。
     """
-    gdf = gpd.read_file(filepath)#, driver="GeoJSON"
+    _require_pyarrow()
+    import pyarrow.dataset as ds
+    fmt = "parquet" if ext in PARQUET_EXTS else "feather"
+    if columns is not None:
+        # 存在しない列は指定できないため、ファイルの列と照合する（ジオメトリ列は常に読み込む）
+        schema = ds.dataset(filepath, format=fmt, partitioning="hive").schema
+        geometry_name = json.loads(schema.metadata[b"geo"])["primary_column"]
+        columns = [c for c in columns if c in schema.names and c != geometry_name] + [geometry_name]
+    if fmt == "feather":
+        gdf = gpd.read_feather(filepath, columns=columns)
+    else:
+        try:
+            gdf = gpd.read_parquet(filepath, columns=columns, bbox=bbox)
+            bbox = None
+        except (ValueError, TypeError):
+            # bbox 列のない GeoParquet は読み込み後に絞り込む
+            gdf = gpd.read_parquet(filepath, columns=columns)
+    if bbox is not None or mask is not None:
+        gdf = gdf[gdf.intersects(_filter_geometry(bbox, mask, gdf.crs))]
+    return gdf
+
+def load_vector(filepath, crs=None, columns=None, bbox=None, mask=None):
+    """
+    ベクタデータ（GeoJSON / FlatGeobuf / GeoPackage / GeoParquet / Feather）を読み込み、必要に応じてCRS変換を行ったGeoDataFrameを返す。
+    列の選択と範囲の絞り込みは読み込み時に行うため、不要な列・範囲外の地物は変換・保持しない。
+    GDAL ドライバで読む形式は pyarrow がある場合 Arrow 経由で読み込む。
+
+    Args:
+      columns : 読み込む属性列のリスト（None の場合はすべて）。ファイルにない列は無視する
+      bbox    : (minx, miny, maxx, maxy)。ファイルの座標系で指定し、これと交差する地物のみ読み込む
+      mask    : shapely のジオメトリ（ファイルの座標系）または CRS 付きの GeoSeries / GeoDataFrame。
+                これと交差する地物のみ読み込む
+    """
+    ext = os.path.splitext(os.fspath(filepath).rstrip("/\\"))[1].lower()
+    if ext in PARQUET_EXTS + FEATHER_EXTS:
+        gdf = _read_arrow_file(filepath, ext, columns, bbox, mask)
+    else:
+        if bbox is not None and mask is not None:
+            # GDAL ドライバでは bbox と mask を同時に指定できないため、共通部分を mask とする
+            import pyogrio
+            mask, bbox = _filter_geometry(bbox, mask, pyogrio.read_info(filepath)["crs"]), None
+        gdf = gpd.read_file(filepath, columns=columns, bbox=bbox, mask=mask,
+                            engine="pyogrio", use_arrow=_has_pyarrow())
     if crs is not None:
         gdf = gdf.to_crs(crs)
     return gdf
 
-def load_input_data(config):
+def load_geojson(filepath, crs=None, columns=None, bbox=None, mask=None):
+    """
+    GeoJSONファイルを読み込み、必要に応じてCRS変換を行ったGeoDataFrameを返す（load_vector を参照）。
+    """
+    return load_vector(filepath, crs=crs, columns=columns, bbox=bbox, mask=mask)
+
+def load_input_data(config, gmns_only=False, bbox=None, mask=None):
     """
-    コンフィグに基づいて、リンクとノードのGeoJSONデータを読み込む。
+    コンフィグに基づいて、リンクとノードのデータを読み込む（形式は拡張子で判定する）。
+    gmns_only=True の場合は develop_hosha_network が用いる GMNS の列（GMNS_LINK_COLUMNS, GMNS_NODE_COLUMNS）のみ読み込む
+    （その他の元データの属性は出力に引き継がれなくなる）。
+    bbox / mask を指定した場合は範囲内のノードと、両端のノードが範囲内にあるリンクのみ返す。
     """
     link_path = config["input"]["link"]
     node_path = config["input"]["node"]
     target_crs = config["crs"]["input_crs"]
-    ori_link = load_geojson(link_path, crs=target_crs)
-    ori_node = load_geojson(node_path, crs=target_crs)
+    link_columns, node_columns = (GMNS_LINK_COLUMNS, GMNS_NODE_COLUMNS) if gmns_only else (None, None)
+    ori_link = load_vector(link_path, crs=target_crs, columns=link_columns, bbox=bbox, mask=mask)
+    ori_node = load_vector(node_path, crs=target_crs, columns=node_columns, bbox=bbox, mask=mask)
+    if bbox is not None or mask is not None:
+        inside = ori_link["from_node_id"].isin(ori_node["node_id"]) & ori_link["to_node_id"].isin(ori_node["node_id"])
+        ori_link = ori_link[inside]
     return ori_link, ori_node
 
 def export_geojson(gdf, output_path, crs="EPSG:4326"):
@@ -56,3 +143,116 @@ def export_csv(df, output_path):
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     df.to_csv(output_path, index=False)
     print(f"CSV exported to {output_path}")
+
+def _write_partitioned(gdf, output_path, partition_cols, write, ext):
+    """
+    partition_cols の値ごとに Hive 形式のディレクトリ（例: layer_id=0/part-0.parquet）へ分割して出力する。
+    分割に用いたカラムはディレクトリ名で表現されるため、各ファイルからは除外する。
+    """
+    os.makedirs(output_path, exist_ok=True)
+    for keys, part in gdf.groupby(partition_cols, sort=True):
+        keys = keys if isinstance(keys, tuple) else (keys,)
+        part_dir = os.path.join(output_path, *[f"{c}={k}" for c, k in zip(partition_cols, keys)])
+        os.makedirs(part_dir, exist_ok=True)
+        write(part.drop(columns=partition_cols), os.path.join(part_dir, f"part-0.{ext}"))
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("GeoParquet / Feather 形式の出力には pyarrow が必要です（pip install pyarrow）。") from e
+
+def export_parquet(gdf, output_path, partition_cols=None):
+    """
+    GeoDataFrameをGeoParquet形式で出力する。partition_cols を指定した場合は、その値ごとに分割して出力する。
+    """
+    _require_pyarrow()
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    write = lambda df, path: df.to_parquet(path, index=False)
+    if partition_cols:
+        _write_partitioned(gdf, output_path, partition_cols, write, "parquet")
+    else:
+        write(gdf, output_path)
+
+def export_feather(gdf, output_path, partition_cols=None):
+    """
+    GeoDataFrameをFeather（Arrow IPC）形式で出力する。partition_cols を指定した場合は、その値ごとに分割して出力する。
+    """
+    _require_pyarrow()
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    write = lambda df, path: df.to_feather(path, index=False)
+    if partition_cols:
+        _write_partitioned(gdf, output_path, partition_cols, write, "feather")
+    else:
+        write(gdf, output_path)
+
+# チャンク出力で用いる GDAL ドライバ
+CHUNK_DRIVERS = {"geojsonl": "GeoJSONSeq", "fgb": "FlatGeobuf"}
+
+def export_chunks(chunks, output_path):
+    """
+    GeoDataFrame のチャンク列を1つのファイルへ逐次出力する。拡張子（.csv / .geojsonl / .fgb）で形式を判定する。
+    CSV は追記モードで書き出す（ヘッダは最初のチャンクのみ）。
+    GDAL ドライバの追記はファイル全体の書き直しを伴うため、pyarrow がある場合は最初のチャンクのスキーマで
+    Arrow ストリームを構成し、データセットを開いたまま書き出す
+    （pyarrow がない場合や、pyogrio（>=0.8）・GDAL が Arrow の書き出しに対応していない場合は追記モード）。
+    """
+    ext = os.path.splitext(output_path)[1].lstrip(".")
+    if ext != "csv" and ext not in CHUNK_DRIVERS:
+        raise ValueError(f"チャンク出力に未対応の拡張子です: {output_path}")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    chunks = iter(chunks)
+    first = next(chunks)
+
+    if ext == "csv":
+        first.to_csv(output_path, index=False)
+        for chunk in chunks:
+            chunk.to_csv(output_path, index=False, mode="a", header=False)
+        return
+
+    driver = CHUNK_DRIVERS[ext]
+    try:
+        import pyarrow as pa
+        import pyogrio
+    except ImportError:
+        _append_chunks(first, chunks, output_path, driver)
+        return
+    write_arrow = getattr(pyogrio, "write_arrow", None)  # pyogrio>=0.8
+    if write_arrow is None:
+        _append_chunks(first, chunks, output_path, driver)
+        return
+
+    geometry_name = first.geometry.name
+    geometry_type = first.geom_type.dropna().iloc[0] if first.geom_type.notna().any() else "Unknown"
+    def to_table(chunk, schema=None):
+        df = pd.DataFrame(chunk.drop(columns=geometry_name))
+        df[geometry_name] = chunk.geometry.to_wkb()
+        return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    first_table = to_table(first)
+    schema = first_table.schema
+    streamed = False
+    def generate():
+        nonlocal streamed
+        streamed = True
+        yield from first_table.to_batches()
+        for chunk in chunks:
+            yield from to_table(chunk, schema).to_batches()
+    reader = pa.RecordBatchReader.from_batches(schema, generate())
+    try:
+        write_arrow(reader, output_path, driver=driver, geometry_name=geometry_name,
+                    geometry_type=geometry_type, crs=first.crs.to_wkt() if first.crs else None)
+    except (AttributeError, TypeError, RuntimeError):
+        # pyogrio / GDAL が Arrow 書き出しに対応していない場合（書き出し開始前に失敗した場合）は追記モードで出力する
+        if streamed:
+            raise
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        _append_chunks(first, chunks, output_path, driver)
+
+def _append_chunks(first, chunks, output_path, driver):
+    """チャンクを GDAL ドライバの追記モードで順に書き出す。"""
+    first.to_file(output_path, driver=driver)
+    for chunk in chunks:
+        chunk.to_file(output_path, driver=driver, mode="a")
@@ -0,0 +1,256 @@
+# network.py
+# -*- coding: utf-8 -*-
+"""
+network.py
+----------
+構築したネットワーク（ノード・リンク）を連続した NumPy 配列で保持するコンパクトな表現 HoshaNetwork を実装します。
+
+DataFrame のカラムは次のように変換して保持します（to_frames で元の DataFrame に戻せます）。
+  - 整数（ノード・リンクID など）：int32（範囲外の値を含む場合は int64 のまま）
+  - 実数（座標・重みなど）：float64
+  - turn, in_out：固定のラベル表に対する int8 のコード（欠損は -1、None は -2）
+  - layer_id, split：int8（split の欠損は -1）
+  - その他の文字列・混在カラム：int32 のコードとラベル配列（辞書符号化、欠損は turn と同様）
+リンクの始点・終点からは CSR 形式の隣接配列（ノードごとの流出・流入リンク）を作成します。
+
+HoshaNetwork は構築後のネットワークを参照するための読み取り専用の出力表現で、構築のパイプラインの内部表現ではありません
+（各ステージは DataFrame で処理する）。NetworkResult.network は final_nodes, final_links から作成するため、
+作成後は DataFrame と配列の両方を保持し、その分のメモリを追加で使用します。
+"""
+
+import numpy as np
+import pandas as pd
+
+# 固定のラベル表を持つカラム（コードはネットワーク間で共通）
+ENUM_LABELS = {
+    "turn": np.array(["left", "straight", "right", "u-turn", "cross", "notcross"], dtype=object),
+    "in_out": np.array(["in", "out"], dtype=object),
+}
+# 小さな整数値のみをとるカラム（欠損は -1）
+SMALL_INT_COLUMNS = ("layer_id", "split")
+
+_INT32 = np.iinfo(np.int32)
+
+
+def _encode_column(series):
+    """
+    1カラムを (kind, values, labels) に変換する。
+    """
+    name = series.name
+    dtype = series.dtype
+    if name in ENUM_LABELS:
+        labels = ENUM_LABELS[name]
+        values = series.to_numpy(dtype=object)
+        codes = pd.Index(labels).get_indexer(values)
+        unknown = (codes < 0) & ~pd.isna(values)
+        if unknown.any():
+            raise ValueError(f"{name} に未対応の値があります: {sorted(set(values[unknown]))}")
+        codes[np.equal(values, None)] = -2
+        return "enum", codes.astype(np.int8), labels
+    if name in SMALL_INT_COLUMNS and pd.api.types.is_numeric_dtype(dtype):
+        values = series.to_numpy(dtype=float)
+        return "small", np.where(np.isnan(values), -1, values).astype(np.int8), None
+    if pd.api.types.is_bool_dtype(dtype):
+        return "raw", series.to_numpy(dtype=bool), None
+    if pd.api.types.is_integer_dtype(dtype):
+        values = series.to_numpy()
+        if len(values) == 0 or (values.min() >= _INT32.min and values.max() <= _INT32.max):
+            values = values.astype(np.int32)
+        return "int", values, None
+    if pd.api.types.is_float_dtype(dtype):
+        return "raw", series.to_numpy(dtype=np.float64), None
+    if dtype == object or pd.api.types.is_string_dtype(dtype):
+        values = series.to_numpy(dtype=object)
+        codes, labels = pd.factorize(values, use_na_sentinel=True)
+        codes[np.equal(values, None)] = -2
+        return "dict", codes.astype(np.int32), np.asarray(labels, dtype=object)
+    return "raw", series.to_numpy(), None
+
+
+def _decode_column(kind, values, labels, dtype):
+    if kind in ("enum", "dict"):
+        decoded = np.full(len(values), np.nan, dtype=object)
+        decoded[values == -2] = None
+        valid = values >= 0
+        decoded[valid] = labels[values[valid]]
+        return pd.array(decoded, dtype=dtype)
+    if kind == "small":
+        if pd.api.types.is_float_dtype(dtype):
+            return np.where(values >= 0, values, np.nan).astype(dtype)
+        return values.astype(dtype)
+    return values.astype(dtype, copy=False)
+
+
+class _Table:
+    """
+    カラム名 → NumPy 配列の表。dtype と辞書符号化のラベルを保持し、DataFrame との相互変換を行う。
+    """
+    def __init__(self, columns, kinds, labels, dtypes, index):
+        self.columns = columns
+        self.kinds = kinds
+        self.labels = labels
+        self.dtypes = dtypes
+        self.index = index
+
+    @classmethod
+    def from_frame(cls, df):
+        columns, kinds, labels, dtypes = {}, {}, {}, {}
+        for name in df.columns:
+            kind, values, table = _encode_column(df[name])
+            columns[name], kinds[name], dtypes[name] = values, kind, df[name].dtype
+            if table is not None:
+                labels[name] = table
+        index = None if isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1 \
+            else df.index.to_numpy()
+        return cls(columns, kinds, labels, dtypes, index)
+
+    def to_frame(self):
+        # 文字列の推論で dtype が変わらないよう、カラムごとに元の dtype の Series として組み立てる
+        data = {name: pd.Series(_decode_column(self.kinds[name], values, self.labels.get(name), self.dtypes[name]),
+                                dtype=self.dtypes[name])
+                for name, values in self.columns.items()}
+        df = pd.DataFrame(data, index=pd.RangeIndex(len(self)))
+        if self.index is not None:
+            df.index = self.index
+        return df
+
+    def take(self, positions):
+        columns = {name: values[positions] for name, values in self.columns.items()}
+        index = None if self.index is None else self.index[positions]
+        return _Table(columns, self.kinds, self.labels, self.dtypes, index)
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def nbytes(self):
+        total = sum(values.nbytes for values in self.columns.values())
+        total += sum(len(labels) * 8 + sum(len(str(v)) for v in labels) for labels in self.labels.values())
+        return total + (0 if self.index is None else self.index.nbytes)
+
+
+def _csr(keys, size):
+    """
+    keys（0..size-1 の位置、-1 は除外）でグループ化した CSR 配列 (offsets, positions) を作成する。
+    """
+    valid = np.flatnonzero(keys >= 0)
+    positions = valid[np.argsort(keys[valid], kind="stable")].astype(np.int32)
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys[valid], minlength=size), out=offsets[1:])
+    return offsets, positions
+
+
+class HoshaNetwork:
+    """
+    HoshaNetwork は、ノード・リンクの各カラムを連続した NumPy 配列で保持するネットワークです。
+    nodes, links はカラム名 → 配列の辞書で、リンクの s, t はノードの id を参照します。
+
+    例:
+      net = HoshaNetwork.from_frames(final_nodes, final_links)
+      left = net.links["turn"] == net.code("turn", "left")
+      final_nodes, final_links = net.to_frames()
+    """
+    def __init__(self, node_table, link_table):
+        self._nodes = node_table
+        self._links = link_table
+        self._node_index = None
+        self._adjacency = {}
+
+    @classmethod
+    def from_frames(cls, final_nodes, final_links):
+        """
+        DataFrame（final_nodes, final_links）から作成する。
+        """
+        return cls(_Table.from_frame(final_nodes), _Table.from_frame(final_links))
+
+    def to_frames(self):
+        """
+        DataFrame（final_nodes, final_links）に戻す。
+
+        Returns:
+          final_nodes, final_links : DataFrame
+        """
+        return self._nodes.to_frame(), self._links.to_frame()
+
+    @property
+    def nodes(self):
+        return self._nodes.columns
+
+    @property
+    def links(self):
+        return self._links.columns
+
+    @property
+    def n_nodes(self):
+        return len(self._nodes)
+
+    @property
+    def n_links(self):
+        return len(self._links)
+
+    def labels(self, table, column):
+        """
+        符号化したカラムのラベル配列（コード i のラベルが labels[i]）を返す。
+        """
+        return (self._nodes if table == "nodes" else self._links).labels[column]
+
+    def code(self, column, label):
+        """
+        turn, in_out のラベルに対応するコードを返す。
+        """
+        codes = np.flatnonzero(ENUM_LABELS[column] == label)
+        if len(codes) == 0:
+            raise ValueError(f"{column} に未対応の値です: {label}")
+        return codes[0]
+
+    def node_positions(self, ids):
+        """
+        ノードIDの配列から nodes の行位置を返す（存在しないIDは -1）。
+        """
+        if self._node_index is None:
+            self._node_index = pd.Index(self._nodes.columns["id"])
+        return self._node_index.get_indexer(np.asarray(ids))
+
+    def adjacency(self, direction="out"):
+        """
+        ノードごとの流出（"out"：s がそのノード）または流入（"in"：t がそのノード）リンクの CSR 配列を返す。
+        ノード位置 i のリンクの行位置は positions[offsets[i]:offsets[i + 1]] となる。
+
+        Returns:
+          offsets : ndarray (n_nodes + 1,)
+          positions : ndarray
+        """
+        if direction not in ("out", "in"):
+            raise ValueError(f"未対応の方向です: {direction}")
+        if direction not in self._adjacency:
+            end = self._links.columns["s" if direction == "out" else "t"]
+            self._adjacency[direction] = _csr(self.node_positions(end), self.n_nodes)
+        return self._adjacency[direction]
+
+    def out_links(self, node_id):
+        """
+        ノード node_id から流出するリンクの行位置を返す。
+        """
+        offsets, positions = self.adjacency("out")
+        pos = self.node_positions([node_id])[0]
+        return positions[offsets[pos]:offsets[pos + 1]] if pos >= 0 else positions[:0]
+
+    def in_links(self, node_id):
+        """
+        ノード node_id に流入するリンクの行位置を返す。
+        """
+        offsets, positions = self.adjacency("in")
+        pos = self.node_positions([node_id])[0]
+        return positions[offsets[pos]:offsets[pos + 1]] if pos >= 0 else positions[:0]
+
+    def select_links(self, mask):
+        """
+        mask（真偽値配列または行位置）で選択したリンクのみを持つネットワークを返す（ノードは共有する）。
+        """
+        positions = np.flatnonzero(mask) if np.asarray(mask).dtype == bool else np.asarray(mask)
+        return HoshaNetwork(self._nodes, self._links.take(positions))
+
+    def memory_usage(self):
+        """
+        配列（および辞書符号化のラベル）が使用するおおよそのバイト数を返す。
+        """
+        return self._nodes.nbytes() + self._links.nbytes()
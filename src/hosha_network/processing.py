@@ -7,16 +7,18 @@ processing.py
 ターンリンク生成、リンク統合、networkx を用いたノード縮約および最終ネットワーク抽出、
 さらに「表示用ノードの座標補正」と「最終データのエクスポート」を実装します。
 
-※ RD クラスおよび average_angle 関数は utils.py に定義しています。
+※ 極座標・直交座標の変換（polar_angle, to_polar, from_polar）、角度差（ccw_angle_diff）および average_angle 関数は utils.py に定義しています。
 """
 
 import os
+import warnings
 import pandas as pd
 import geopandas as gpd
 import numpy as np
 import networkx as nx
-from shapely.geometry import LineString, Point
-from .utils import RD, average_angle
+import shapely
+from .ioput import export_parquet, export_feather, export_chunks
+from .utils import polar_angle, to_polar, from_polar, ccw_angle_diff, average_angle, disjoint_set_roots
 
 
 def get_utm_epsg(latitude: float, longitude: float) -> int:
@@ -48,8 +50,9 @@ def get_utm_epsg(latitude: float, longitude: float) -> int:
 def calc_macro_link(df, s_col="s", t_col="t"):
     """
     指定されたDataFrameに対して、2つのカラム（s_col, t_col）の値を用いてmacro_linkを生成する。
-    両者の値が同一の場合は "_" + 値、異なる場合は、小さい方と大きい方を "_" で連結した文字列を返す。
+    両者の値が同一の場合は "-1"、異なる場合は、小さい方と大きい方を "_" で連結した文字列を返す。
     NaN等がある場合は空文字列を返す。
+    整数の組（macro_link_pair）を列単位で求め、一意な組ごとに文字列へ変換する（render_macro_link）。
     
     Parameters:
       df : DataFrame
@@ -63,28 +66,87 @@ def calc_macro_link(df, s_col="s", t_col="t"):
       df : DataFrame
           macro_link カラムを追加したDataFrame
     """
-    def _calc(row):
-        try:
-            s_val = int(row[s_col])
-            t_val = int(row[t_col])
-        except Exception:
-            return ""
-        if s_val == t_val:
-            return "-1"
-        else:
-            return f"{min(s_val, t_val)}_{max(s_val, t_val)}"
-    df["macro_link"] = df.apply(lambda x:_calc(x), axis=1)
+    df["macro_link"] = render_macro_link(*macro_link_pair(df[s_col], df[t_col]))
     return df
 
+# macro_link の内部表現（マクロノードIDの組 macro_a < macro_b）における特別な値
+MACRO_SAME = -1     # 両端が同じマクロノード（交差点内のリンク。文字列表現は "-1"）
+MACRO_MISSING = -2  # 端点のマクロノードが不明（文字列表現は ""）
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except Exception:
+        return None
+
+def _as_int_ids(values):
+    """
+    ID の列を int64 の配列と、整数として解釈できたか（int() で変換できたか）のマスクに変換する。
+    文字列・混在カラムは一意な値ごとに int() を適用した対応表から求める。
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_integer_dtype(values.dtype) and not values.hasnans:
+        return values.to_numpy(dtype=np.int64), np.ones(len(values), dtype=bool)
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        numeric = values.to_numpy(dtype=float, na_value=np.nan)
+        valid = np.isfinite(numeric)
+        return np.where(valid, numeric, 0).astype(np.int64), valid
+    codes, uniques = pd.factorize(values)
+    table = [_int_or_none(u) for u in uniques]
+    valid_table = np.array([v is not None for v in table] + [False])
+    int_table = np.array([0 if v is None else v for v in table] + [0], dtype=np.int64)
+    return int_table[codes], valid_table[codes]
+
+def macro_link_pair(s, t):
+    """
+    両端のマクロノードID（s, t）から macro_link の内部表現（整数の組 macro_a, macro_b）を求める。
+    両端が異なる場合は (小さい方, 大きい方)、同じ場合は (MACRO_SAME, MACRO_SAME)、
+    欠損等で整数に変換できない場合は (MACRO_MISSING, MACRO_MISSING) とする。
+
+    Returns:
+      macro_a, macro_b : ndarray (int64)
+    """
+    s, s_valid = _as_int_ids(s)
+    t, t_valid = _as_int_ids(t)
+    valid = s_valid & t_valid
+    same = valid & (s == t)
+    macro_a = np.where(valid, np.minimum(s, t), MACRO_MISSING)
+    macro_b = np.where(valid, np.maximum(s, t), MACRO_MISSING)
+    macro_a[same] = MACRO_SAME
+    macro_b[same] = MACRO_SAME
+    return macro_a, macro_b
+
+def _render_unique(keys, render):
+    """keys（整数の2次元配列）の一意な行ごとに render を適用し、各行の値を object 配列で返す。"""
+    if len(keys) == 0:
+        return np.empty(0, dtype=object)
+    uniques, inverse = np.unique(keys, axis=0, return_inverse=True)
+    values = np.empty(len(uniques), dtype=object)
+    values[:] = [render(*row) for row in uniques.tolist()]
+    return values[inverse.reshape(-1)]
+
+def _macro_text(a, b):
+    if a != b:
+        return f"{a}_{b}"
+    return "-1" if a == MACRO_SAME else ""
+
+def render_macro_link(macro_a, macro_b):
+    """
+    macro_link の内部表現を文字列（例："12345_67890"、交差点内は "-1"、不明は ""）に変換する。
+    """
+    return _render_unique(np.column_stack([np.asarray(macro_a, dtype=np.int64), np.asarray(macro_b, dtype=np.int64)]), _macro_text)
+
 def reorder_macro(macro):
     """
-    macro_link の値（例："12345_67890"）を文字列に変換し、"_" で分割したうえで、
+    （非推奨）macro_link の値（例："12345_67890"）を文字列に変換し、"_" で分割したうえで、
     数値として比較して小さい順に並べ替えた文字列を返す。
     分割できない場合や数値変換に失敗した場合は、空文字列を返す。
+    内部の処理では macro_link_pair による整数の組を用いる（次のリリースで削除予定）。
     """
+    warnings.warn("reorder_macro は非推奨です。macro_link_pair / render_macro_link を用いてください。",
+                  DeprecationWarning, stacklevel=2)
     try:
-        macro_str = str(macro)  # まず文字列に変換する
-        parts = macro_str.split("_")
+        parts = str(macro).split("_")
         if len(parts) != 2:
             return ""
         a = int(parts[0])
@@ -92,7 +154,59 @@ def reorder_macro(macro):
         return f"{min(a, b)}_{max(a, b)}"
     except Exception:
         return ""
-    
+
+def _pair_text(a, b, is_ped, side, part, direction):
+    # finalize_network：歩行者は "A_B_side"（side 不明なら "A_B"）、それ以外は -1。
+    # 車両は "A_B"、交差点内は ""、不明は -1
+    if a != b:
+        value = f"{a}_{b}_{side}" if is_ped and side >= 0 else f"{a}_{b}"
+    elif is_ped or a == MACRO_MISSING:
+        value = -1
+    else:
+        value = ""
+    # split_links：".1" / ".2"（"" はそのまま）
+    if part > 0 and value != "":
+        value = f"{value}.{part}"
+    # birdirectionzie_ped_links：".1" / ".2"（-1 はそのまま）
+    if direction > 0 and value != -1:
+        value = f"{value}.{direction}"
+    return value
+
+def render_link_keys(final_links):
+    """
+    リンクデータの内部表現（macro_a, macro_b, pair_side, pair_split, pair_dir）を、
+    出力時の文字列表現（macro_link, bidirectionalpair_id。例："123_456_0.1.2"）に置き換えたDataFrameを返す。
+    """
+    if "macro_a" not in final_links.columns:
+        return final_links
+    macro_a = final_links["macro_a"].to_numpy(dtype=np.int64)
+    macro_b = final_links["macro_b"].to_numpy(dtype=np.int64)
+    keys = np.column_stack([
+        macro_a, macro_b, (final_links["layer_id"] == 1).to_numpy(),
+        final_links["pair_side"].to_numpy(dtype=np.int64),
+        final_links["pair_split"].to_numpy(dtype=np.int64),
+        final_links["pair_dir"].to_numpy(dtype=np.int64),
+    ])
+    links = final_links.drop(columns=["macro_a", "macro_b", "pair_side", "pair_split", "pair_dir"])
+    links["macro_link"] = render_macro_link(macro_a, macro_b)
+    links["bidirectionalpair_id"] = _render_unique(keys, _pair_text)
+    return links
+
+def render_node_keys(final_nodes):
+    """
+    ノードデータのうち分割で生じた中間ノードの macro_link_id を、内部表現（macro_a, macro_b）から文字列表現に置き換えたDataFrameを返す。
+    """
+    if "macro_a" not in final_nodes.columns:
+        return final_nodes
+    # 出入口ノードの macro_link_id（元リンクのID）と混在するため、チャンクごとの出力でも型がそろうよう常に object とする
+    nodes = final_nodes.drop(columns=["macro_a", "macro_b"])
+    is_split = (nodes["split"] == 1).to_numpy()
+    macro_link_id = nodes["macro_link_id"].to_numpy(dtype=object)
+    macro_link_id[is_split] = render_macro_link(final_nodes["macro_a"].to_numpy()[is_split],
+                                                final_nodes["macro_b"].to_numpy()[is_split])
+    nodes["macro_link_id"] = pd.Series(macro_link_id, index=nodes.index, dtype=object)
+    return nodes
+
 def access_from_undi_gmns(row):
     """
     GMNSフォーマットの行から access 列を作成。
@@ -102,6 +216,7 @@ def access_from_undi_gmns(row):
       その他 → 歩行者・車両共用
     - facility_type に "highway", "motorway" を含む → 車両専用
     - suffix は dir_flag によって決定。。
+    ※ 1行分の定義。preprocess_original_links では同じ結果を列単位で求める compute_access を用いる。
     """
 
     # 1) 無向でないなら何もしない
@@ -150,6 +265,60 @@ def access_from_undi_gmns(row):
 
     return f"{base}_{suffix0}_{suffix1}"
 
+# access の構成要素（base, suffix0, suffix1）とコードの対応
+ACCESS_BASES = ["vehicle", "pedestrian", "both"]
+ACCESS_SUFFIXES = ["B", "FT", "TF"]
+ACCESS_TABLE = np.array([f"{base}_{suffix0}_{suffix1}" for base in ACCESS_BASES
+                         for suffix0 in ACCESS_SUFFIXES for suffix1 in ACCESS_SUFFIXES], dtype=object)
+
+def _normalized_text(ori_link, col):
+    """
+    カラムの値を access_from_undi_gmns と同じく str(値).lower() に正規化した配列を返す（カラムがなければ ""）。
+    一意な値ごとに変換し、None は "none"、その他の欠損は "nan" とする。
+    """
+    if col not in ori_link.columns:
+        return np.full(len(ori_link), "", dtype=object)
+    values = ori_link[col].to_numpy(dtype=object)
+    codes, uniques = pd.factorize(values)
+    table = np.array([str(u).lower() for u in uniques] + ["nan"], dtype=object)
+    text = table[codes]
+    text[np.equal(values, None)] = "none"
+    return text
+
+def _dir_flag_values(ori_link):
+    """dir_flag を access_from_undi_gmns と同じく int() で変換した配列を返す（変換できない値・欠損は 0）。"""
+    if "dir_flag" not in ori_link.columns:
+        return np.zeros(len(ori_link), dtype=np.int64)
+    flag, valid = _as_int_ids(ori_link["dir_flag"])
+    return np.where(valid, flag, 0)
+
+def compute_access(ori_link):
+    """
+    GMNSフォーマットのリンクデータから access 列を列単位で作成する（access_from_undi_gmns を全行に適用した結果と同じ）。
+    ped_facility, facility_type, dir_flag から base, suffix0, suffix1 のコードをマスクで求め、
+    組み合わせの対応表（ACCESS_TABLE）から文字列を引く。
+
+    Returns:
+      access : Series（ori_link と同じインデックス）
+    """
+    ped = _normalized_text(ori_link, "ped_facility")
+    facility_type = _normalized_text(ori_link, "facility_type")
+    flag = _dir_flag_values(ori_link)
+
+    # base（0: vehicle, 1: pedestrian, 2: both）。facility_type による上書きを優先する
+    base = np.select([ped == "none", ped == "offstreet_path"], [0, 1], 2)
+    base[np.isin(facility_type, ["highway", "expressway", "motorway"])] = 0
+    base[facility_type == "footway"] = 1
+
+    # suffix（0: B, 1: FT, 2: TF）
+    arterial = np.isin(facility_type, ["motorway", "trunk", "primary", "secondary"])
+    suffix0 = np.select([flag == 1, flag == -1], [1, 2], 0)
+    suffix1 = np.select([(flag == 1) & arterial, (flag == -1) & arterial, np.isin(facility_type, ["footway", "gaishu"])],
+                        [1, 2, 2], 0)
+
+    codes = (base * len(ACCESS_SUFFIXES) + suffix0) * len(ACCESS_SUFFIXES) + suffix1
+    return pd.Series(ACCESS_TABLE[codes], index=ori_link.index)
+
 # === オリジナルデータ前処理 ===
 def preprocess_original_links(ori_link):
     ori_link["id"] = ori_link["link_id"].astype("int64")
@@ -163,8 +332,9 @@ def preprocess_original_links(ori_link):
     ori_link.index = ori_link["id"]
     
     if "access" not in ori_link.columns:
-        ori_link["access"] = ori_link.apply(lambda x:access_from_undi_gmns(x),axis=1)
-    ori_link = calc_macro_link(ori_link, s_col="s", t_col="t")
+        ori_link["access"] = compute_access(ori_link)
+    # macro_link（文字列表現）は互換のために残す（非推奨、次のリリースで削除予定）。内部の処理では macro_link_pair を用いる
+    ori_link["macro_link"] = render_macro_link(*macro_link_pair(ori_link["s"], ori_link["t"]))
     return ori_link
 
 def preprocess_original_nodes(ori_node, processed_link):
@@ -206,8 +376,9 @@ def branch_network_types(processed_link, processed_node):
     veh_link = processed_link[veh_mask].copy()
 
     # 現状、ノードはリンク分割後の参照に利用するので、共通の processed_node をそのまま用いる
-    walk_node = processed_node.copy()
-    veh_node  = processed_node.copy()
+    # （各パイプラインはノードデータを読み取り専用で扱うため、コピーせずに両ネットワークで共有する）
+    walk_node = processed_node
+    veh_node  = processed_node
 
     return walk_link, walk_node, veh_link, veh_node
 
@@ -215,124 +386,158 @@ def branch_network_types(processed_link, processed_node):
 def compute_link_centers(net_link, net_node):
     """
     各リンクについて、始点と終点の表示座標から中心座標 (center_x, center_y) を計算して返す。
+    s/t はノードインデックス上の位置へ一括で解決し、中心座標は配列演算でまとめて求める。
     """
     net_link = net_link.copy()
-    net_link["center_x"] = net_link.apply(
-        lambda row: (net_node.loc[row["s"], "x_display"] + net_node.loc[row["t"], "x_display"]) / 2,
-        axis=1
-    )
-    net_link["center_y"] = net_link.apply(
-        lambda row: (net_node.loc[row["s"], "y_display"] + net_node.loc[row["t"], "y_display"]) / 2,
-        axis=1
-    )
+    s_pos = net_node.index.get_indexer(net_link["s"])
+    t_pos = net_node.index.get_indexer(net_link["t"])
+    missing = (s_pos < 0) | (t_pos < 0)
+    if missing.any():
+        missing_ids = set(net_link["s"].values[s_pos < 0]) | set(net_link["t"].values[t_pos < 0])
+        raise KeyError(f"リンク端点がノードデータに存在しません: {sorted(missing_ids)[:10]}")
+    x = net_node["x_display"].to_numpy(dtype=float)
+    y = net_node["y_display"].to_numpy(dtype=float)
+    net_link["center_x"] = (x[s_pos] + x[t_pos]) / 2
+    net_link["center_y"] = (y[s_pos] + y[t_pos]) / 2
     return net_link
 
+def ensure_link_centers(net_link, net_node):
+    """
+    リンク中心座標（center_x, center_y）が未計算であれば compute_link_centers で計算して返す。
+    パラメータスイープなどで事前に計算済みの場合は、そのまま用いる。
+    """
+    if "center_x" in net_link.columns and "center_y" in net_link.columns:
+        return net_link
+    return compute_link_centers(net_link, net_node)
+
+# === 共通処理：ノード→リンク接続インデックス ===
+def build_incidence_index(link_df):
+    """
+    リンクデータからノード→リンクの接続インデックス（CSR 形式）を構築する。
+    各ノードに接続するリンクは link_df の行順に並び、自己ループは始点側（role=1）として一度だけ登録する。
+
+    Returns:
+      node_ids : ndarray
+          インデックス対象のノードID（昇順）
+      offsets : ndarray
+          node_ids[k] に接続するエントリが link_pos[offsets[k]:offsets[k+1]] に格納される
+      link_pos : ndarray
+          接続リンクの link_df 上の位置
+      role : ndarray
+          1: ノードがリンクの s 側、2: ノードがリンクの t 側
+    """
+    s = link_df["s"].to_numpy()
+    t = link_df["t"].to_numpy()
+    n_links = len(link_df)
+    pos = np.arange(n_links)
+    not_loop = s != t
+    ends = np.concatenate([s, t[not_loop]])
+    link_pos = np.concatenate([pos, pos[not_loop]])
+    role = np.concatenate([np.ones(n_links, dtype=np.int8), np.full(int(not_loop.sum()), 2, dtype=np.int8)])
+
+    node_ids, slot = np.unique(ends, return_inverse=True)
+    order = np.lexsort((link_pos, slot))
+    link_pos = link_pos[order]
+    role = role[order]
+    offsets = np.zeros(len(node_ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(slot, minlength=len(node_ids)), out=offsets[1:])
+    return node_ids, offsets, link_pos, role
+
+
 # === 共通処理：新規ノード生成 ===
 def generate_inout_nodes(attribute, nodes_df, link_df, offset_angle=10, scale=1, extra_filter_func=None, new_node_start=0,access_suffix=0,left_driving=True):
     """
     指定された属性（例："intersection"）に基づいて新規 in/out ノードを生成する関数。
     本改修では、各接続リンクの access 属性と、リンク端点（s/t）が base node と一致するかで、
     生成するノードタイプ（in, out）を条件分岐する。
-    
+
+    接続リンクの探索には build_incidence_index による接続インデックスを一度だけ構築して用い、
+    全ての（交差点, リンク）の組について角度・生成判定・座標を配列演算でまとめて計算する。
+    ノードIDは交差点の出現順 → 接続リンクの行順 → out, in の順に採番する。
+
     Returns:
-      (new_nodes, next_index)
+      (new_nodes, next_index) : (DataFrame, int)
     """
-    new_nodes = []
-    new_node_index = new_node_start
-    unique_vals = nodes_df[attribute].unique()
-    
-    left_driving=2*int(left_driving)-1
-    
-    for attr_val in unique_vals:
-        if attr_val == -1:
-            continue
-        base_nodes = nodes_df[nodes_df[attribute] == attr_val]
-        if base_nodes.empty:
-            continue
-        base_node = base_nodes.iloc[0]
-        base_id = base_node["id"]
-        origin_x, origin_y = base_node["x"], base_node["y"]
-        RD.set_origin(origin_x, origin_y)
-        # base_id に接続しているリンクを抽出
-        cond = (link_df["s"] == base_id) | (link_df["t"] == base_id)
-        connected_links = link_df[cond]
-        if extra_filter_func is not None:
-            connected_links = connected_links[extra_filter_func(connected_links)]
-        for _, link_row in connected_links.iterrows():
-            # そのリンクの access 属性を取得
-            access = link_row.get("access", "both_B_B").split("_")[access_suffix+1]
-            # 判定用: base node がリンクのどちら側か
-            role = None
-            if base_id == link_row["s"]:
-                role = 1  # base はリンクのノード1側
-            elif base_id == link_row["t"]:
-                role = 2    # base はリンクのノード2側
-            else:
-                continue  # どちらにも属さない場合はスキップ
-            
-            # RD を用いてリンク中心からの極座標 (r, degree) を取得
-            cx = link_row["center_x"]
-            cy = link_row["center_y"]
-            r, degree = RD.getRD(cx, cy)
-            
-            # 生成対象ノードの判断
-            # デフォルトは、何も条件に該当しなければ両方生成する（従来の挙動）
-            create_out = True
-            create_in = True
-            
-            if role == 1:
-                # ノード1側：リンクの流れが s -> t
-                # "both_FT"・"vehicle_FT"の場合、出る側のみ生成；"both_TF"・"vehicle_TF"の場合は生成しない
-                if access in {"FT"}:
-                    create_in = False
-                elif access in {"TF"}:
-                    create_out = False
-                # "both_B" や "pedestrian"の場合は、両方生成（従来通り）
-            elif role == 2:
-                # ノード2側：リンクの流れが s -> t なら、t は着く側
-                if access in {"FT"}:
-                    create_out = False
-                elif access in {"TF"}:
-                    create_in = False
-            
-            # ※ 万が一 access の値が未定義なら、両方生成
-            # 以下、各生成条件に応じてノードを生成
-            if create_out:
-                # out ノード: 角度 + offset_angle
-                out_x, out_y = RD.getXY(scale, degree + offset_angle*left_driving)
-                new_nodes.append({
-                    "id": new_node_index,
-                    "x": out_x,
-                    "y": out_y,
-                    "original_id": base_id,
-                    "_original_link_id": link_row["id"],
-                    "in_out": "out"
-                })
-                new_node_index += 1
-            if create_in:
-                # in ノード: 角度 - offset_angle
-                in_x, in_y = RD.getXY(scale, degree - offset_angle*left_driving)
-                new_nodes.append({
-                    "id": new_node_index,
-                    "x": in_x,
-                    "y": in_y,
-                    "original_id": base_id,
-                    "_original_link_id": link_row["id"],
-                    "in_out": "in"
-                })
-                new_node_index += 1
-    return new_nodes, new_node_index
+    columns = ["id", "x", "y", "original_id", "_original_link_id", "in_out"]
+    left_driving = 2*int(left_driving)-1
+
+    if extra_filter_func is not None:
+        link_df = link_df[extra_filter_func(link_df)]
+
+    # 各属性値の代表ノード（属性値ごとの先頭ノード）
+    attr_vals = nodes_df[attribute]
+    base_nodes = nodes_df[attr_vals.notna() & (attr_vals != -1)].drop_duplicates(subset=[attribute], keep="first")
+    if base_nodes.empty or link_df.empty:
+        return pd.DataFrame(columns=columns), new_node_start
+    base_ids = base_nodes["id"].to_numpy()
+
+    # 代表ノードごとに接続リンクを展開する（CSR のスライスを連結）
+    node_ids, offsets, inc_link_pos, inc_role = build_incidence_index(link_df)
+    slot = np.searchsorted(node_ids, base_ids)
+    slot = np.minimum(slot, len(node_ids) - 1)
+    found = node_ids[slot] == base_ids
+    starts = np.where(found, offsets[slot], 0)
+    counts = np.where(found, offsets[slot + 1] - offsets[slot], 0)
+    total = int(counts.sum())
+    if total == 0:
+        return pd.DataFrame(columns=columns), new_node_start
+    base_idx = np.repeat(np.arange(len(base_ids)), counts)
+    within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    entry = np.repeat(starts, counts) + within
+    pair_link = inc_link_pos[entry]
+    pair_role = inc_role[entry]
+
+    # リンクの access 属性（FT/TF/B）
+    if "access" in link_df.columns:
+        access = link_df["access"].astype(str).str.split("_").str[access_suffix+1].to_numpy()
+    else:
+        access = np.full(len(link_df), "both_B_B".split("_")[access_suffix+1], dtype=object)
+    pair_access = access[pair_link]
+
+    # 生成対象ノードの判断
+    # ノード1側（s）：FT なら out のみ、TF なら in のみ。ノード2側（t）はその逆。その他は両方生成
+    is_ft = pair_access == "FT"
+    is_tf = pair_access == "TF"
+    role1 = pair_role == 1
+    create_out = ~np.where(role1, is_tf, is_ft)
+    create_in = ~np.where(role1, is_ft, is_tf)
+
+    # 交差点中心からのリンク中心の角度（度）
+    origin_x = base_nodes["x"].to_numpy(dtype=float)[base_idx]
+    origin_y = base_nodes["y"].to_numpy(dtype=float)[base_idx]
+    cx = link_df["center_x"].to_numpy(dtype=float)[pair_link]
+    cy = link_df["center_y"].to_numpy(dtype=float)[pair_link]
+    degree = polar_angle(cx, cy, origin_x, origin_y, degrees=True)
+
+    # out ノード: 角度 + offset_angle、in ノード: 角度 - offset_angle
+    out_x, out_y = from_polar(scale, degree + offset_angle*left_driving, origin_x, origin_y, degrees=True)
+    in_x, in_y = from_polar(scale, degree - offset_angle*left_driving, origin_x, origin_y, degrees=True)
+    xs = np.column_stack([out_x, in_x]).ravel()
+    ys = np.column_stack([out_y, in_y]).ravel()
+    keep = np.column_stack([create_out, create_in]).ravel()
+    in_out = np.tile(np.array(["out", "in"], dtype=object), len(pair_link))
+
+    n_new = int(keep.sum())
+    new_nodes = pd.DataFrame({
+        "id": np.arange(new_node_start, new_node_start + n_new, dtype=np.int64),
+        "x": xs[keep],
+        "y": ys[keep],
+        "original_id": np.repeat(base_ids[base_idx], 2)[keep],
+        "_original_link_id": np.repeat(link_df["id"].to_numpy()[pair_link], 2)[keep],
+        "in_out": in_out[keep],
+    })
+    return new_nodes, new_node_start + n_new
 
 
 def generate_augmented_nodes(net_link, net_node, offset_angle, scale, access_suffix,left_driving):
     """
     新規ノード生成のみを行う関数。
-    "intersection" 属性を持つノードに対して、RD クラスと generate_inout_nodes を利用し、
+    "intersection" 属性を持つノードに対して、generate_inout_nodes を利用し、
     ±offset_angle のオフセットを適用した新規 in/out ノードを生成し、元のノードに連結する。
     """
     if "intersection" not in net_node.columns:
-        net_node["intersection"] = -1
-    new_nodes, _ = generate_inout_nodes(
+        net_node = net_node.assign(intersection=-1)
+    new_nodes_df, _ = generate_inout_nodes(
         attribute="intersection",
         nodes_df=net_node,
         link_df=net_link,
@@ -343,10 +548,6 @@ def generate_augmented_nodes(net_link, net_node, offset_angle, scale, access_suf
         access_suffix=access_suffix,
         left_driving=left_driving
     )
-    if new_nodes:
-        new_nodes_df = pd.DataFrame(new_nodes)
-    else:
-        new_nodes_df = pd.DataFrame(columns=["id", "x", "y", "original_id", "_original_link_id", "in_out"])
     updated_nodes = new_nodes_df
     return updated_nodes
 
@@ -355,132 +556,146 @@ def generate_normal_links(ori_link, augmented_nodes):
     元の道路リンク（マクロネットワーク）の情報をもとに、
     拡張後の出入口ノード（augmented_nodes）から、通常の有向リンクを生成する。
     出入口ノードは "out" と "in" のみを用いる。
-    
+
+    出入口ノードは (original_id, _original_link_id, in_out) をキーとする結合で一括して解決し、
+    各マクロリンクについて s→t 方向、t→s 方向の順にリンクを生成する。
+
     Returns:
         normal_links : DataFrame
     """
-    links = []
-    ii = 0
-    for link_id in ori_link["id"].unique():
-        original_s = ori_link.loc[ori_link["id"] == link_id, "s"].values[0]
-        original_t = ori_link.loc[ori_link["id"] == link_id, "t"].values[0]
-
-        # 出入口ノードの探索（始点："out" ノードのみ）
-        candidates_source = augmented_nodes[
-            (augmented_nodes["original_id"] == original_s) &
-            (augmented_nodes["_original_link_id"] == link_id) &
-            (augmented_nodes["in_out"] == "out")
-        ]
-
-        # 出入口ノードの探索（終点："in" ノードのみ）
-        candidates_target = augmented_nodes[
-            (augmented_nodes["original_id"] == original_t) &
-            (augmented_nodes["_original_link_id"] == link_id) &
-            (augmented_nodes["in_out"] == "in")
-        ]
-
-        if not (candidates_source.empty or candidates_target.empty):
-            s_node = candidates_source.iloc[0]["id"]
-            t_node = candidates_target.iloc[0]["id"]
-            
-            links.append({
-                "id": ii,
-                "s": s_node,
-                "t": t_node,
-                "original_id": link_id,
-                "_original_node_id": None,
-                "turn": None
-            })
-            ii += 1
-        
-        # 出入口ノードの探索（始点："out" ノードのみ）
-        candidates_source = augmented_nodes[
-            (augmented_nodes["original_id"] == original_t) &
-            (augmented_nodes["_original_link_id"] == link_id) &
-            (augmented_nodes["in_out"] == "out")
-        ]
-
-        # 出入口ノードの探索（終点："in" ノードのみ）
-        candidates_target = augmented_nodes[
-            (augmented_nodes["original_id"] == original_s) &
-            (augmented_nodes["_original_link_id"] == link_id) &
-            (augmented_nodes["in_out"] == "in")
-        ]
-
-        if not (candidates_source.empty or candidates_target.empty):
-            s_node = candidates_source.iloc[0]["id"]
-            t_node = candidates_target.iloc[0]["id"]
-            
-            links.append({
-                "id": ii,
-                "s": s_node,
-                "t": t_node,
-                "original_id": link_id,
-                "_original_node_id": None,
-                "turn": None
-            })
-            ii += 1
-    return pd.DataFrame(links)
+    columns = ["id", "s", "t", "original_id", "_original_node_id", "turn"]
+    macro = ori_link.drop_duplicates(subset=["id"], keep="first")
+    if macro.empty or augmented_nodes.empty:
+        return pd.DataFrame(columns=columns)
+    link_ids = macro["id"].to_numpy()
+    original_s = macro["s"].to_numpy()
+    original_t = macro["t"].to_numpy()
+
+    # キーごとに先頭の出入口ノードを採用する
+    keys = ["original_id", "_original_link_id", "in_out"]
+    first_nodes = augmented_nodes.drop_duplicates(subset=keys, keep="first")
+    key_index = pd.MultiIndex.from_frame(first_nodes[keys])
+    node_ids = first_nodes["id"].to_numpy()
+
+    def lookup(end_ids, in_out):
+        query = pd.MultiIndex.from_arrays([end_ids, link_ids, np.full(len(link_ids), in_out, dtype=object)])
+        return key_index.get_indexer(query)
+
+    # 列0: s→t 方向（s 側 out → t 側 in）、列1: t→s 方向（t 側 out → s 側 in）
+    source_pos = np.column_stack([lookup(original_s, "out"), lookup(original_t, "out")]).ravel()
+    target_pos = np.column_stack([lookup(original_t, "in"), lookup(original_s, "in")]).ravel()
+    valid = (source_pos >= 0) & (target_pos >= 0)
+
+    n_links = int(valid.sum())
+    return pd.DataFrame({
+        "id": np.arange(n_links, dtype=np.int64),
+        "s": node_ids[source_pos[valid]],
+        "t": node_ids[target_pos[valid]],
+        "original_id": np.repeat(link_ids, 2)[valid],
+        "_original_node_id": np.full(n_links, None, dtype=object),
+        "turn": np.full(n_links, None, dtype=object),
+    })
 
 # === ターンリンク生成 ===
+def _intersection_centers(group_keys, ori_nodes_df, fallback_x, fallback_y):
+    """
+    交差点（original_id）ごとの中心座標を元のノードデータから一括で取得する。
+    元データに存在しない交差点は fallback_x, fallback_y（グループ内先頭ノードの座標）を用いる。
+    """
+    centers = ori_nodes_df.drop_duplicates(subset=["id"], keep="first").set_index("id")
+    pos = centers.index.get_indexer(group_keys)
+    found = pos >= 0
+    center_x = np.where(found, centers["x"].to_numpy(dtype=float)[pos], fallback_x)
+    center_y = np.where(found, centers["y"].to_numpy(dtype=float)[pos], fallback_y)
+    return center_x, center_y
+
+
 def generate_turn_links(nodes_df, ori_nodes_df, threshold_deg=45):
     """
     歩行者ネットワーク用のターンリンク生成関数。
     各交差点（nodes_df の original_id ごと）に対して、各ノード i から
-    同じ交差点内で _original_link_id が異なる候補 o との角度差を計算し、
-    最小の角度差が閾値に関わらず、常にターンリンク（turn="cross"）を生成する。
-    
+    同じ交差点内で反時計回りの角度差が最小となるノード o へのターンリンクを生成する。
+    角度差が π - threshold 未満なら turn="cross"、それ以外は turn="notcross" とする。
+
     中心点は、変更前の元のノードデータ (ori_nodes_df) から取得する。
+    各交差点のノードを中心からの角度で一度だけ整列し、整列順の次のノードを最近傍とすることで、
+    ネットワーク全体を配列演算でまとめて処理する。
+    同一角度のノードが複数ある場合は、角度差 0 となるノードのうち元の並び順で先頭のものを選ぶ。
     """
-    link_list = []
-    link_index = 0 
-    threshold_rad = threshold_deg * np.pi / 180.0 
-    for orig_id, group in nodes_df.groupby("original_id"):
-        if group.shape[0] < 2:
-            continue
-        # ここで、元データから中心点を取得する
-        if orig_id in ori_nodes_df["id"].values:
-            center = (
-                ori_nodes_df.loc[ori_nodes_df["id"] == orig_id, "x"].iloc[0],
-                ori_nodes_df.loc[ori_nodes_df["id"] == orig_id, "y"].iloc[0]
-            )
-        else:
-            # 万が一、元データに存在しない場合は、グループ内の先頭の値を利用
-            center = (group.iloc[0]["x"], group.iloc[0]["y"])
-        for i in group.index:
-            node_i = group.loc[i]
-            angle_i = np.arctan2(node_i["y"] - center[1], node_i["x"] - center[0])
-            best_rad = None
-            best_o = None
-            for j in group.index:
-                if i != j:
-                    node_j = group.loc[j]
-                    angle_j = np.arctan2(node_j["y"] - center[1], node_j["x"] - center[0])
-                    diff = np.arctan2(np.sin(angle_j - angle_i), np.cos(angle_j - angle_i))
-                    if diff < 0:
-                        diff += 2 * np.pi
-                    if best_rad is None or diff < best_rad:
-                        best_rad = diff
-                        best_o = j
-            if best_rad is not None and (best_rad < np.pi-threshold_rad):
-                link_list.append({
-                    "id": link_index,
-                    "s": i,
-                    "t": best_o,
-                    "original_id": orig_id,
-                    "turn": "cross"
-                })
-                link_index += 1
-            elif best_rad is not None and (best_rad >= np.pi-threshold_rad):
-                link_list.append({
-                    "id": link_index,
-                    "s": i,
-                    "t": best_o,
-                    "original_id": orig_id,
-                    "turn": "notcross"
-                })
-                link_index += 1
-    return pd.DataFrame(link_list)
+    columns = ["id", "s", "t", "original_id", "turn"]
+    threshold_rad = threshold_deg * np.pi / 180.0
+    keys = nodes_df["original_id"]
+    codes, group_keys = pd.factorize(keys, sort=True)
+    counts = np.bincount(codes[codes >= 0], minlength=len(group_keys))
+    member = (codes >= 0) & (counts[np.maximum(codes, 0)] >= 2)
+    if not member.any():
+        return pd.DataFrame(columns=columns)
+
+    row_pos = np.flatnonzero(member)
+    codes = codes[member]
+    x = nodes_df["x"].to_numpy(dtype=float)[row_pos]
+    y = nodes_df["y"].to_numpy(dtype=float)[row_pos]
+
+    # 交差点中心（元データに存在しない場合はグループ内の先頭ノード）
+    first_in_group = np.full(len(group_keys), -1, dtype=np.int64)
+    first_in_group[codes[::-1]] = np.arange(len(codes))[::-1]
+    has_nodes = first_in_group >= 0
+    fallback_x = np.where(has_nodes, x[first_in_group], np.nan)
+    fallback_y = np.where(has_nodes, y[first_in_group], np.nan)
+    center_x, center_y = _intersection_centers(group_keys, ori_nodes_df, fallback_x, fallback_y)
+    angle = polar_angle(x, y, center_x[codes], center_y[codes])
+
+    # 交差点ごとに角度順（同角度は元の並び順）に整列する
+    order = np.lexsort((row_pos, angle, codes))
+    sorted_codes = codes[order]
+    sorted_angle = angle[order]
+    n = len(order)
+    q = np.arange(n)
+    group_start = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    group_len = np.diff(np.r_[group_start, n])
+    q_group_start = np.repeat(group_start, group_len)
+    q_group_end = q_group_start + np.repeat(group_len, group_len)
+
+    # 同一角度の連続区間（run）
+    run_start = np.flatnonzero(np.r_[True, (sorted_codes[1:] != sorted_codes[:-1]) | (sorted_angle[1:] != sorted_angle[:-1])])
+    run_len = np.diff(np.r_[run_start, n])
+    q_run_start = np.repeat(run_start, run_len)
+    q_run_len = np.repeat(run_len, run_len)
+
+    # 最近傍: 同角度のノードがあればその先頭（角度差 0）。なければ次の run の先頭（交差点内で循環）。
+    # ±π 付近など丸め誤差で角度差がほぼ等しくなる場合に備え、その次の run の先頭も候補として比較する
+    def next_run(q_from):
+        q_next = q_run_start[q_from] + q_run_len[q_from]
+        return np.where(q_next >= q_group_end[q_from], q_group_start[q_from], q_next)
+
+    def ccw_diff(q_from, q_to):
+        return ccw_angle_diff(sorted_angle[q_from], sorted_angle[q_to])
+
+    cand1 = next_run(q)
+    cand2 = next_run(cand1)
+    diff1 = ccw_diff(q, cand1)
+    diff2 = np.where(cand2 != q, ccw_diff(q, cand2), np.inf)
+    take2 = (diff2 < diff1) | ((diff2 == diff1) & (row_pos[order[cand2]] < row_pos[order[cand1]]))
+    same_angle = np.where(q_run_start != q, q_run_start, q_run_start + 1)
+    best_q = np.where(q_run_len >= 2, same_angle, np.where(take2, cand2, cand1))
+    diff = np.where(q_run_len >= 2, 0.0, np.where(take2, diff2, diff1))
+
+    src = order
+    dst = order[best_q]
+    turn = np.where(diff < np.pi - threshold_rad, "cross", "notcross").astype(object)
+
+    # 出力順は交差点順 → 元の並び順
+    out_order = np.lexsort((row_pos[src], codes[src]))
+    src = src[out_order]
+    dst = dst[out_order]
+    index_labels = nodes_df.index.to_numpy()
+    return pd.DataFrame({
+        "id": np.arange(n, dtype=np.int64),
+        "s": index_labels[row_pos[src]],
+        "t": index_labels[row_pos[dst]],
+        "original_id": np.asarray(group_keys)[codes[src]],
+        "turn": turn[out_order],
+    })
 
 
 def generate_turn_links_veh(nodes_df, ori_nodes_df, ori_links_df,make_uturn=False, threshold_deg=45):
@@ -488,64 +703,76 @@ def generate_turn_links_veh(nodes_df, ori_nodes_df, ori_links_df,make_uturn=Fals
     車両ネットワーク用のターンリンク生成関数。
     各交差点（nodes_df の original_id ごと）で、in ノードと out ノードの全組み合わせに対して、
     中心からの角度差に基づきターン分類する：
+    交差点ごとの in × out の組み合わせを一括で展開し、角度差とターン分類を配列演算で求める。
     Returns:
       DataFrame（columns: ["id", "s", "t", "original_id", "turn"]）
     """
-    link_centers = ori_links_df.set_index("id")[["center_x", "center_y"]].to_dict("index")
-    
-    link_list = []
-    link_index = 0
-    for orig_id, group in nodes_df.groupby("original_id"):
-        in_nodes = group[group["in_out"] == "in"]
-        out_nodes = group[group["in_out"] == "out"]
-        if in_nodes.empty or out_nodes.empty:
-            continue
-        if orig_id in ori_nodes_df["id"].values:
-            center = (
-                ori_nodes_df.loc[ori_nodes_df["id"] == orig_id, "x"].iloc[0],
-                ori_nodes_df.loc[ori_nodes_df["id"] == orig_id, "y"].iloc[0]
-            )
-        else:
-            center = (group.iloc[0]["x"], group.iloc[0]["y"])
-        for i, in_node in in_nodes.iterrows():
-            in_link_id = in_node["_original_link_id"]
-            if in_link_id not in link_centers:
-                continue
-            in_cx, in_cy = link_centers[in_link_id]["center_x"], link_centers[in_link_id]["center_y"]
-            angle_in = np.arctan2(in_cy - center[1], in_cx - center[0])
-            if make_uturn:
-                out_nodes_cand=out_nodes
-            else:
-                out_nodes_cand=out_nodes[out_nodes["_original_link_id"]!=in_link_id]
-            
-            for j, out_node in out_nodes_cand.iterrows():
-                out_link_id = out_node["_original_link_id"]
-                if out_link_id not in link_centers:
-                    continue
-                out_cx, out_cy = link_centers[out_link_id]["center_x"], link_centers[out_link_id]["center_y"]
-                angle_out = np.arctan2(out_cy - center[1], out_cx - center[0])
-                diff = np.arctan2(np.sin(angle_out - angle_in), np.cos(angle_out - angle_in))
-                if diff < 0:
-                    diff += 2 * np.pi
-                if diff < np.pi/180:
-                    turn = "u-turn"    
-                elif diff < np.pi-threshold_deg*np.pi/180:
-                    turn = "right"
-                elif diff < np.pi+threshold_deg*np.pi/180:
-                    turn = "straight"
-                elif diff < 2*np.pi-np.pi/180:
-                    turn = "left"
-                else:
-                    turn = "u-turn" 
-                link_list.append({
-                    "id": link_index,
-                    "s": i,
-                    "t": j,
-                    "original_id": orig_id,
-                    "turn": turn
-                })
-                link_index += 1
-    return pd.DataFrame(link_list)
+    columns = ["id", "s", "t", "original_id", "turn"]
+    codes, group_keys = pd.factorize(nodes_df["original_id"], sort=True)
+    row_pos = np.arange(len(nodes_df))
+    x = nodes_df["x"].to_numpy(dtype=float)
+    y = nodes_df["y"].to_numpy(dtype=float)
+    in_out = nodes_df["in_out"].to_numpy()
+    link_ids = nodes_df["_original_link_id"].to_numpy()
+
+    # 交差点中心（元データに存在しない場合はグループ内の先頭ノード）
+    valid = codes >= 0
+    first_in_group = np.full(len(group_keys), -1, dtype=np.int64)
+    first_in_group[codes[valid][::-1]] = row_pos[valid][::-1]
+    fallback_x = np.where(first_in_group >= 0, x[first_in_group], np.nan)
+    fallback_y = np.where(first_in_group >= 0, y[first_in_group], np.nan)
+    center_x, center_y = _intersection_centers(group_keys, ori_nodes_df, fallback_x, fallback_y)
+
+    # 各ノードが属するリンクの中心の、交差点中心からの角度（中心座標を持たないリンクは対象外）
+    centers = ori_links_df[["id", "center_x", "center_y"]].drop_duplicates(subset=["id"], keep="last").set_index("id")
+    link_pos = centers.index.get_indexer(link_ids)
+    has_center = link_pos >= 0
+    cx = np.where(has_center, centers["center_x"].to_numpy(dtype=float)[link_pos], np.nan)
+    cy = np.where(has_center, centers["center_y"].to_numpy(dtype=float)[link_pos], np.nan)
+    angle = polar_angle(cx, cy, center_x[np.maximum(codes, 0)], center_y[np.maximum(codes, 0)])
+
+    is_in = valid & (in_out == "in")
+    is_out = valid & (in_out == "out")
+    # in/out ノードの両方を持つ交差点のみを対象とする
+    n_groups = len(group_keys)
+    has_both = (np.bincount(codes[is_in], minlength=n_groups) > 0) & (np.bincount(codes[is_out], minlength=n_groups) > 0)
+    in_idx = row_pos[is_in & has_center & has_both[np.maximum(codes, 0)]]
+    out_idx = row_pos[is_out & has_center]
+    in_idx = in_idx[np.lexsort((in_idx, codes[in_idx]))]
+    out_idx = out_idx[np.lexsort((out_idx, codes[out_idx]))]
+
+    # 交差点ごとの in × out の組み合わせ
+    out_count = np.bincount(codes[out_idx], minlength=n_groups)
+    out_start = np.cumsum(out_count) - out_count
+    n_pairs = out_count[codes[in_idx]]
+    total = int(n_pairs.sum())
+    if total == 0:
+        return pd.DataFrame(columns=columns)
+    src = np.repeat(in_idx, n_pairs)
+    within = np.arange(total) - np.repeat(np.cumsum(n_pairs) - n_pairs, n_pairs)
+    dst = out_idx[np.repeat(out_start[codes[in_idx]], n_pairs) + within]
+    if not make_uturn:
+        keep = link_ids[src] != link_ids[dst]
+        src, dst = src[keep], dst[keep]
+
+    diff = ccw_angle_diff(angle[src], angle[dst])
+    turn = np.select(
+        [diff < np.pi/180,
+         diff < np.pi-threshold_deg*np.pi/180,
+         diff < np.pi+threshold_deg*np.pi/180,
+         diff < 2*np.pi-np.pi/180],
+        ["u-turn", "right", "straight", "left"],
+        default="u-turn",
+    ).astype(object)
+
+    index_labels = nodes_df.index.to_numpy()
+    return pd.DataFrame({
+        "id": np.arange(len(src), dtype=np.int64),
+        "s": index_labels[src],
+        "t": index_labels[dst],
+        "original_id": np.asarray(group_keys)[codes[src]],
+        "turn": turn,
+    })
 
 def integrate_turn_links(existing_links, turn_links):
     """
@@ -578,14 +805,11 @@ def contract_network_nodes(G, pos, nodes_df, ori_nodes_df):
             center = pos[list(pos.keys())[u]]
         xs, ys = pos[list(pos.keys())[u]]
         xt, yt = pos[list(pos.keys())[v]]
-        angle_u = np.arctan2(ys - center[1], xs - center[0])
-        angle_v = np.arctan2(yt - center[1], xt - center[0])
+        r_u, angle_u = to_polar(xs, ys, center[0], center[1])
+        r_v, angle_v = to_polar(xt, yt, center[0], center[1])
         bisector = average_angle(angle_u, angle_v)
-        r_u = np.hypot(xs - center[0], ys - center[1])
-        r_v = np.hypot(xt - center[0], yt - center[1])
         R = (r_u + r_v) / 2.0
-        new_x = center[0] + R * np.cos(bisector)
-        new_y = center[1] + R * np.sin(bisector)
+        new_x, new_y = from_polar(R, bisector, center[0], center[1])
         new_coord = (new_x, new_y)
         #print(u,v)
         #print(u in list(G.nodes))
@@ -643,6 +867,96 @@ def contract_network_and_extract(updated_nodes, merged_links, ori_node):
     final_links=final_links.merge(merged_links[["id","original_id","_original_node_id"]],on="id",how="left")
     return final_nodes, final_links
 
+def contract_network_unionfind(updated_nodes, merged_links, ori_node):
+    """
+    素集合（Union-Find）を用いたノード縮約および最終ネットワーク抽出。
+    contract_network_and_extract（networkx による参照実装）と同じ縮約条件
+    （turn="cross" かつ両端ノードの _original_link_id と in_out が異なるリンク）で対象ペアを一括して併合し、
+    縮約後の座標を一括計算したうえで、リンク端点を一度の置換で付け替える。
+
+    縮約後のノードは、各連結成分で最初に現れる縮約リンクの始点ノードのIDを引き継ぐ。
+    座標は交差点中心を基準に、2ノードの場合は average_angle による二等分角上、
+    3ノード以上の場合は角度の円周平均上に、各ノードの中心からの距離の平均を半径とした点とする。
+    縮約により自己ループとなるリンクは除去し、同一端点の重複リンクは先頭のみを残す。
+
+    contract_network_and_extract の出力とは一致しない（置き換えではなく別の縮約モード）。
+      - リンクの行順が異なる（入力の行順を保つ）。
+      - cross リンクが3ノード以上に連鎖する交差点では、networkx はリンク順に2ノードずつ縮約するため
+        縮約済みのノードが再生成されて複数のノードと cross リンクが残るが、本関数は成分全体を1ノードに併合し、
+        座標も二等分角ではなく角度の円周平均を用いる。そのため、これらの交差点ではノード・リンクの構成と ID が異なる。
+
+    Returns:
+      final_nodes, final_links : DataFrame（contract_network_and_extract と同じカラム構成）
+    """
+    node_ids = updated_nodes["id"].to_numpy()
+    node_index = pd.Index(node_ids)
+    x = updated_nodes["x"].to_numpy(dtype=float).copy()
+    y = updated_nodes["y"].to_numpy(dtype=float).copy()
+    link_ids = updated_nodes["_original_link_id"].to_numpy()
+    in_out = updated_nodes["in_out"].to_numpy()
+    s_pos = node_index.get_indexer(merged_links["s"])
+    t_pos = node_index.get_indexer(merged_links["t"])
+
+    # 縮約対象ペアの抽出
+    turn = merged_links["turn"].to_numpy() if "turn" in merged_links.columns else np.full(len(merged_links), "", dtype=object)
+    cross = (turn == "cross") & (s_pos >= 0) & (t_pos >= 0)
+    cross &= link_ids[np.maximum(s_pos, 0)] != link_ids[np.maximum(t_pos, 0)]
+    cross &= in_out[np.maximum(s_pos, 0)] != in_out[np.maximum(t_pos, 0)]
+    pair_u = s_pos[cross]
+    pair_v = t_pos[cross]
+
+    n = len(updated_nodes)
+    roots = disjoint_set_roots(n, pair_u, pair_v)
+
+    # 連結成分ごとの代表ノード（最初の縮約リンクの始点）
+    first_pair = np.full(n, len(pair_u), dtype=np.int64)
+    np.minimum.at(first_pair, roots[pair_u], np.arange(len(pair_u)))
+    rep = np.arange(n)
+    merged_root = first_pair < len(pair_u)
+    rep[merged_root] = pair_u[first_pair[merged_root]]
+    new_pos = rep[roots]
+
+    # 縮約後の座標（交差点中心からの角度・距離を一括計算）
+    members = np.flatnonzero(merged_root[roots])
+    if len(members):
+        comp = new_pos[members]
+        reps, comp_code = np.unique(comp, return_inverse=True)
+        orig_ids = updated_nodes["original_id"].to_numpy()[reps]
+        center_x, center_y = _intersection_centers(orig_ids, ori_node, x[reps], y[reps])
+        r, angle = to_polar(x[members], y[members], center_x[comp_code], center_y[comp_code])
+        size = np.bincount(comp_code)
+        radius = np.bincount(comp_code, weights=r) / size
+        bisector = np.arctan2(np.bincount(comp_code, weights=np.sin(angle)),
+                              np.bincount(comp_code, weights=np.cos(angle)))
+        # 2ノードの成分は代表ノード → もう一方の順に二等分角を求める
+        is_rep = members == comp
+        rep_angle = np.empty(len(reps))
+        rep_angle[comp_code[is_rep]] = angle[is_rep]
+        other_angle = np.empty(len(reps))
+        other_angle[comp_code[~is_rep]] = angle[~is_rep]
+        pair_comp = size == 2
+        bisector[pair_comp] = average_angle(rep_angle[pair_comp], other_angle[pair_comp])
+        x[reps], y[reps] = from_polar(radius, bisector, center_x, center_y)
+
+    # リンク端点の付け替え（自己ループ・重複リンクの除去）
+    valid = (s_pos >= 0) & (t_pos >= 0)
+    final_links = merged_links.loc[valid, ["s", "t", "id", "turn", "original_id", "_original_node_id"]].copy()
+    new_s = new_pos[s_pos[valid]]
+    new_t = new_pos[t_pos[valid]]
+    final_links["s"] = node_ids[new_s]
+    final_links["t"] = node_ids[new_t]
+    keep = (new_s != new_t) & ~final_links.duplicated(subset=["s", "t"], keep="first").to_numpy()
+    final_links = final_links[keep].reset_index(drop=True)
+
+    used = np.zeros(n, dtype=bool)
+    used[new_s[keep]] = True
+    used[new_t[keep]] = True
+    final_nodes = updated_nodes.loc[used, ["id", "original_id", "_original_link_id", "in_out"]].copy()
+    final_nodes.insert(1, "x", x[used])
+    final_nodes.insert(2, "y", y[used])
+    final_nodes = final_nodes.reset_index(drop=True)
+    return final_nodes, final_links
+
 # === ネットワーク統合処理（車両・歩行者ネットワークの統合） ===
 def integrate_vehicle_and_pedestrian_networks(walk_nodes, walk_links, veh_nodes, veh_links):
     """
@@ -679,6 +993,8 @@ def adjust_display_coordinates(nodes_df, ori_nodes_df, scale_factor=10):
     """
     各ノードについて、original_id に対応する基準点を中心とし、
     現在の座標からのずれを scale_factor 倍して補正した表示用ノード座標を生成する。
+    基準点は ori_nodes_df の id をキーとして一括で引き当て（original_id カラムがなければノードの id を用いる）、
+    補正は配列演算でまとめて行う。基準点が見つからないノードは座標をそのまま保つ。
     
     Parameters:
       nodes_df : DataFrame
@@ -691,23 +1007,49 @@ def adjust_display_coordinates(nodes_df, ori_nodes_df, scale_factor=10):
           補正後のノード座標データ（"id", "x", "y"）
     """
     display_nodes = nodes_df.copy()
-    for i, row in display_nodes.iterrows():
-        orig_id = row.get("original_id", row["id"])
-        center_row = ori_nodes_df[ori_nodes_df["id"] == orig_id]
-        if not center_row.empty:
-            center_x = center_row.iloc[0]["x"]
-            center_y = center_row.iloc[0]["y"]
-        else:
-            center_x, center_y = row["x"], row["y"]
-        new_x = (row["x"] - center_x) * scale_factor + center_x
-        new_y = (row["y"] - center_y) * scale_factor + center_y
-        display_nodes.at[i, "x"] = new_x
-        display_nodes.at[i, "y"] = new_y
+    keys = display_nodes["original_id"] if "original_id" in display_nodes.columns else display_nodes["id"]
+    x = display_nodes["x"].to_numpy(dtype=float)
+    y = display_nodes["y"].to_numpy(dtype=float)
+    # 基準点が見つからない（キーが欠損している場合を含む）ノードは自身の座標を中心とし、補正しない
+    center_x, center_y = _intersection_centers(keys.to_numpy(), ori_nodes_df, x, y)
+    no_key = keys.isna().to_numpy()
+    center_x[no_key] = x[no_key]
+    center_y[no_key] = y[no_key]
+    display_nodes["x"] = (x - center_x) * scale_factor + center_x
+    display_nodes["y"] = (y - center_y) * scale_factor + center_y
     return display_nodes
 
-def finalize_network(final_nodes, final_links, ori_links, ori_nodes):
+def _lookup_macro_weight(links, ori_links):
     """
+    macro_link（整数の組 macro_a, macro_b）をキーとして元のリンクデータの weight を 1 対 1 で引き当てる。
+    並行するマクロリンク（同じ macro_link を持つ複数リンク）がある場合は、
+    original_id が一致するマクロリンクを優先し、なければ先頭のものを用いる。
+    交差点内のリンク（macro_link が "" または "-1"）には weight を付与しない。
+    """
+    macro_a = links["macro_a"].to_numpy(dtype=np.int64)
+    macro_b = links["macro_b"].to_numpy(dtype=np.int64)
+    ori = ori_links.drop_duplicates(subset=["id"], keep="first")
+    ori_a, ori_b = macro_link_pair(ori["s"], ori["t"])
+    ori_weight = ori["weight"].to_numpy(dtype=float)
+    is_link = macro_a != macro_b
+
+    ori_keys = pd.MultiIndex.from_arrays([ori_a, ori_b])
+    first = pd.Series(np.arange(len(ori)), index=ori_keys)
+    first = first[~first.index.duplicated(keep="first")]
+    macro_pos = first.index.get_indexer(pd.MultiIndex.from_arrays([macro_a, macro_b]))
+    id_pos = pd.Index(ori["id"].to_numpy()).get_indexer(links["original_id"].to_numpy())
+    id_safe = np.maximum(id_pos, 0)
+    id_match = (id_pos >= 0) & (ori_a[id_safe] == macro_a) & (ori_b[id_safe] == macro_b)
 
+    pos = np.where(id_match, id_pos, macro_pos)
+    return np.where(is_link & (pos >= 0), ori_weight[np.maximum(pos, 0)], np.nan)
+
+def finalize_network(final_nodes, final_links, ori_links, ori_nodes):
+    """
+    統合後のネットワークに、マクロネットワークとの対応（macro_node_id, macro_link）、重み、双方向ペアの情報を付与する。
+    macro_link は整数の組（macro_a, macro_b）、bidirectionalpair_id は macro_link と
+    歩行者リンクの側（pair_side：0/1、不明は -1）、分割（pair_split）、双方向化（pair_dir）のコードで保持し、
+    文字列表現は出力時に render_link_keys で求める。
     """
     final_nodes.rename(columns={"original_id": "macro_node"}, inplace=True)
     final_nodes.rename(columns={"_original_link_id": "macro_link_id"}, inplace=True)
@@ -720,97 +1062,104 @@ def finalize_network(final_nodes, final_links, ori_links, ori_nodes):
     # ターゲットノードの情報を結合
     links_merged = links_merged.merge(nodes_info, left_on="t", right_on="node_id", how="left").rename(columns={"macro_id": "macro_node_id_t"})
     
-    links_merged = calc_macro_link(links_merged)
+    # macro_link の算出: 両端の macro_id の組
+    macro_a, macro_b = macro_link_pair(links_merged["macro_node_id_s"], links_merged["macro_node_id_t"])
+    links_merged["macro_a"] = macro_a
+    links_merged["macro_b"] = macro_b
     
     # macro_node_id の算出: 両端の macro_id が同一の場合はその値、異なる場合は -1
-    links_merged["macro_node_id"] = links_merged.apply(
-        lambda row: row["macro_node_id_s"] if row["macro_node_id_s"] == row["macro_node_id_t"] else -1, axis=1
-    )
+    macro_s = links_merged["macro_node_id_s"].to_numpy()
+    macro_t = links_merged["macro_node_id_t"].to_numpy()
+    links_merged["macro_node_id"] = np.where(macro_s == macro_t, macro_s, -1)
     
     # 重みの補完: 元のリンクデータからmacro_linkをキーにしてweight列を結合する
-    links_merged = calc_macro_link(links_merged, s_col="macro_node_id_s", t_col="macro_node_id_t")
+    links_merged["weight"] = _lookup_macro_weight(links_merged, ori_links)
 
-    links_merged = links_merged.merge(ori_links[['macro_link', 'weight']], on='macro_link', how='left')
-    
     # bidirectionalpair_id の算出
-    def assign_bidirectional(row):
-        # macro_linkは、例："12345_67890"
-        macro = row["macro_link"]
-        if macro == "" or pd.isnull(macro):
-            return -1
-        try:
-            a_str, b_str = macro.split("_")
-            a = int(a_str)
-            b = int(b_str)
-        except Exception:
-            return -1
-        # 取得するマクロノードの座標は、ori_nodes_dfから取得する
-        # ori_nodes_dfは、元のノードデータで、"id", "x", "y" を持つ前提とする
-        A = ori_nodes[ori_nodes["id"] == a]
-        B = ori_nodes[ori_nodes["id"] == b]
-        if A.empty or B.empty:
-            return macro  # 取得できなければそのまま返す
-        Ax, Ay = A.iloc[0]["x"], A.iloc[0]["y"]
-        Bx, By = B.iloc[0]["x"], B.iloc[0]["y"]
-        # 現在のリンクの中点をfinal_nodesから取得する
-        # ここでは、リンクのソースとターゲットの座標から中点を計算する
-        nodes_coords = final_nodes.set_index("id")[["x", "y"]]
-        try:
-            s_coords = nodes_coords.loc[row["s"]]
-            t_coords = nodes_coords.loc[row["t"]]
-        except Exception:
-            return macro
-        mid_x = (s_coords["x"] + t_coords["x"]) / 2.0
-        mid_y = (s_coords["y"] + t_coords["y"]) / 2.0
-        # 直線ABの方程式を用いて、点(mid_x, mid_y)の符号付き距離を算出する
-        # 直線ABの一般形: Ax + By + C = 0
-        # ここでは、A_coef = By - Ay, B_coef = Ax - Bx, C = Bx*Ay - Ax*By
-        A_coef = By - Ay
-        B_coef = Ax - Bx
-        C = Bx*Ay - Ax*By
-        # 符号付き距離
-        signed_distance = (A_coef * mid_x + B_coef * mid_y + C)
-        # ここでは、正ならside 0、負ならside 1（どちらでも異なる番号になればよい）
-        side = "0" if signed_distance >= 0 else "1"
-        return macro + "_" + side
-    # 歩行者レイヤのリンクのbidirectionalpair_idを再設定
-    ped_mask = links_merged["layer_id"] == 1
-    links_merged.loc[ped_mask, "bidirectionalpair_id"] = links_merged.loc[ped_mask, :].apply(assign_bidirectional, axis=1)
-
-    # そのほか、車両レイヤは従来通りの処理（例：reorder_macro関数を用いる）
-    vehicle_mask = links_merged["layer_id"] != 1
-    links_merged.loc[vehicle_mask, "bidirectionalpair_id"] = links_merged.loc[vehicle_mask, "macro_link"].apply(
-        lambda x: reorder_macro(x) if x != "" else -1
-    )
+    # 歩行者レイヤ：マクロリンク A–B の直線に対するリンク中点の符号付き距離で side（0/1）を付与する
+    ped_mask = (links_merged["layer_id"] == 1).to_numpy()
+    parsed = macro_a != macro_b
+
+    # マクロノードの座標は ori_nodes（"id", "x", "y"）から、リンク端点の座標は final_nodes から取得する
+    macro_coords = ori_nodes.drop_duplicates(subset=["id"], keep="first").set_index("id")
+    a_pos = macro_coords.index.get_indexer(macro_a)
+    b_pos = macro_coords.index.get_indexer(macro_b)
+    node_coords = final_nodes.drop_duplicates(subset=["id"], keep="first").set_index("id")
+    s_pos = node_coords.index.get_indexer(links_merged["s"])
+    t_pos = node_coords.index.get_indexer(links_merged["t"])
+    located = parsed & (a_pos >= 0) & (b_pos >= 0) & (s_pos >= 0) & (t_pos >= 0)
+
+    mx, my = macro_coords["x"].to_numpy(dtype=float), macro_coords["y"].to_numpy(dtype=float)
+    nx_, ny_ = node_coords["x"].to_numpy(dtype=float), node_coords["y"].to_numpy(dtype=float)
+    Ax, Ay, Bx, By = mx[a_pos], my[a_pos], mx[b_pos], my[b_pos]
+    mid_x = (nx_[s_pos] + nx_[t_pos]) / 2.0
+    mid_y = (ny_[s_pos] + ny_[t_pos]) / 2.0
+    # 直線ABの一般形: A_coef*x + B_coef*y + C = 0
+    # ここでは、A_coef = By - Ay, B_coef = Ax - Bx, C = Bx*Ay - Ax*By
+    signed_distance = (By - Ay) * mid_x + (Ax - Bx) * mid_y + (Bx*Ay - Ax*By)
+    # 正なら side 0、負なら side 1（どちらでも異なる番号になればよい）。座標が取得できなければ -1（macro_link をそのまま用いる）
+    side = np.where(signed_distance >= 0, 0, 1)
+    links_merged["pair_side"] = np.where(ped_mask & located, side, -1).astype(np.int8)
+    links_merged["pair_split"] = np.zeros(len(links_merged), dtype=np.int8)
+    links_merged["pair_dir"] = np.zeros(len(links_merged), dtype=np.int8)
     
     return final_nodes,links_merged
     
+def split_network_links(final_nodes, final_links, split=True):
+    """
+    split=True の場合は split_links によりリンクを中点で分割する。
+    split=False の場合は分割せず、ノード・リンクに split 列（欠損）を追加する。
+
+    Returns:
+      final_nodes, final_links : DataFrame
+    """
+    if split:
+        return split_links(final_nodes, final_links)
+    final_nodes["split"] = np.nan
+    final_links["split"] = np.nan
+    return final_nodes, final_links
+
+def postprocess_network(integrated_nodes, integrated_links, ori_links, ori_nodes, config):
+    """
+    統合後のネットワークに対して、finalize_network による属性付与、
+    split_network_links によるリンク分割（config["method"]["split"] が True の場合）、
+    birdirectionzie_ped_links による歩行者リンクの双方向化を順に行う。
+
+    Returns:
+      final_nodes, final_links : DataFrame
+    """
+    final_nodes, final_links = finalize_network(integrated_nodes, integrated_links, ori_links, ori_nodes)
+    final_nodes, final_links = split_network_links(final_nodes, final_links, config["method"]["split"])
+    return birdirectionzie_ped_links(final_nodes, final_links)
+
 def birdirectionzie_ped_links(final_nodes, final_links):
     veh_mask = final_links["layer_id"] == 0
     ped_mask = final_links["layer_id"] == 1
     __veh_links = final_links.loc[veh_mask, :]
-    __ped_links = final_links.loc[ped_mask, :]
+    __ped_links = final_links.loc[ped_mask, :].copy()
     
+    # 逆方向のリンクを追加し、bidirectionalpair_id に ".1"（元の向き）/ ".2"（逆向き）を付与する
     _ped_links = __ped_links.copy()
     _ped_links["s"]=__ped_links["t"]
     _ped_links["t"]=__ped_links["s"]
-    _ped_links.loc[_ped_links["bidirectionalpair_id"]!=-1,"bidirectionalpair_id"]=_ped_links.loc[_ped_links["bidirectionalpair_id"]!=-1,"bidirectionalpair_id"]+".2"
-    
-    __ped_links.loc[__ped_links["bidirectionalpair_id"]!=-1,"bidirectionalpair_id"]=__ped_links.loc[__ped_links["bidirectionalpair_id"]!=-1,"bidirectionalpair_id"]+".1"
+    _ped_links["pair_dir"] = np.int8(2)
+    __ped_links["pair_dir"] = np.int8(1)
     
     _final_links = pd.concat([__veh_links,__ped_links,_ped_links])
     _final_links["id"] = _final_links.reset_index().index
     return final_nodes,_final_links
-    
 
 def split_links(final_nodes, final_links):
     """
     最終ネットワークのリンクデータについて、各リンクを幾何学的中点で分割し、2本のリンクに分割する。
     ただし、ターンリンク（turn列に値があるリンク）は分割しない。
     分割に伴い、中間ノードを新たに生成し、そのノードの "split" 列に 1 を設定する。
-    また、新たに生成された中間ノードの _original_link_id には、元リンクの macro_link 情報を設定する。
+    また、新たに生成された中間ノードには、元リンクの macro_link 情報（macro_a, macro_b）を設定する。
     生成される2本のリンクは、元のリンクの情報（macro_link, turn, layer_id 等）を引き継ぎ、
-    重み（weight）は元の値の半分となり、bidirectionalpair_id は元の値に ".1" と ".2" のサフィックスを付与して設定される。
+    重み（weight）は元の値の半分となり、pair_split に 1 と 2 を設定する（bidirectionalpair_id の ".1" と ".2" のサフィックス）。
+
+    分割対象リンクはマスクで一括抽出し、中間ノードは連番のIDでまとめて生成し、
+    分割後の2本のリンクは列単位の配列として構築する。
     
     Returns:
       new_final_links : DataFrame
@@ -818,194 +1167,186 @@ def split_links(final_nodes, final_links):
       new_final_nodes : DataFrame
           既存のノードに加え、生成された中間ノードを含むノードデータ
     """
-    new_links = []
-    new_nodes_list = []
-    # リンクIDを新たに連番で再割り当てする
-    new_link_id = 0
-    # 新規ノードIDは、既存の最大ノードID+1から開始
+    final_links = final_links.copy()
+    for col, default in [("weight", 1), ("macro_a", MACRO_MISSING), ("macro_b", MACRO_MISSING), ("layer_id", ""),
+                         ("pair_side", -1), ("pair_split", 0), ("pair_dir", 0)]:
+        if col not in final_links.columns:
+            final_links[col] = default
+
+    # ターンリンクは分割せずそのまま残す
+    if "turn" in final_links.columns:
+        turn = final_links["turn"]
+        is_turn = (turn.notna() & (turn != "")).to_numpy()
+    else:
+        is_turn = np.zeros(len(final_links), dtype=bool)
+
+    # 端点の座標が取得できないリンクは除外する
+    nodes_coords = final_nodes.drop_duplicates(subset=["id"], keep="first").set_index("id")
+    s_pos = nodes_coords.index.get_indexer(final_links["s"])
+    t_pos = nodes_coords.index.get_indexer(final_links["t"])
+    is_split = ~is_turn & (s_pos >= 0) & (t_pos >= 0)
+
+    # 中間ノードの生成（既存の最大ノードID+1からの連番）
     max_node_id = final_nodes["id"].max() if not final_nodes.empty else 0
-    new_node_id = max_node_id + 1
-    # 既存のノード情報を辞書化
-    nodes_dict = final_nodes.set_index("id").to_dict(orient="index")
-    
-    for idx, row in final_links.iterrows():
-        # ターンリンクは分割せずそのまま追加
-        if pd.notnull(row.get("turn", "")) and row["turn"] != "":
-            new_link = row.copy()
-            new_link["id"] = new_link_id
-            new_link_id += 1
-            new_links.append(new_link)
-            continue
+    n_split = int(is_split.sum())
+    mid_ids = np.arange(max_node_id + 1, max_node_id + 1 + n_split)
+    x = nodes_coords["x"].to_numpy(dtype=float)
+    y = nodes_coords["y"].to_numpy(dtype=float)
+    split_links_df = final_links[is_split]
+    new_nodes = pd.DataFrame({
+        "id": mid_ids,
+        "x": (x[s_pos[is_split]] + x[t_pos[is_split]]) / 2.0,
+        "y": (y[s_pos[is_split]] + y[t_pos[is_split]]) / 2.0,
+        "macro_node": -1,  # 中間ノードには元のIDは存在しない
+        "layer_id": split_links_df["layer_id"].to_numpy(),
+        "macro_link_id": -1,  # 文字列表現は出力時に macro_a, macro_b から求める（render_node_keys）
+        "split": 1,  # 分割により生成されたノードは1
+        "macro_a": split_links_df["macro_a"].to_numpy(),  # 対応するmacro_link情報を設定
+        "macro_b": split_links_df["macro_b"].to_numpy(),
+    })
 
-        s = row["s"]
-        t = row["t"]
-        orig_weight = row.get("weight", 1)
-        macro_link = row.get("macro_link", "")
-        turn = row.get("turn", None)
-        layer_id = row.get("layer_id", "")
-        bidir = row.get("bidirectionalpair_id", "")
-        
-        # 取得する元ノードの座標（final_nodesの値）
-        if s not in nodes_dict or t not in nodes_dict:
-            continue
-        s_coord = nodes_dict[s]
-        t_coord = nodes_dict[t]
-        s_x, s_y = s_coord["x"], s_coord["y"]
-        t_x, t_y = t_coord["x"], t_coord["y"]
-        # 中点を計算
-        mid_x = (s_x + t_x) / 2.0
-        mid_y = (s_y + t_y) / 2.0
-        
-        # 新たな中間ノードを生成
-        new_node = {
-            "id": new_node_id,
-            "x": mid_x,
-            "y": mid_y,
-            "macro_node": -1,  # 中間ノードには元のIDは存在しない
-            "layer_id": layer_id,
-            "macro_link_id": macro_link,  # 対応するmacro_link情報を設定
-            "split": 1  # 分割により生成されたノードは1
-        }
-        new_nodes_list.append(new_node)
-        mid_id = new_node_id
-        new_node_id += 1
-        
-        # 生成するリンクの重みは元の半分
-        half_weight = orig_weight / 2.0
-        
-        # リンク1: ソース → 中間ノード
-        link1 = row.copy()
-        link1["id"] = new_link_id
-        new_link_id += 1
-        link1["s"] = s
-        link1["t"] = mid_id
-        link1["weight"] = half_weight
-        link1["macro_link"] = macro_link
-        link1["turn"] = turn
-        link1["layer_id"] = layer_id
-        link1["bidirectionalpair_id"] = str(bidir) + ".1" if bidir != "" else ""
-        link1["split"] = 1
-        
-        # リンク2: 中間ノード → ターゲット
-        link2 = row.copy()
-        link2["id"] = new_link_id
-        new_link_id += 1
-        link2["s"] = mid_id
-        link2["t"] = t
-        link2["weight"] = half_weight
-        link2["macro_link"] = macro_link
-        link2["turn"] = turn
-        link2["layer_id"] = layer_id
-        link2["bidirectionalpair_id"] = str(bidir) + ".2" if bidir != "" else ""
-        link2["split"] = 1
-        
-        new_links.append(link1)
-        new_links.append(link2)
-    
-    new_final_links = pd.DataFrame(new_links)
-    new_final_nodes = pd.concat([final_nodes, pd.DataFrame(new_nodes_list)], ignore_index=True)
+    # リンクの展開：ターンリンクは1行、分割リンクは（ソース → 中間, 中間 → ターゲット）の2行
+    repeats = np.where(is_turn, 1, np.where(is_split, 2, 0))
+    rows = np.repeat(np.arange(len(final_links)), repeats)
+    part = np.arange(len(rows)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    new_links = final_links.iloc[rows].copy()
+    new_links["id"] = np.arange(len(rows))
+
+    half = np.repeat(is_split, repeats)
+    first_half = half & (part == 0)
+    second_half = half & (part == 1)
+    mid_of_row = np.full(len(final_links), -1, dtype=np.int64)
+    mid_of_row[is_split] = mid_ids
+    mid = mid_of_row[rows]
+
+    s = new_links["s"].to_numpy().copy()
+    t = new_links["t"].to_numpy().copy()
+    t[first_half] = mid[first_half]
+    s[second_half] = mid[second_half]
+    new_links["s"] = s
+    new_links["t"] = t
+
+    # 重みは元の半分、bidirectionalpair_id のサフィックス（".1" / ".2"）を pair_split に設定
+    weight = new_links["weight"].to_numpy(dtype=float).copy()
+    weight[half] = weight[half] / 2.0
+    new_links["weight"] = weight
+    new_links["pair_split"] = np.where(half, part + 1, 0).astype(np.int8)
+    new_links["split"] = np.where(half, 1, np.nan)
+
+    new_final_links = new_links
+    if "macro_a" not in final_nodes.columns:
+        final_nodes = final_nodes.assign(macro_a=MACRO_MISSING, macro_b=MACRO_MISSING)
+    new_final_nodes = pd.concat([final_nodes, new_nodes], ignore_index=True)
     
     return new_final_nodes, new_final_links
 
 
 
 # === 最終データのエクスポート（GMNS対応版） ===
-def export_final_network(final_nodes, final_links, ori_nodes, ori_links, config):
+# GMNS 形式の出力で整数として扱うカラム（欠損を含み得るため nullable 整数型とする）
+EXPORT_INT_COLS = {
+    "node_id": "Int64", "link_id": "Int64", "from_node_id": "Int64", "to_node_id": "Int64",
+    "macro_node_id": "Int64", "parent_node_id": "Int64", "parent_link_id": "Int64",
+    "dir_flag": "Int8", "layer_id": "Int8", "split": "Int8",
+}
+
+# Define GMNS and custom fields for link and node outputs
+EXPORT_LINK_COLS = [
+    "link_id", "from_node_id", "to_node_id", "directed", "geometry", "dir_flag", "length", "facility_type", 
+    "modes", 'layer_id','macro_link_id', 'macro_node_id',  'bidirectionalpair_id', 'turn', 'split']
+
+EXPORT_NODE_COLS = [
+    "node_id", "x_coord", "y_coord", "node_type",  
+    "modes", 'layer_id','macro_link_id', 'macro_node_id', "in_out", "split"]
+
+def transform_node_coordinates(final_nodes, config):
     """
-    最終ネットワークのノード・リンクデータをエクスポートする。
-    ノードは CSV、リンクはジオメトリ（LineString）を付与した GeoJSON として出力する。
-    
-    Parameters:
-      final_nodes : DataFrame
-          ノードデータ（"id", "x", "y"）
-      final_links : DataFrame
-          リンクデータ（"s", "t", "id", "turn"）
-      output_dir : str
-          出力ディレクトリ
-      suffix : str, optional
-          出力ファイル名に付加するサフィックス（例："raw" または "display"）
+    ノード座標の配列を一度だけ export_crs へ変換して返す。
+    config["output"]["precision"] が指定されている場合は、その小数桁数に丸める。
     """
-    
-    
-    output_dir = config["output"]["dir"]
-    name = config["output"]["name"]
-    suffix = config["output"]["suffix"]
-    input_crs = config["crs"]["projected_crs"]
-    export_crs = config["crs"]["export_crs"]
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Define GMNS and custom fields for link and node outputs
-    link_cols = [
-        "link_id", "from_node_id", "to_node_id", "directed", "geometry", "dir_flag", "length", "facility_type", 
-        "modes", 'layer_id','macro_link_id', 'macro_node_id',  'bidirectionalpair_id', 'turn', 'split']
-    
-    node_cols = [
-        "node_id", "x_coord", "y_coord", "node_type",  
-        "modes", 'layer_id','macro_link_id', 'macro_node_id', "in_out", "split"]
+    points = gpd.GeoSeries(gpd.points_from_xy(final_nodes["x"], final_nodes["y"]), crs=config["crs"]["projected_crs"])
+    points = points.to_crs(config["crs"]["export_crs"])
+    export_x = points.x.to_numpy()
+    export_y = points.y.to_numpy()
+    precision = config.get("output", {}).get("precision")
+    if precision is not None:
+        export_x = np.round(export_x, precision)
+        export_y = np.round(export_y, precision)
+    return export_x, export_y
 
-    # === リンクデータ修正 ===
-    final_links = final_links.rename(columns={"id": "link_id", "s": "from_node_id", "t": "to_node_id", "weight": "length", "macro_link":"macro_link_id"})
-    final_links["directed"] = True
-    final_links["dir_flag"] = 1
-    #final_links["parent_link_id"] = final_links["macro_link_id"].replace({-1: ""})
+def macro_node_attributes(ori_nodes):
+    """ノード出力に結合する元ノードデータの属性（キー: macro_node_id）"""
+    return ori_nodes[[c for c in ori_nodes.columns if c not in EXPORT_NODE_COLS+["geometry"]]+["node_id"]].rename(columns={"node_id":"macro_node_id","id":"parent_node_id"})
 
-    def assign_facility(row):
-        if row["turn"] in ["left", "straight", "right", "cross", "notcross"]:
-            return f"intersection_{row['turn']}"
-        elif row["layer_id"] == 1:
-            return "sidewalk"
-        else:
-            return "road"
-    final_links["facility_type"] = final_links.apply(assign_facility, axis=1)
-    
-    def assign_modes(row):
-        return "pedestrian" if row["layer_id"] == 1 else "vehicle"
-    final_links["modes"] = final_links.apply(assign_modes, axis=1)
+def macro_link_attributes(ori_links):
+    """リンク出力に結合する元リンクデータの属性（キー: macro_link_id）"""
+    attributes = ori_links[[c for c in ori_links.columns if c not in EXPORT_LINK_COLS+["s", "t",'weight', 'dummy', 'access', 'macro_link']]]
+    attributes = attributes.rename(columns={"id":"parent_link_id"})
+    attributes["macro_link_id"] = render_macro_link(*macro_link_pair(ori_links["s"], ori_links["t"]))
+    return attributes
 
-    # === ノードデータ修正 ===
+def build_node_table(final_nodes, export_x, export_y, node_attributes, config):
+    """
+    ノードデータ（の一部）を GMNS 形式の GeoDataFrame に変換する。
+    export_x, export_y は final_nodes と同じ行順の、変換済み（export_crs）の座標配列。
+    """
+    export_crs = config["crs"]["export_crs"]
+    final_nodes = render_node_keys(final_nodes)
     final_nodes = final_nodes.rename(columns={"id": "node_id", "x":"x_coord", "y":"y_coord", "macro_node":"macro_node_id"})
     
     #final_nodes["parent_node_id"] = final_nodes["macro_node_id"].replace({-1: ""})
 
-    def assign_node_type(row):
-        if row.get("split", 0) == 1:
-            return "split"
-        elif row["macro_node_id"] != -1:
-            return f"intersection_{row['in_out']}"
-        else:
-            return ""
-    final_nodes["node_type"] = final_nodes.apply(assign_node_type, axis=1)
-    final_nodes["modes"] = final_nodes.apply(assign_modes, axis=1)
-
-    # === ノード出力 ===    
-    nodes_csv_path = os.path.join(output_dir, f"{name}node{suffix}.csv")
-    gdf_nodes = gpd.GeoDataFrame(final_nodes.copy(),
-                             geometry=final_nodes.apply(lambda row: Point(row["x_coord"], row["y_coord"]), axis=1),
-                             crs=input_crs)
-    gdf_nodes = gdf_nodes.to_crs(export_crs)
+    is_split = (final_nodes["split"] == 1).to_numpy() if "split" in final_nodes.columns else np.zeros(len(final_nodes), dtype=bool)
+    final_nodes["node_type"] = np.where(
+        is_split, "split",
+        np.where((final_nodes["macro_node_id"] != -1).to_numpy(),
+                 "intersection_" + final_nodes["in_out"].astype(object).astype(str), ""))
+    final_nodes["modes"] = np.where((final_nodes["layer_id"] == 1).to_numpy(), "pedestrian", "vehicle")
+
+    gdf_nodes = gpd.GeoDataFrame(final_nodes, geometry=gpd.points_from_xy(export_x, export_y), crs=export_crs)
     
     gdf_nodes.loc[gdf_nodes["layer_id"] == 1, "in_out"] = ""
     
-    gdf_nodes["x_coord"]=gdf_nodes.geometry.x
-    gdf_nodes["y_coord"]=gdf_nodes.geometry.y
-    
-    gdf_nodes.drop(columns="geometry")[node_cols]
+    gdf_nodes["x_coord"]=export_x
+    gdf_nodes["y_coord"]=export_y
     
-    gdf_nodes=gdf_nodes.merge(ori_nodes[[c for c in ori_nodes.columns if c not in node_cols+["geometry"]]+["node_id"]].rename(columns={"node_id":"macro_node_id","id":"parent_node_id"}), on="macro_node_id",how="left")
-    gdf_nodes.to_csv(nodes_csv_path, index=False)
-    print(f"Final nodes exported to {nodes_csv_path}")
-    
-    # === リンク出力 ===
-    nodes_coords = final_nodes.set_index("node_id")[["x_coord", "y_coord"]]
-    geometries = []
-    for idx, row in final_links.iterrows():
-        try:
-            s_coords = nodes_coords.loc[row["from_node_id"]]
-            t_coords = nodes_coords.loc[row["to_node_id"]]
-            geom = LineString([[s_coords["x_coord"], s_coords["y_coord"]], [t_coords["x_coord"], t_coords["y_coord"]]])
-        except Exception as e:
-            geom = None
-        geometries.append(geom)
+    gdf_nodes=gdf_nodes.merge(node_attributes, on="macro_node_id",how="left")
+    return gdf_nodes
+
+def build_link_table(final_links, node_ids, export_x, export_y, link_attributes, config):
+    """
+    リンクデータ（の一部）を GMNS 形式の GeoDataFrame に変換する。
+    node_ids, export_x, export_y は全ノードのIDと変換済み（export_crs）の座標配列で、
+    from/to の位置配列を用いて LineString を一括生成する。
+    """
+    export_crs = config["crs"]["export_crs"]
+    final_links = render_link_keys(final_links)
+    final_links = final_links.rename(columns={"id": "link_id", "s": "from_node_id", "t": "to_node_id", "weight": "length", "macro_link":"macro_link_id"})
+    final_links["directed"] = True
+    final_links["dir_flag"] = 1
+    #final_links["parent_link_id"] = final_links["macro_link_id"].replace({-1: ""})
+
+    turn = final_links["turn"]
+    is_intersection = turn.isin(["left", "straight", "right", "cross", "notcross"]).to_numpy()
+    is_ped_link = (final_links["layer_id"] == 1).to_numpy()
+    final_links["facility_type"] = np.where(
+        is_intersection, "intersection_" + turn.astype(object).astype(str),
+        np.where(is_ped_link, "sidewalk", "road"))
+    final_links["modes"] = np.where(is_ped_link, "pedestrian", "vehicle")
+
+    node_index = pd.Index(node_ids)
+    unique_ids = ~node_index.duplicated(keep=False)
+    lookup = node_index[unique_ids]
+    from_pos = lookup.get_indexer(final_links["from_node_id"])
+    to_pos = lookup.get_indexer(final_links["to_node_id"])
+    located = (from_pos >= 0) & (to_pos >= 0)
+    xs, ys = export_x[unique_ids], export_y[unique_ids]
+    coords = np.stack([
+        np.column_stack([xs[from_pos[located]], ys[from_pos[located]]]),
+        np.column_stack([xs[to_pos[located]], ys[to_pos[located]]]),
+    ], axis=1)
+    geometries = np.full(len(final_links), None, dtype=object)
+    geometries[located] = shapely.linestrings(coords)
     
     # 最終リンクデータに必要なカラムを補完
     for col, default in [('weight', 1), ('macro_node_id', -1), ('macro_link', ''), ('layer_id', ''), ('bidirectionalpair_id', -1), ('split', 0)]:
@@ -1014,58 +1355,217 @@ def export_final_network(final_nodes, final_links, ori_nodes, ori_links, config)
     
     final_links = final_links.assign(geometry=geometries)
     # 必要なカラムの順番に並び替え
-    final_links = final_links[link_cols]
-    final_links=final_links.merge(ori_links[[c for c in ori_links.columns if c not in link_cols+["s", "t",'weight', 'dummy', 'access']]].rename(columns={"macro_link":"macro_link_id","id":"parent_link_id"}), on="macro_link_id",how="left")
+    final_links = final_links[EXPORT_LINK_COLS]
+    final_links=final_links.merge(link_attributes, on="macro_link_id",how="left")
+    
+    gdf_links = gpd.GeoDataFrame(final_links, geometry="geometry", crs=export_crs)
+    return gdf_links
+
+def build_export_tables(final_nodes, final_links, ori_nodes, ori_links, config):
+    """
+    最終ネットワークのノード・リンクデータを、エクスポート用の GMNS 形式の GeoDataFrame に変換する。
+    ノード・リンクとも export_crs の座標系で、元データ（ori_nodes, ori_links）の属性を結合して返す。
+    
+    Parameters:
+      final_nodes : DataFrame
+          ノードデータ（"id", "x", "y"）
+      final_links : DataFrame
+          リンクデータ（"s", "t", "id", "turn"）
+
+    Returns:
+      gdf_nodes, gdf_links : GeoDataFrame, GeoDataFrame
+    """
+    export_x, export_y = transform_node_coordinates(final_nodes, config)
+    gdf_nodes = build_node_table(final_nodes, export_x, export_y, macro_node_attributes(ori_nodes), config)
+    gdf_links = build_link_table(final_links, final_nodes["id"].to_numpy(), export_x, export_y, macro_link_attributes(ori_links), config)
+    return gdf_nodes, gdf_links
+
+
+def to_columnar_dtypes(gdf):
+    """
+    列指向フォーマット（GeoParquet / Feather）向けにカラムの型を整える。
+    GMNS の ID 系カラムは nullable 整数型に、型が混在する object カラム（macro_link_id など）は文字列型に変換する。
+    """
+    gdf = gdf.copy()
+    for col in gdf.columns:
+        if col == gdf.geometry.name:
+            continue
+        if col in EXPORT_INT_COLS:
+            numeric = pd.to_numeric(gdf[col], errors="coerce")
+            if numeric.isna().equals(gdf[col].isna()) and (numeric.dropna() % 1 == 0).all():
+                gdf[col] = numeric.astype(EXPORT_INT_COLS[col])
+                continue
+        if gdf[col].dtype == object:
+            gdf[col] = gdf[col].astype("string")
+    return gdf
+
+
+def export_final_network(final_nodes, final_links, ori_nodes, ori_links, config):
+    """
+    最終ネットワークのノード・リンクデータをエクスポートする。
+    config["output"]["format"] に応じて以下の形式で出力する。
+      - "geojson"（デフォルト）: ノードは CSV、リンクはジオメトリ（LineString）を付与した GeoJSON
+      - "parquet": ノード・リンクとも GeoParquet
+      - "feather": ノード・リンクとも Feather（GeoArrow）
+      - "csv": ノード・リンクとも CSV（ジオメトリは WKT）
+      - "flatgeobuf": ノード・リンクとも FlatGeobuf
+    列指向フォーマットでは config["output"]["partition"] が True の場合、layer_id ごとに分割して出力する。
+    config["output"]["chunk_size"] を指定した場合は、export_final_network_chunked により
+    ノード・リンクを指定行数ごとに逐次出力する（"geojson" の場合リンクは GeoJSONSeq となる）。
     
-    gdf_links = gpd.GeoDataFrame(final_links, geometry="geometry", crs=input_crs)
-    gdf_links = gdf_links.to_crs(export_crs)
-    links_geojson_path = os.path.join(output_dir, f"{name}link{suffix}.geojson")
-    gdf_links.to_file(links_geojson_path, driver="GeoJSON")
-    print(f"Final links exported to {links_geojson_path}")
+    Parameters:
+      final_nodes : DataFrame
+          ノードデータ（"id", "x", "y"）
+      final_links : DataFrame
+          リンクデータ（"s", "t", "id", "turn"）
+      config : dict
+          config["output"] の "dir"（出力ディレクトリ）、"name"（ファイル名の接頭辞）、
+          "suffix"（ファイル名に付加するサフィックス、例："" または "_display"）、"format"、"partition"、
+          "chunk_size"、"precision"（出力座標の小数桁数）を参照する
+    """
+    output_dir = config["output"]["dir"]
+    name = config["output"]["name"]
+    suffix = config["output"]["suffix"]
+    output_format = config["output"].get("format", "geojson")
+    partition_cols = ["layer_id"] if config["output"].get("partition", False) else None
+    if output_format not in ("geojson", "parquet", "feather", "csv", "flatgeobuf"):
+        raise ValueError(f"未対応の出力形式です: {output_format}")
+    if config["output"].get("chunk_size") or output_format in ("csv", "flatgeobuf"):
+        export_final_network_chunked(final_nodes, final_links, ori_nodes, ori_links, config)
+        return
+    os.makedirs(output_dir, exist_ok=True)
+
+    gdf_nodes, gdf_links = build_export_tables(final_nodes, final_links, ori_nodes, ori_links, config)
+
+    if output_format == "geojson":
+        nodes_csv_path = os.path.join(output_dir, f"{name}node{suffix}.csv")
+        gdf_nodes.to_csv(nodes_csv_path, index=False)
+        print(f"Final nodes exported to {nodes_csv_path}")
+        links_geojson_path = os.path.join(output_dir, f"{name}link{suffix}.geojson")
+        gdf_links.to_file(links_geojson_path, driver="GeoJSON")
+        print(f"Final links exported to {links_geojson_path}")
+        return
+
+    writer = export_parquet if output_format == "parquet" else export_feather
+    for kind, gdf in [("node", gdf_nodes), ("link", gdf_links)]:
+        path = os.path.join(output_dir, f"{name}{kind}{suffix}.{output_format}")
+        writer(to_columnar_dtypes(gdf), path, partition_cols=partition_cols)
+        print(f"Final {kind}s exported to {path}")
+
+
+# チャンク出力時の出力形式ごとの拡張子（ノード, リンク）
+CHUNK_EXTENSIONS = {"geojson": ("csv", "geojsonl"), "csv": ("csv", "csv"), "flatgeobuf": ("fgb", "fgb")}
+
+def export_final_network_chunked(final_nodes, final_links, ori_nodes, ori_links, config):
+    """
+    最終ネットワークを config["output"]["chunk_size"] 行ずつ GMNS 形式に変換して逐次出力する。
+    座標変換は全ノードに対して一度だけ行い、元データの属性結合はチャンクごとに行うため、
+    出力時のメモリ使用量はチャンクの大きさで抑えられる。chunk_size 未指定の場合は全体を1チャンクとする。
+    """
+    output_dir = config["output"]["dir"]
+    name = config["output"]["name"]
+    suffix = config["output"]["suffix"]
+    output_format = config["output"].get("format", "geojson")
+    if output_format not in CHUNK_EXTENSIONS:
+        raise ValueError(f"チャンク出力に未対応の出力形式です: {output_format}")
+    node_ext, link_ext = CHUNK_EXTENSIONS[output_format]
+
+    export_x, export_y = transform_node_coordinates(final_nodes, config)
+    node_ids = final_nodes["id"].to_numpy()
+
+    def write_chunks(kind, ext, n, build):
+        chunk_size = int(config["output"].get("chunk_size") or max(n, 1))
+        path = os.path.join(output_dir, f"{name}{kind}{suffix}.{ext}")
+        chunks = (build(slice(start, start + chunk_size)) for start in range(0, max(n, 1), chunk_size))
+        export_chunks((gdf if ext == "csv" else to_columnar_dtypes(gdf) for gdf in chunks), path)
+        print(f"Final {kind}s exported to {path}")
+
+    node_attributes = macro_node_attributes(ori_nodes)
+    write_chunks("node", node_ext, len(final_nodes), lambda rows: build_node_table(
+        final_nodes.iloc[rows], export_x[rows], export_y[rows], node_attributes, config))
+    link_attributes = macro_link_attributes(ori_links)
+    write_chunks("link", link_ext, len(final_links), lambda rows: build_link_table(
+        final_links.iloc[rows], node_ids, export_x, export_y, link_attributes, config))
+
 
 # === ネットワーク全体処理パイプライン（歩行者） ===
-def process_pedestrian_network(walk_link, walk_node, contract="partial", config={}):
+def augment_pedestrian_network(walk_link, walk_node, ped):
     """
-    歩行者ネットワークの全体処理パイプライン
-      1. compute_link_centers によりリンク中心座標を計算
-      2. generate_augmented_nodes により新規ノードを生成（offset_angle=10, scale=1）
-      3. generate_turn_links によりターンリンク（turn="cross"）を生成
-      4. integrate_turn_links により既存リンクとターンリンクを統合
-      5. contract_network_and_extract により networkx でノード縮約・最終ネットワーク抽出
+    歩行者ネットワークのリンク中心座標を計算し（ensure_link_centers）、generate_augmented_nodes により新規ノードを生成する。
+    ped は config["ped"]。
+
     Returns:
-      final_nodes, final_links : DataFrame（最終的な歩行者ネットワーク）
+      updated_nodes : DataFrame
+    """
+    updated_links = ensure_link_centers(walk_link, walk_node)
+    return generate_augmented_nodes(updated_links, walk_node, offset_angle=ped["offset_angle"], scale=ped["scale"],access_suffix=1,left_driving=ped["left_driving"])
+
+def assemble_pedestrian_network(walk_link, walk_node, updated_nodes, turn_links, contract="partial", config={}):
+    """
+    通常リンクを生成してターンリンクと統合し、contract="partial" の場合はノード縮約を行う
+    （config["method"]["contract_method"] が "unionfind" の場合は contract_network_unionfind、
+    それ以外は contract_network_and_extract）。
+
+    Returns:
+      final_nodes, final_links : DataFrame
     """
-    #print(len(walk_link))
-    updated_links = compute_link_centers(walk_link, walk_node)
-    #print(len(updated_links))
-    updated_nodes = generate_augmented_nodes(updated_links, walk_node, offset_angle=config["ped"]["offset_angle"], scale=config["ped"]["scale"],access_suffix=1,left_driving=config["ped"]["left_driving"])
-    turn_links = generate_turn_links(updated_nodes, walk_node, threshold_deg=config["ped"]["threshold_deg"])
-    #print(len(turn_links))
     normal_links = generate_normal_links(walk_link, updated_nodes)
     merged_links = integrate_turn_links(normal_links, turn_links)
-    #print(len(merged_links))
     if contract=="partial":
-        final_nodes, final_links = contract_network_and_extract(updated_nodes, merged_links, walk_node)
+        if config.get("method", {}).get("contract_method", "networkx") == "unionfind":
+            final_nodes, final_links = contract_network_unionfind(updated_nodes, merged_links, walk_node)
+        else:
+            final_nodes, final_links = contract_network_and_extract(updated_nodes, merged_links, walk_node)
     elif contract=="none":
         final_nodes, final_links = updated_nodes, merged_links
-    #print(len(final_links))
     return final_nodes, final_links
 
+def process_pedestrian_network(walk_link, walk_node, contract="partial", config={}):
+    """
+    歩行者ネットワークの全体処理パイプライン
+      1. compute_link_centers によりリンク中心座標を計算（ensure_link_centers により計算済みなら省略）
+      2. generate_augmented_nodes により新規ノードを生成（offset_angle=10, scale=1）
+      3. generate_turn_links によりターンリンク（turn="cross"）を生成
+      4. integrate_turn_links により既存リンクとターンリンクを統合
+      5. contract_network_and_extract（config["method"]["contract_method"] が "unionfind" の場合は
+         contract_network_unionfind）によりノード縮約・最終ネットワーク抽出
+    1.〜2. は augment_pedestrian_network、4.〜5. は assemble_pedestrian_network で行う。
+    Returns:
+      final_nodes, final_links : DataFrame（最終的な歩行者ネットワーク）
+    """
+    ped = config["ped"]
+    updated_nodes = augment_pedestrian_network(walk_link, walk_node, ped)
+    turn_links = generate_turn_links(updated_nodes, walk_node, threshold_deg=ped["threshold_deg"])
+    return assemble_pedestrian_network(walk_link, walk_node, updated_nodes, turn_links, contract, config)
+
 # === ネットワーク全体処理パイプライン（車両） ===
+def augment_vehicle_network(veh_link, veh_node, veh):
+    """
+    車両ネットワークのリンク中心座標を計算し（ensure_link_centers）、generate_augmented_nodes により新規ノードを生成する。
+    veh は config["veh"]。
+
+    Returns:
+      updated_links, updated_nodes : DataFrame
+    """
+    updated_links = ensure_link_centers(veh_link, veh_node)
+    updated_nodes = generate_augmented_nodes(updated_links, veh_node, offset_angle=veh["offset_angle"], scale=veh["scale"],access_suffix=0,left_driving=veh["left_driving"])
+    return updated_links, updated_nodes
+
 def process_vehicle_network(veh_link, veh_node,config):
     """
     車両ネットワークの全体処理パイプライン
-      1. compute_link_centers によりリンク中心座標を計算
+      1. compute_link_centers によりリンク中心座標を計算（ensure_link_centers により計算済みなら省略）
       2. generate_augmented_nodes により新規ノードを生成（offset_angle=10, scale=0.5）
       3. generate_turn_links_veh によりターンリンク（"left", "right", "straight"）を生成
       4. integrate_turn_links により既存リンクとターンリンクを統合
       ※ 車両ネットワークは縮約処理は行わない前提。
+    1.〜2. は augment_vehicle_network で行う。
     Returns:
       updated_veh_nodes, merged_veh_links : DataFrame（処理後の車両ネットワーク）
     """
-    updated_links = compute_link_centers(veh_link, veh_node)
-    updated_nodes = generate_augmented_nodes(updated_links, veh_node, offset_angle=config["veh"]["offset_angle"], scale=config["veh"]["scale"],access_suffix=0,left_driving=config["veh"]["left_driving"])
-    turn_links = generate_turn_links_veh(updated_nodes, veh_node, updated_links,make_uturn=config["veh"]["make_uturn"], threshold_deg=config["veh"]["threshold_deg"])
+    veh = config["veh"]
+    updated_links, updated_nodes = augment_vehicle_network(veh_link, veh_node, veh)
+    turn_links = generate_turn_links_veh(updated_nodes, veh_node, updated_links,make_uturn=veh["make_uturn"], threshold_deg=veh["threshold_deg"])
     normal_links = generate_normal_links(veh_link, updated_nodes)
     merged_links = integrate_turn_links(normal_links, turn_links)
     return updated_nodes, merged_links
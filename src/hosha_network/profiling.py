@@ -0,0 +1,136 @@
+# profiling.py
+# -*- coding: utf-8 -*-
+"""
+profiling.py
+------------
+ネットワーク構築の各ステージ（前処理、分岐、歩行者・車両ネットワーク、統合、属性付与、リンク分割、双方向化、出力）の
+経過時間・CPU時間・メモリ使用量・行数を計測する処理を実装します。
+
+計測結果はステージごとの辞書のリストとして返し、JSON として保存できます。
+歩行者・車両レイヤをスレッドで同時に構築する場合、CPU時間はプロセス全体のものとなるため目安として扱います。
+また tracemalloc はプロセス全体で共有されるため、スレッドのワーカーでは peak_traced を計測しません（peak_rss などのみ記録します）。
+"""
+
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_bytes():
+    """プロセスの最大常駐メモリ（バイト）を返す（取得できない環境では None）。"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class StageProfiler:
+    """
+    StageProfiler は、ステージごとに次の値を記録します。
+      - wall_time：経過時間（秒）
+      - cpu_time：プロセスの CPU 時間（秒）
+      - peak_rss：ステージ終了時点までのプロセスの最大常駐メモリ（バイト）
+      - peak_traced：ステージ中に tracemalloc で追跡したメモリのピーク（バイト、trace_memory=True の場合のみ）
+      - rows：ステージの出力の行数（"nodes", "links" など）
+    """
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = []
+        self._lock = threading.Lock()
+        self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name):
+        """
+        with profiler.stage("name") as rows: の形で用い、rows（辞書）に行数を設定する。
+        """
+        rows = {}
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+            traced_start = tracemalloc.get_traced_memory()[0]
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield rows
+        finally:
+            record = {
+                "stage": name,
+                "wall_time": time.perf_counter() - wall_start,
+                "cpu_time": time.process_time() - cpu_start,
+                "peak_rss": peak_rss_bytes(),
+            }
+            if self.trace_memory:
+                record["peak_traced"] = max(tracemalloc.get_traced_memory()[1] - traced_start, 0)
+            record["rows"] = rows
+            with self._lock:
+                self.stages.append(record)
+
+    def extend(self, records):
+        """ワーカーで計測した記録（run_profiled_call の戻り値）を追加する。"""
+        with self._lock:
+            self.stages.extend(records)
+
+    def report(self):
+        """
+        計測を終了し、計測結果を返す（このプロファイラが開始した tracemalloc は停止する）。
+
+        Returns:
+          report : dict
+              "stages"（ステージごとの記録のリスト）と "total"（wall_time, cpu_time の合計と peak_rss の最大値）
+        """
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        peaks = [s["peak_rss"] for s in self.stages if s["peak_rss"] is not None]
+        return {
+            "stages": list(self.stages),
+            "total": {
+                "wall_time": sum(s["wall_time"] for s in self.stages),
+                "cpu_time": sum(s["cpu_time"] for s in self.stages),
+                "peak_rss": max(peaks) if peaks else None,
+            },
+        }
+
+
+def profile_stage(profiler, stage):
+    """
+    profiler が指定されていれば stage の計測コンテキストを、なければ何もしないコンテキストを返す。
+    """
+    return nullcontext({}) if profiler is None else profiler.stage(stage)
+
+
+def profiled_call(profiler, stage, func, *args):
+    """
+    func(*args) を stage として計測して実行する（profiler が None の場合はそのまま実行する）。
+    func はノードとリンクの DataFrame の組を返すものとし、それぞれの行数を記録する。
+    """
+    with profile_stage(profiler, stage) as rows:
+        nodes, links = func(*args)
+        rows.update(nodes=len(nodes), links=len(links))
+    return nodes, links
+
+
+def run_profiled_call(stage, func, args, trace_memory=False):
+    """
+    ワーカー（スレッド・プロセス）で profiled_call を実行し、結果と計測記録を返す。
+    スレッドのワーカーでは trace_memory=False とすること（tracemalloc の開始・停止・ピークのリセットはプロセス全体に及ぶ）。
+    """
+    profiler = StageProfiler(trace_memory)
+    result = profiled_call(profiler, stage, func, *args)
+    return result, profiler.report()["stages"]
+
+
+def write_report(report, path):
+    """計測結果を JSON として保存する。"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,189 @@
+# tiling.py
+# -*- coding: utf-8 -*-
+"""
+tiling.py
+---------
+マクロネットワークを空間タイルに分割し、タイルごとに歩行者・車両ネットワークを並列に構築して
+1つのネットワークへ結合する処理を実装します。
+
+各交差点（マクロノード）はその座標を含むタイルが所有し、タイルには所有ノードに接続するリンクと、
+その反対側の端点（ハロー：境界の交差点）を含めます。ハローのノードは座標参照のみに用い、
+出入口ノード・ターンリンクは所有タイルでのみ生成するため、タイル境界で重複は生じません。
+通常リンクと縮約は結合後のネットワーク全体で一括して処理し、ノード・リンクIDは逐次処理と同じ順序で採番します。
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from .processing import (
+    process_pedestrian_network,
+    process_vehicle_network,
+    generate_normal_links,
+    integrate_turn_links,
+    contract_network_and_extract,
+    contract_network_unionfind,
+)
+
+# タイル処理に必要なカラム（プロセス間の受け渡し量を抑えるため、これ以外は除外する）
+TILE_NODE_COLS = ["id", "x", "y", "x_display", "y_display", "intersection"]
+TILE_LINK_COLS = ["id", "s", "t", "access"]
+TURN_LINK_COLS = ["id", "s", "t", "original_id", "turn"]
+
+
+def partition_tiles(net_link, net_node, tile_size):
+    """
+    ノード座標（投影座標系）を tile_size 四方の格子に割り当て、タイルごとの入力データに分割する。
+    各タイルには、所有ノードに接続するリンクと、その両端点のノードを含める。
+    所有ノード以外（ハロー）の intersection は -1 とし、出入口ノードを生成しない。
+
+    Returns:
+      tiles : list of (tile_link, tile_node)
+    """
+    node_cols = [c for c in TILE_NODE_COLS if c in net_node.columns]
+    link_cols = [c for c in TILE_LINK_COLS if c in net_link.columns]
+    nodes = net_node[node_cols]
+    links = net_link[link_cols]
+
+    ix = np.floor(nodes["x"].to_numpy(dtype=float) / tile_size).astype(np.int64)
+    iy = np.floor(nodes["y"].to_numpy(dtype=float) / tile_size).astype(np.int64)
+    cell, _ = pd.factorize(pd.MultiIndex.from_arrays([ix, iy]))
+
+    s_pos = nodes.index.get_indexer(links["s"])
+    t_pos = nodes.index.get_indexer(links["t"])
+    located = (s_pos >= 0) & (t_pos >= 0)
+    link_pos = np.flatnonzero(located)
+    s_pos, t_pos = s_pos[located], t_pos[located]
+
+    # （タイル, リンク）の組：リンクはいずれかの端点を所有するタイルに属する
+    pair_cell = np.concatenate([cell[s_pos], cell[t_pos]])
+    pair_link = np.concatenate([link_pos, link_pos])
+    pairs = np.unique(np.column_stack([pair_cell, pair_link]), axis=0)
+    bounds = np.flatnonzero(np.r_[True, pairs[1:, 0] != pairs[:-1, 0], True])
+
+    intersection = nodes["intersection"].to_numpy() if "intersection" in nodes.columns else np.full(len(nodes), -1)
+    tiles = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        tile_cell = pairs[start, 0]
+        tile_link_pos = pairs[start:end, 1]
+        tile_node_pos = np.unique(np.concatenate([s_pos[np.searchsorted(link_pos, tile_link_pos)],
+                                                  t_pos[np.searchsorted(link_pos, tile_link_pos)]]))
+        tile_node = nodes.iloc[tile_node_pos].copy()
+        tile_node["intersection"] = np.where(cell[tile_node_pos] == tile_cell, intersection[tile_node_pos], -1)
+        tiles.append((links.iloc[tile_link_pos], tile_node))
+    return tiles
+
+
+def make_tile(net_link, net_node, owned_ids):
+    """
+    owned_ids の交差点を所有する1つのタイルの入力データを作成する。
+    所有ノードに接続するリンクとその両端点のノードを含め、所有ノード以外（ハロー）の intersection は -1 とする。
+
+    Returns:
+      tile_link, tile_node : DataFrame
+    """
+    node_cols = [c for c in TILE_NODE_COLS if c in net_node.columns]
+    link_cols = [c for c in TILE_LINK_COLS if c in net_link.columns]
+    owned_link = (net_link["s"].isin(owned_ids) | net_link["t"].isin(owned_ids)).to_numpy()
+    tile_link = net_link.loc[owned_link, link_cols]
+    ends = np.union1d(tile_link["s"].to_numpy(), tile_link["t"].to_numpy())
+    tile_node = net_node.loc[net_node["id"].isin(ends).to_numpy(), node_cols].copy()
+    if "intersection" not in tile_node.columns:
+        tile_node["intersection"] = -1
+    tile_node["intersection"] = tile_node["intersection"].where(tile_node["id"].isin(owned_ids), -1)
+    return tile_link, tile_node
+
+
+def process_tile(layer, tile_link, tile_node, config):
+    """
+    1タイル分のネットワークを既存のパイプラインで構築し、出入口ノードとターンリンクを返す。
+    （通常リンクはハローをまたぐため、結合後に全体で生成し直す）
+    layer は "ped" または "veh"。make_tile で切り出したタイルに用い、並列処理・差分更新（incremental）から呼び出す。
+
+    Returns:
+      nodes, turn_links : DataFrame
+    """
+    if layer == "ped":
+        nodes, links = process_pedestrian_network(tile_link, tile_node, "none", config)
+    else:
+        nodes, links = process_vehicle_network(tile_link, tile_node, config)
+    return nodes, links[links["turn"].notna()]
+
+
+def stitch_tiles(results, net_link, net_node):
+    """
+    タイルごとの出入口ノード・ターンリンクを結合し、逐次処理と同じ順序でIDを採番し直す。
+      - ノード：交差点の行順 → 接続リンクの行順 → out, in
+      - ターンリンク：交差点（original_id）順 → s → t
+    通常リンクは結合後のノードから generate_normal_links で生成し、ターンリンクの前に並べる。
+
+    Returns:
+      updated_nodes, merged_links : DataFrame（process_*_network の縮約前の出力と同じ形式）
+    """
+    results = [(nodes, turns) for nodes, turns in results if not nodes.empty]
+    if not results:
+        nodes = pd.DataFrame(columns=["id", "x", "y", "original_id", "_original_link_id", "in_out"])
+        return nodes, integrate_turn_links(generate_normal_links(net_link, nodes), pd.DataFrame(columns=TURN_LINK_COLS))
+
+    sizes = np.array([len(nodes) for nodes, _ in results])
+    offsets = np.cumsum(sizes) - sizes
+    nodes = pd.concat([nodes for nodes, _ in results], ignore_index=True)
+
+    # 逐次処理での採番順を再現する整列キー
+    node_rank = pd.Index(net_node["id"].drop_duplicates())
+    link_rank = pd.Index(net_link["id"].drop_duplicates())
+    order = np.lexsort((
+        (nodes["in_out"] != "out").to_numpy(),
+        link_rank.get_indexer(nodes["_original_link_id"]),
+        node_rank.get_indexer(nodes["original_id"]),
+    ))
+    global_id = np.empty(len(nodes), dtype=np.int64)
+    global_id[order] = np.arange(len(nodes))
+    nodes = nodes.iloc[order].reset_index(drop=True)
+    nodes["id"] = np.arange(len(nodes), dtype=np.int64)
+
+    turns = [turns.assign(s=global_id[offset + turns["s"].to_numpy(dtype=np.int64)],
+                          t=global_id[offset + turns["t"].to_numpy(dtype=np.int64)])
+             for (_, turns), offset in zip(results, offsets) if not turns.empty]
+    turns = pd.concat(turns, ignore_index=True) if turns else pd.DataFrame(columns=TURN_LINK_COLS)
+    turn_order = np.lexsort((turns["t"].to_numpy(), turns["s"].to_numpy(), turns["original_id"].to_numpy()))
+    turns = turns.iloc[turn_order].reset_index(drop=True)
+
+    normal_links = generate_normal_links(net_link, nodes)
+    return nodes, integrate_turn_links(normal_links, turns[TURN_LINK_COLS])
+
+
+def process_network_tiled(net_link, net_node, layer, config, contract="none"):
+    """
+    空間タイルに分割してネットワークを構築する（process_pedestrian_network / process_vehicle_network の並列版）。
+    config["method"]["tile_size"]（投影座標系の単位、通常 m）でタイルに分割し、
+    config["method"]["tile_workers"] 個のプロセスで各タイルを処理する（1 の場合は同一プロセスで逐次処理）。
+
+    Parameters:
+      layer : str
+          "ped"（歩行者）または "veh"（車両）
+      contract : str
+          歩行者ネットワークの縮約オプション（"partial" または "none"）
+
+    Returns:
+      final_nodes, final_links : DataFrame
+    """
+    if layer not in ("ped", "veh"):
+        raise ValueError(f"未対応のレイヤです: {layer}")
+    tile_size = config["method"]["tile_size"]
+    workers = config["method"].get("tile_workers") or os.cpu_count()
+
+    tiles = partition_tiles(net_link, net_node, tile_size)
+    if workers == 1 or len(tiles) <= 1:
+        results = [process_tile(layer, tile_link, tile_node, config) for tile_link, tile_node in tiles]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(process_tile, layer, tile_link, tile_node, config) for tile_link, tile_node in tiles]
+            results = [f.result() for f in futures]
+
+    updated_nodes, merged_links = stitch_tiles(results, net_link, net_node)
+    if layer == "ped" and contract == "partial":
+        if config["method"].get("contract_method", "networkx") == "unionfind":
+            return contract_network_unionfind(updated_nodes, merged_links, net_node)
+        return contract_network_and_extract(updated_nodes, merged_links, net_node)
+    return updated_nodes, merged_links
@@ -1,31 +1,69 @@
 # utils.py
-import math
+import warnings
 import numpy as np
 
+# === 極座標・直交座標の変換 ===
+# 基準点（原点）は引数として明示的に受け取り、状態を持たないため、複数のスレッドから同時に用いてもよい。
+# いずれも配列（またはスカラー）を受け取り、要素ごとの基準点を与えて一括で計算する。
+
+def polar_angle(x, y, origin_x, origin_y, degrees=False):
+    """
+    基準点 (origin_x, origin_y) から見た点 (x, y) の角度（-π〜π、degrees=True の場合は度）を返す。
+    """
+    angle = np.arctan2(np.asarray(y, dtype=float) - origin_y, np.asarray(x, dtype=float) - origin_x)
+    return np.degrees(angle) if degrees else angle
+
+def to_polar(x, y, origin_x, origin_y, degrees=False):
+    """
+    点 (x, y) を基準点 (origin_x, origin_y) を原点とする極座標 (r, angle) に変換する。
+
+    Returns:
+      r, angle : ndarray（angle は polar_angle と同じ）
+    """
+    dx = np.asarray(x, dtype=float) - origin_x
+    dy = np.asarray(y, dtype=float) - origin_y
+    angle = np.arctan2(dy, dx)
+    return np.hypot(dx, dy), (np.degrees(angle) if degrees else angle)
+
+def from_polar(r, angle, origin_x, origin_y, degrees=False):
+    """
+    基準点 (origin_x, origin_y) を原点とする極座標 (r, angle) を直交座標 (x, y) に変換する。
+    """
+    rad = np.radians(angle) if degrees else np.asarray(angle, dtype=float)
+    return r * np.cos(rad) + origin_x, r * np.sin(rad) + origin_y
+
+def ccw_angle_diff(angle_from, angle_to):
+    """
+    角度 angle_from から angle_to への反時計回りの角度差（ラジアン、0〜2π）を返す。
+    """
+    diff = np.asarray(angle_to, dtype=float) - angle_from
+    diff = np.arctan2(np.sin(diff), np.cos(diff))
+    return np.where(diff < 0, diff + 2 * np.pi, diff)
+
 class RD:
     """
-    RD クラスは、基準点からの相対座標計算をサポートします。
+    （非推奨）基準点をクラス変数に保持して極座標・直交座標を変換する旧 API。
+    基準点を共有するためスレッドセーフではない。to_polar / from_polar を用いること（次のリリースで削除予定）。
     """
+    @staticmethod
+    def _warn():
+        warnings.warn("RD は非推奨です。to_polar / from_polar を用いてください。", DeprecationWarning, stacklevel=3)
+
     @classmethod
     def set_origin(cls, x, y):
+        cls._warn()
         cls.x = x
         cls.y = y
 
     @classmethod
     def getRD(cls, X, Y):
-        _x = X - cls.x
-        _y = Y - cls.y
-        r = math.sqrt(_x**2 + _y**2)
-        rad = math.atan2(_y, _x)
-        degree = math.degrees(rad)
-        return r, degree
+        cls._warn()
+        return to_polar(X, Y, cls.x, cls.y, degrees=True)
 
     @classmethod
     def getXY(cls, r, degree):
-        rad = math.radians(degree)
-        x = r * math.cos(rad)
-        y = r * math.sin(rad)
-        return x + cls.x, y + cls.y
+        cls._warn()
+        return from_polar(r, degree, cls.x, cls.y, degrees=True)
 
 def average_angle(angle1, angle2):
     """
@@ -36,3 +74,26 @@ def average_angle(angle1, angle2):
     diff = np.arctan2(np.sin(diff), np.cos(diff))
     bisector = angle1 + diff / 2.0
     return np.arctan2(np.sin(bisector), np.cos(bisector))
+
+def disjoint_set_roots(n, a, b):
+    """
+    要素数 n の素集合（Union-Find）に対して、ペア (a[k], b[k]) を一括で併合し、
+    各要素の代表元（連結成分内の最小インデックス）を返す関数。
+    併合（hooking）とポインタジャンプによる経路圧縮を配列演算で繰り返す。
+    """
+    parent = np.arange(n)
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    while True:
+        pa = parent[a]
+        pb = parent[b]
+        lo = np.minimum(pa, pb)
+        hi = np.maximum(pa, pb)
+        if (lo == hi).all():
+            return parent
+        np.minimum.at(parent, hi, lo)
+        while True:
+            grand = parent[parent]
+            if (grand == parent).all():
+                break
+            parent = grand
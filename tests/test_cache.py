@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+cache.py のステージキャッシュのテスト
+"""
+
+import os
+
+import pandas as pd
+
+from hosha_network.cache import StageCache, cached_stage, fingerprint
+
+
+def test_fingerprint_depends_on_content():
+    df = pd.DataFrame({"id": [1, 2], "access": ["both_B_B", "vehicle_FT_FT"]})
+    assert fingerprint(df, {"a": 1}) == fingerprint(df.copy(), {"a": 1})
+    assert fingerprint(df, {"a": 1}) != fingerprint(df, {"a": 2})
+    assert fingerprint(df) != fingerprint(df.assign(access=["both_B_B", "both_B_B"]))
+
+
+def test_stage_cache_reuses_results(tmp_path):
+    cache = StageCache(str(tmp_path))
+    calls = []
+    compute = lambda: calls.append(1) or pd.DataFrame({"x": [1.0, 2.0]})
+
+    first, key = cached_stage(cache, "stage", ["input", 1], compute)
+    second, key2 = cached_stage(cache, "stage", ["input", 1], compute)
+    cached_stage(cache, "stage", ["input", 2], compute)
+
+    assert key == key2 and len(calls) == 2
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_stage_cache_evicts_least_recently_used(tmp_path):
+    cache = StageCache(str(tmp_path), max_bytes=2500)
+    payload = lambda: b"x" * 1000
+    cache.get_or_compute("stage", "a", payload)
+    cache.get_or_compute("stage", "b", payload)
+    os.utime(cache.path("stage", "a"), (0, 0))
+    cache.get_or_compute("stage", "c", payload)
+
+    assert not os.path.exists(cache.path("stage", "a"))
+    assert os.path.exists(cache.path("stage", "b")) and os.path.exists(cache.path("stage", "c"))
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+ioput.py の読み込み（列の選択・範囲の絞り込み・GeoParquet / FlatGeobuf）とチャンク出力に対するテスト
+"""
+
+import geopandas as gpd
+import pytest
+import shapely
+
+from hosha_network.ioput import load_vector, load_input_data, export_chunks, GMNS_LINK_COLUMNS, GMNS_NODE_COLUMNS
+
+LINK_PATH = "sample_data/koenji_macro_link.geojson"
+NODE_PATH = "sample_data/koenji_macro_node.geojson"
+
+
+def _south_west_bbox(gdf):
+    minx, miny, maxx, maxy = gdf.total_bounds
+    return (minx, miny, (minx + maxx) / 2, (miny + maxy) / 2)
+
+
+@pytest.mark.parametrize("ext", ["geojson", "fgb", "parquet"])
+def test_load_vector_prunes_columns_and_filters_bbox(tmp_path, ext):
+    full = gpd.read_file(LINK_PATH)
+    bbox = _south_west_bbox(full)
+    path = LINK_PATH
+    if ext == "fgb":
+        path = tmp_path / "link.fgb"
+        full.to_file(path)
+    elif ext == "parquet":
+        pytest.importorskip("pyarrow")
+        path = tmp_path / "link.parquet"
+        full.to_parquet(path)
+
+    loaded = load_vector(path, crs="EPSG:3857", columns=GMNS_LINK_COLUMNS, bbox=bbox)
+
+    expected = full[full.intersects(shapely.box(*bbox))]
+    # ped_facility, access は元データにないため読み込まれない
+    assert loaded.columns.tolist() == [c for c in GMNS_LINK_COLUMNS if c in full.columns] + ["geometry"]
+    assert sorted(loaded["link_id"]) == sorted(expected["link_id"])
+    assert loaded.crs.to_epsg() == 3857
+
+
+def test_load_input_data_sub_area_is_closed():
+    config = {"input": {"link": LINK_PATH, "node": NODE_PATH}, "crs": {"input_crs": "EPSG:4326"}}
+    mask = gpd.read_file(NODE_PATH).to_crs("EPSG:6677").union_all().centroid.buffer(300)
+
+    ori_link, ori_node = load_input_data(config, gmns_only=True,
+                                         mask=gpd.GeoSeries([mask], crs="EPSG:6677"))
+
+    assert ori_node.columns.tolist() == GMNS_NODE_COLUMNS + ["geometry"]
+    assert 0 < len(ori_link) < len(gpd.read_file(LINK_PATH))
+    # 両端のノードが範囲内にあるリンクのみ残る
+    assert ori_link["from_node_id"].isin(ori_node["node_id"]).all()
+    assert ori_link["to_node_id"].isin(ori_node["node_id"]).all()
+
+
+def test_export_chunks_falls_back_when_arrow_write_unsupported(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    pyogrio = pytest.importorskip("pyogrio")
+    links = gpd.read_file(LINK_PATH)[["link_id", "geometry"]]
+
+    def unsupported(*args, **kwargs):
+        raise TypeError("unexpected keyword argument")
+    monkeypatch.setattr(pyogrio, "write_arrow", unsupported)
+    export_chunks((links.iloc[i:i + 500] for i in range(0, len(links), 500)), str(tmp_path / "link.geojsonl"))
+
+    assert gpd.read_file(tmp_path / "link.geojsonl")["link_id"].tolist() == links["link_id"].tolist()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+network.py の配列表現（HoshaNetwork）のテスト
+"""
+
+import numpy as np
+import pandas as pd
+
+from hosha_network.network import HoshaNetwork
+
+
+def _frames():
+    nodes = pd.DataFrame({
+        "id": [0, 1, 2, 3],
+        "x": [0.0, 10.0, 10.0, 0.0],
+        "y": [0.0, 0.0, 10.0, 10.0],
+        "macro_link_id": [5, 5, "5_6", 6],
+        "in_out": pd.array(["out", "in", np.nan, "out"], dtype="str"),
+        "layer_id": [0, 0, 0, 1],
+        "split": [np.nan, np.nan, 1.0, np.nan],
+    })
+    links = pd.DataFrame({
+        "id": [0, 1, 2, 3],
+        "s": [0, 1, 1, 3],
+        "t": [1, 2, 0, 0],
+        "turn": [None, "left", np.nan, "u-turn"],
+        "bidirectionalpair_id": ["5_6.1", "5_6.2", -1, -1],
+        "weight": [1.5, np.nan, 2.0, 0.5],
+        "layer_id": [0, 0, 0, 1],
+    }, index=[0, 0, 1, 1])
+    return nodes, links
+
+
+def test_hosha_network_round_trip():
+    nodes, links = _frames()
+    net = HoshaNetwork.from_frames(nodes, links)
+
+    assert net.links["id"].dtype == np.int32 and net.links["turn"].dtype == np.int8
+    assert net.nodes["x"].dtype == np.float64 and net.nodes["in_out"].dtype == np.int8
+    out_nodes, out_links = net.to_frames()
+    pd.testing.assert_frame_equal(out_nodes, nodes)
+    pd.testing.assert_frame_equal(out_links, links)
+
+
+def test_hosha_network_adjacency():
+    nodes, links = _frames()
+    net = HoshaNetwork.from_frames(nodes, links)
+
+    assert sorted(net.out_links(1)) == [1, 2]
+    assert sorted(net.in_links(0)) == [2, 3]
+    assert len(net.out_links(99)) == 0
+    assert (net.links["turn"] == net.code("turn", "left")).sum() == 1
+
+    ped = net.select_links(net.links["layer_id"] == 1)
+    assert ped.n_links == 1 and list(ped.out_links(3)) == [0]
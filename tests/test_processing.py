@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+processing.py の各ステージに対する Koenji サンプルでの回帰テスト
+"""
+
+import tracemalloc
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+
+from hosha_network.processing import (
+    access_from_undi_gmns,
+    compute_access,
+    calc_macro_link,
+    reorder_macro,
+    preprocess_original_links,
+    preprocess_original_nodes,
+    branch_network_types,
+    compute_link_centers,
+    generate_augmented_nodes,
+    generate_normal_links,
+    generate_turn_links,
+    generate_turn_links_veh,
+    integrate_turn_links,
+    contract_network_and_extract,
+    contract_network_unionfind,
+    finalize_network,
+    split_links,
+    birdirectionzie_ped_links,
+    adjust_display_coordinates,
+    render_link_keys,
+    render_node_keys,
+    get_utm_epsg,
+    process_pedestrian_network,
+    process_vehicle_network,
+)
+from hosha_network.tiling import process_network_tiled
+from hosha_network.interface import build_layer_networks, make_config
+from hosha_network.profiling import StageProfiler
+
+
+@pytest.fixture(scope="module")
+def koenji():
+    node_gdf = gpd.read_file("sample_data/koenji_macro_node.geojson").to_crs("EPSG:4326")
+    link_gdf = gpd.read_file("sample_data/koenji_macro_link.geojson").to_crs("EPSG:4326")
+    projected_crs = get_utm_epsg(node_gdf["y_coord"].median(), node_gdf["x_coord"].median())
+    node_gdf = gpd.GeoDataFrame(
+        node_gdf, geometry=gpd.points_from_xy(node_gdf["x_coord"], node_gdf["y_coord"]), crs="EPSG:4326"
+    ).to_crs(projected_crs)
+    processed_link = preprocess_original_links(link_gdf)
+    processed_node = preprocess_original_nodes(node_gdf, processed_link)
+    return branch_network_types(processed_link, processed_node)
+
+
+def test_compute_link_centers(koenji):
+    walk_link, walk_node, veh_link, veh_node = koenji
+    for net_link, net_node in [(walk_link, walk_node), (veh_link, veh_node)]:
+        centers = compute_link_centers(net_link, net_node)
+        expected_x = [(net_node.loc[s, "x_display"] + net_node.loc[t, "x_display"]) / 2
+                      for s, t in zip(net_link["s"], net_link["t"])]
+        expected_y = [(net_node.loc[s, "y_display"] + net_node.loc[t, "y_display"]) / 2
+                      for s, t in zip(net_link["s"], net_link["t"])]
+        assert list(centers.index) == list(net_link.index)
+        np.testing.assert_array_equal(centers["center_x"].to_numpy(), np.array(expected_x))
+        np.testing.assert_array_equal(centers["center_y"].to_numpy(), np.array(expected_y))
+
+
+def test_compute_link_centers_missing_node(koenji):
+    walk_link, walk_node, _, _ = koenji
+    with pytest.raises(KeyError):
+        compute_link_centers(walk_link, walk_node.drop(index=walk_link["s"].iloc[0]))
+
+
+def test_compute_access_matches_rowwise():
+    links = pd.DataFrame({
+        "ped_facility": pd.Series([None, np.nan, "None", "Offstreet_Path", "sidewalk", "offstreet_path", None], dtype=object),
+        "facility_type": ["Primary", "footway", "MOTORWAY", "gaishu", "trunk", "secondary", "residential"],
+        "dir_flag": pd.Series([1, np.nan, "-1", "1.0", 1.7, -1, "x"], dtype=object),
+        "length": 1.0,
+    })
+    expected = links.apply(access_from_undi_gmns, axis=1)
+    assert compute_access(links).tolist() == expected.tolist()
+    no_attributes = links[["length"]]
+    assert compute_access(no_attributes).tolist() == no_attributes.apply(access_from_undi_gmns, axis=1).tolist()
+
+
+def test_calc_macro_link():
+    links = pd.DataFrame({"s": pd.Series([3, 2, 5, None, "7", "x"], dtype=object),
+                          "t": pd.Series([1, 2, 9.0, 1, " 4", 1], dtype=object)})
+    assert calc_macro_link(links)["macro_link"].tolist() == ["1_3", "-1", "5_9", "", "4_7", ""]
+
+
+def test_reorder_macro_is_deprecated_wrapper(koenji):
+    with pytest.deprecated_call():
+        assert [reorder_macro(m) for m in ["9_3", "3_3", 12, "a_1"]] == ["3_9", "3_3", "", ""]
+    # preprocess_original_links は互換のために macro_link（文字列表現）を残す
+    walk_link = koenji[0]
+    assert walk_link["macro_link"].tolist() == calc_macro_link(walk_link[["s", "t"]].copy())["macro_link"].tolist()
+
+
+@pytest.fixture
+def toy_network():
+    nodes = pd.DataFrame({"id": [1, 2, 3], "x": [0.0, 10.0, 0.0], "y": [0.0, 0.0, 10.0]})
+    nodes["x_display"], nodes["y_display"] = nodes["x"], nodes["y"]
+    nodes["intersection"] = nodes["id"]
+    nodes.index = nodes["id"]
+    links = pd.DataFrame({"id": [10, 11], "s": [1, 3], "t": [2, 1],
+                          "access": ["vehicle_FT_FT", "both_B_B"]})
+    links = compute_link_centers(links, nodes)
+    return links, nodes
+
+
+def test_generate_augmented_nodes_access_and_order(toy_network):
+    links, nodes = toy_network
+    new_nodes = generate_augmented_nodes(links, nodes, offset_angle=10, scale=1.0, access_suffix=0, left_driving=True)
+
+    assert new_nodes["id"].tolist() == list(range(6))
+    assert list(zip(new_nodes["original_id"], new_nodes["_original_link_id"], new_nodes["in_out"])) == [
+        (1, 10, "out"), (1, 11, "out"), (1, 11, "in"), (2, 10, "in"), (3, 11, "out"), (3, 11, "in")
+    ]
+    np.testing.assert_allclose(new_nodes.loc[0, ["x", "y"]].to_numpy(dtype=float),
+                               [np.cos(np.radians(10)), np.sin(np.radians(10))])
+
+
+def test_generate_normal_links(toy_network):
+    links, nodes = toy_network
+    new_nodes = generate_augmented_nodes(links, nodes, offset_angle=10, scale=1.0, access_suffix=0, left_driving=True)
+
+    normal_links = generate_normal_links(links, new_nodes)
+
+    # 一方通行（FT）のリンク 10 は s→t のみ、双方向のリンク 11 は両方向を生成する
+    assert normal_links["id"].tolist() == [0, 1, 2]
+    assert normal_links["original_id"].tolist() == [10, 11, 11]
+    assert list(zip(normal_links["s"], normal_links["t"])) == [(0, 3), (4, 2), (1, 5)]
+
+
+def test_generate_turn_links_nearest_ccw_neighbour():
+    # 交差点 0 の周りに 0°, 90°, 100°, 180° の4ノード
+    angles = np.radians([0, 90, 100, 180])
+    nodes = pd.DataFrame({"id": [0, 1, 2, 3], "x": np.cos(angles), "y": np.sin(angles), "original_id": 0})
+    ori_nodes = pd.DataFrame({"id": [0], "x": [0.0], "y": [0.0]})
+
+    turn_links = generate_turn_links(nodes, ori_nodes, threshold_deg=45)
+
+    assert list(zip(turn_links["s"], turn_links["t"])) == [(0, 1), (1, 2), (2, 3), (3, 0)]
+    assert turn_links["turn"].tolist() == ["cross", "cross", "cross", "notcross"]
+
+
+def test_generate_turn_links_veh_classification():
+    # 交差点 0 に東西南北から4本のリンクが接続する十字路（左側通行）
+    link_angles = np.radians([0, 90, 180, 270])
+    links = pd.DataFrame({"id": [10, 11, 12, 13],
+                          "center_x": 5 * np.cos(link_angles), "center_y": 5 * np.sin(link_angles)})
+    nodes = pd.DataFrame({"id": range(8), "x": 0.0, "y": 0.0, "original_id": 0,
+                          "_original_link_id": np.repeat(links["id"].to_numpy(), 2),
+                          "in_out": ["out", "in"] * 4})
+    ori_nodes = pd.DataFrame({"id": [0], "x": [0.0], "y": [0.0]})
+
+    turn_links = generate_turn_links_veh(nodes, ori_nodes, links, make_uturn=True, threshold_deg=45)
+    from_east = turn_links[turn_links["s"] == 1].set_index("t")["turn"].to_dict()
+    assert from_east == {0: "u-turn", 2: "right", 4: "straight", 6: "left"}
+
+    turn_links = generate_turn_links_veh(nodes, ori_nodes, links, make_uturn=False, threshold_deg=45)
+    assert len(turn_links) == 12
+    assert "u-turn" not in set(turn_links["turn"])
+
+
+def test_contract_network_unionfind_matches_networkx():
+    # 中心ノード 0 に4方向のノードが接続する十字路
+    nodes = pd.DataFrame({"id": [0, 1, 2, 3, 4],
+                          "x": [0.0, 50.0, 0.0, -50.0, 0.0], "y": [0.0, 0.0, 50.0, 0.0, -50.0]})
+    nodes["x_display"], nodes["y_display"] = nodes["x"], nodes["y"]
+    nodes["intersection"] = nodes["id"]
+    nodes.index = nodes["id"]
+    links = pd.DataFrame({"id": [10, 11, 12, 13], "s": [0, 2, 0, 4], "t": [1, 0, 3, 0],
+                          "access": ["both_B_B", "both_B_B", "pedestrian_B_TF", "both_B_B"]})
+    links = compute_link_centers(links, nodes)
+    new_nodes = generate_augmented_nodes(links, nodes, offset_angle=10, scale=1.0, access_suffix=1, left_driving=True)
+    merged_links = integrate_turn_links(generate_normal_links(links, new_nodes), generate_turn_links(new_nodes, nodes))
+
+    nx_nodes, nx_links = contract_network_and_extract(new_nodes, merged_links, nodes)
+    uf_nodes, uf_links = contract_network_unionfind(new_nodes, merged_links, nodes)
+
+    pd.testing.assert_frame_equal(uf_nodes, nx_nodes, check_dtype=False)
+    key = ["s", "t", "id", "turn", "original_id"]
+    assert sorted(map(tuple, uf_links[key].fillna("").values)) == sorted(map(tuple, nx_links[key].fillna("").values))
+
+
+def test_contract_network_chained_cross_component():
+    # 交差点 100（原点）の周りの3ノード 0, 1, 2 が cross リンク 0→1, 1→2 で連鎖する
+    ori_node = pd.DataFrame({"id": [100], "x": [0.0], "y": [0.0]}).set_index("id", drop=False)
+    updated_nodes = pd.DataFrame({
+        "id": [0, 1, 2, 3, 4, 5],
+        "x": [10.0, 0.0, -10.0, 50.0, 0.0, -50.0], "y": [0.0, 10.0, 0.0, 0.0, 50.0, 0.0],
+        "original_id": [100, 100, 100, 200, 201, 202],
+        "_original_link_id": [10, 11, 12, 10, 11, 12],
+        "in_out": ["in", "out", "in", "out", "in", "out"]})
+    merged_links = pd.DataFrame({
+        "id": [0, 1, 2, 3, 4], "s": [0, 1, 3, 1, 5], "t": [1, 2, 0, 4, 2],
+        "turn": ["cross", "cross", None, None, None],
+        "original_id": [None, None, 10, 11, 12], "_original_node_id": [100, 100, None, None, None]})
+
+    nx_nodes, nx_links = contract_network_and_extract(updated_nodes, merged_links, ori_node)
+    uf_nodes, uf_links = contract_network_unionfind(updated_nodes, merged_links, ori_node)
+
+    # networkx はリンク順に2ノードずつ縮約するため、縮約済みのノード 1 が再生成され cross リンクが残る
+    assert sorted(nx_nodes.loc[nx_nodes["original_id"] == 100, "id"]) == [0, 1]
+    assert (nx_links["turn"] == "cross").sum() == 1
+    # Union-Find は成分全体を1ノードに併合し、角度の円周平均（90°）上に配置する
+    merged = uf_nodes[uf_nodes["original_id"] == 100]
+    assert merged["id"].tolist() == [0]
+    assert np.allclose(merged[["x", "y"]].to_numpy(), [[0.0, 10.0]])
+    assert sorted(map(tuple, uf_links[["s", "t"]].values)) == [(0, 4), (3, 0), (5, 0)]
+    # 既定の縮約は参照実装（networkx）
+    assert make_config()["method"]["contract_method"] == "networkx"
+
+
+def test_finalize_network_parallel_macro_links():
+    # マクロノード 1–2 間に並行する2本のマクロリンク（10, 11）
+    ori_nodes = pd.DataFrame({"id": [1, 2], "x": [0.0, 10.0], "y": [0.0, 0.0]})
+    ori_links = pd.DataFrame({"id": [10, 11], "s": [1, 1], "t": [2, 2], "weight": [10.0, 12.0]})
+    final_nodes = pd.DataFrame({"id": [0, 1, 2, 3], "x": [1.0, 9.0, 1.0, 9.0], "y": [1.0, 1.0, -1.0, -1.0],
+                                "original_id": [1, 2, 1, 2], "_original_link_id": [10, 10, 11, 11], "layer_id": 1})
+    final_links = pd.DataFrame({"id": [0, 1], "s": [0, 2], "t": [1, 3], "original_id": [10, 11],
+                                "_original_node_id": None, "turn": None, "layer_id": 1})
+
+    _, links = finalize_network(final_nodes, final_links, ori_links, ori_nodes)
+
+    assert len(links) == 2
+    assert links["weight"].tolist() == [10.0, 12.0]
+    assert links[["macro_a", "macro_b"]].values.tolist() == [[1, 2], [1, 2]]
+    assert render_link_keys(links)["bidirectionalpair_id"].tolist() == ["1_2_1", "1_2_0"]
+    _, links = birdirectionzie_ped_links(*split_links(final_nodes, links))
+    assert render_link_keys(links)["bidirectionalpair_id"].tolist() == [
+        "1_2_1.1.1", "1_2_1.2.1", "1_2_0.1.1", "1_2_0.2.1", "1_2_1.1.2", "1_2_1.2.2", "1_2_0.1.2", "1_2_0.2.2"]
+
+
+def test_split_links_midpoints():
+    final_nodes = pd.DataFrame({"id": [0, 1, 2], "x": [0.0, 4.0, 4.0], "y": [0.0, 0.0, 2.0],
+                                "macro_node": [1, 2, 2], "layer_id": 0})
+    final_links = pd.DataFrame({"id": [0, 1], "s": [0, 1], "t": [1, 2], "turn": [None, "left"], "layer_id": 0,
+                                "macro_a": [1, -1], "macro_b": [2, -1], "weight": [8.0, np.nan],
+                                "pair_side": -1, "pair_split": 0, "pair_dir": 0})
+
+    nodes, links = split_links(final_nodes, final_links)
+
+    mid = nodes[nodes["split"] == 1]
+    assert mid["id"].tolist() == [3]
+    assert mid[["x", "y"]].values.tolist() == [[2.0, 0.0]]
+    assert render_node_keys(nodes).loc[mid.index, "macro_link_id"].tolist() == ["1_2"]
+    assert links["id"].tolist() == [0, 1, 2]
+    assert list(zip(links["s"], links["t"])) == [(0, 3), (3, 1), (1, 2)]
+    assert links["weight"].tolist()[:2] == [4.0, 4.0]
+    links = render_link_keys(links)
+    assert links["macro_link"].tolist() == ["1_2", "1_2", "-1"]
+    assert links["bidirectionalpair_id"].tolist() == ["1_2.1", "1_2.2", ""]
+    assert links["split"].tolist()[:2] == [1, 1] and np.isnan(links["split"].iloc[2])
+
+
+def _south_west_quarter(net_link, net_node):
+    inside = net_node[(net_node["x"] <= net_node["x"].median()) & (net_node["y"] <= net_node["y"].median())]
+    return net_link[net_link["s"].isin(inside["id"]) & net_link["t"].isin(inside["id"])], inside
+
+
+@pytest.mark.parametrize("contract_method", ["networkx", "unionfind"])
+@pytest.mark.parametrize("tile_size, workers", [(150, 1), (400, 2)])
+def test_process_network_tiled_matches_serial(koenji, tile_size, workers, contract_method):
+    walk_link, walk_node, veh_link, veh_node = koenji
+    if contract_method == "networkx":
+        # networkx による縮約は低速なため、南西の部分領域で照合する
+        walk_link, walk_node = _south_west_quarter(walk_link, walk_node)
+        veh_link, veh_node = _south_west_quarter(veh_link, veh_node)
+    config = {"ped": {"offset_angle": 10, "scale": 1.0, "left_driving": True, "threshold_deg": 45},
+              "veh": {"offset_angle": 10, "scale": 0.5, "left_driving": True, "threshold_deg": 45, "make_uturn": True},
+              "method": {"tile_size": tile_size, "tile_workers": workers, "contract_method": contract_method}}
+
+    cases = [(process_pedestrian_network(walk_link, walk_node, "partial", config),
+              process_network_tiled(walk_link, walk_node, "ped", config, "partial")),
+             (process_vehicle_network(veh_link, veh_node, config),
+              process_network_tiled(veh_link, veh_node, "veh", config))]
+    for serial, tiled in cases:
+        for expected, actual in zip(serial, tiled):
+            pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected.reset_index(drop=True),
+                                          check_index_type=False)
+
+
+@pytest.mark.parametrize("parallel", ["thread", "process"])
+def test_build_layer_networks_parallel_matches_serial(koenji, parallel):
+    walk_link, walk_node, veh_link, veh_node = koenji
+    config = {"ped": {"offset_angle": 10, "scale": 1.0, "left_driving": True, "threshold_deg": 45},
+              "veh": {"offset_angle": 10, "scale": 0.5, "left_driving": True, "threshold_deg": 45, "make_uturn": True},
+              "method": {"contract_method": "unionfind"}}
+
+    serial = build_layer_networks(walk_link, walk_node, veh_link, veh_node, "partial", config)
+    config["method"]["parallel_layers"] = parallel
+    profiler = StageProfiler(trace_memory=True)
+    with profiler.stage("preprocess"):  # 呼び出し元で tracemalloc を開始しておく
+        pass
+    concurrent = build_layer_networks(walk_link, walk_node, veh_link, veh_node, "partial", config, profiler=profiler)
+
+    for expected_layer, actual_layer in zip(serial, concurrent):
+        for expected, actual in zip(expected_layer, actual_layer):
+            pd.testing.assert_frame_equal(actual, expected)
+    # スレッドのワーカーは tracemalloc に触れない（呼び出し元の計測を壊さない）
+    assert tracemalloc.is_tracing()
+    stages = {s["stage"]: s for s in profiler.report()["stages"]}
+    for stage in ("ped", "veh"):
+        assert ("peak_traced" in stages[stage]) == (parallel == "process")
+        assert stages[stage]["rows"]["links"] > 0
+
+
+def test_adjust_display_coordinates_keyed_centers():
+    ori_nodes = pd.DataFrame({"id": [1, 2, 2], "x": [0.0, 10.0, 99.0], "y": [0.0, 5.0, 99.0]})
+    nodes = pd.DataFrame({"id": [1, 2, 3, 4], "x": [1.0, 11.0, 3.0, 4.0], "y": [1.0, 6.0, 3.0, 4.0],
+                          "original_id": [1, 2, 9, np.nan]})
+    display = adjust_display_coordinates(nodes, ori_nodes, scale_factor=10)
+    # 基準点は id の先頭の行、基準点のないノードは座標を保つ
+    assert display[["x", "y"]].values.tolist() == [[10.0, 10.0], [20.0, 15.0], [3.0, 3.0], [4.0, 4.0]]
+    # original_id がない場合はノードの id で基準点を引き当てる
+    display = adjust_display_coordinates(nodes.drop(columns=["original_id"]), ori_nodes, scale_factor=2)
+    assert display[["x", "y"]].values.tolist() == [[2.0, 2.0], [12.0, 7.0], [3.0, 3.0], [4.0, 4.0]]
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+profiling.py のステージ計測のテスト
+"""
+
+import tracemalloc
+
+import pandas as pd
+
+from hosha_network.profiling import StageProfiler, profiled_call, run_profiled_call
+
+
+def test_stage_profiler_records_stages():
+    profiler = StageProfiler(trace_memory=True)
+    with profiler.stage("allocate") as rows:
+        data = [0] * 1_000_000
+        rows["items"] = len(data)
+    frames = lambda n: (pd.DataFrame({"id": range(n)}), pd.DataFrame({"id": range(2 * n)}))
+    profiled_call(profiler, "frames", frames, 3)
+    profiler.extend(run_profiled_call("worker", frames, (2,))[1])
+
+    report = profiler.report()
+    stages = {s["stage"]: s for s in report["stages"]}
+    assert list(stages) == ["allocate", "frames", "worker"]
+    assert stages["allocate"]["rows"] == {"items": 1_000_000}
+    assert stages["allocate"]["peak_traced"] >= 8_000_000
+    assert stages["frames"]["rows"] == {"nodes": 3, "links": 6}
+    assert stages["worker"]["rows"] == {"nodes": 2, "links": 4}
+    assert report["total"]["wall_time"] >= stages["allocate"]["wall_time"]
+    assert not tracemalloc.is_tracing()
+
+
+def test_profiled_call_without_profiler():
+    nodes, links = profiled_call(None, "frames", lambda: (pd.DataFrame({"id": [1]}), pd.DataFrame({"id": [1, 2]})))
+    assert len(nodes) == 1 and len(links) == 2
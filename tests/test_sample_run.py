@@ -5,9 +5,14 @@ Created on Wed May 28 21:26:07 2025
 @author: hasada83d
 """
 
-from hosha_network import develop_hosha_network
+from hosha_network import develop_hosha_network, update_hosha_network, sweep_hosha_network
+from hosha_network.processing import render_link_keys
 import geopandas as gpd
+import pandas as pd
 import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+import pytest
 
 def test_sample_run():
     node_gdf = gpd.read_file("sample_data/koenji_macro_node.geojson").to_crs("EPSG:4326")
@@ -34,3 +39,132 @@ def test_sample_run():
     )
 
 test_sample_run()
+
+
+def test_sample_run_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    node_gdf = gpd.read_file("sample_data/koenji_macro_node.geojson").to_crs("EPSG:4326")
+    link_gdf = gpd.read_file("sample_data/koenji_macro_link.geojson").to_crs("EPSG:4326")
+
+    develop_hosha_network(link_df=link_gdf, node_df=node_gdf, output_dir=str(tmp_path),
+                          output_format="parquet", output_partition=True)
+
+    links = gpd.read_parquet(tmp_path / "hosha_link.parquet" / "layer_id=1" / "part-0.parquet")
+    nodes = gpd.read_parquet(tmp_path / "hosha_node.parquet" / "layer_id=0" / "part-0.parquet")
+    assert (links["modes"] == "pedestrian").all()
+    assert (nodes["modes"] == "vehicle").all()
+    assert str(links["link_id"].dtype) == "Int64"
+    assert links.crs.to_epsg() == 4326
+
+
+
+def test_sample_run_chunked(tmp_path):
+    node_gdf = gpd.read_file("sample_data/koenji_macro_node.geojson").to_crs("EPSG:4326")
+    link_gdf = gpd.read_file("sample_data/koenji_macro_link.geojson").to_crs("EPSG:4326")
+
+    develop_hosha_network(link_df=link_gdf, node_df=node_gdf, output_dir=str(tmp_path / "whole"))
+    whole = gpd.read_file(tmp_path / "whole" / "hosha_link.geojson")
+
+    for output_format, link_ext in [("geojson", "geojsonl"), ("flatgeobuf", "fgb")]:
+        develop_hosha_network(link_df=link_gdf, node_df=node_gdf, output_dir=str(tmp_path / output_format),
+                              output_format=output_format, output_chunk_size=500, output_precision=7)
+        # FlatGeobuf は空間インデックス順に格納されるため link_id で並べ替えて比較する
+        chunked = gpd.read_file(tmp_path / output_format / f"hosha_link.{link_ext}").sort_values("link_id")
+        assert len(chunked) == len(whole) > 500
+        assert chunked["link_id"].tolist() == whole["link_id"].tolist()
+        coords = chunked.geometry.get_coordinates().to_numpy()
+        assert (coords == coords.round(7)).all()
+
+
+def test_update_hosha_network_matches_full_rebuild(tmp_path):
+    node_gdf = gpd.read_file("sample_data/koenji_macro_node.geojson").to_crs("EPSG:4326")
+    link_gdf = gpd.read_file("sample_data/koenji_macro_link.geojson").to_crs("EPSG:4326")
+    previous = develop_hosha_network(link_df=link_gdf.copy(), node_df=node_gdf.copy(),
+                                     output_dir=str(tmp_path / "previous"))
+
+    # リンク 170 を一方通行に変更し、1本を削除、ノード1つを移動
+    edited_link = link_gdf.copy()
+    edited_link.loc[edited_link["link_id"] == 170, "dir_flag"] = 1
+    removed = int(edited_link["link_id"].iloc[50])
+    edited_link = edited_link[edited_link["link_id"] != removed]
+    edited_node = node_gdf.copy()
+    moved = int(edited_link["from_node_id"].iloc[300])
+    edited_node.loc[edited_node["node_id"] == moved, "x_coord"] += 0.0003
+
+    full = develop_hosha_network(link_df=edited_link.copy(), node_df=edited_node.copy(), output_dir=None)
+    updated = update_hosha_network(previous, edited_link.copy(), edited_node.copy(),
+                                   changed_link_ids=[170, removed], changed_node_ids=[moved],
+                                   output_dir=str(tmp_path / "incremental"))
+    nodes, links = updated.final_nodes, updated.final_links
+
+    def summary(links):
+        links = render_link_keys(links)
+        return sorted(links[["layer_id", "macro_link", "turn", "bidirectionalpair_id"]].astype(str).itertuples(index=False))
+    assert len(nodes) == len(full.final_nodes)
+    assert summary(links) == summary(full.final_links)
+    assert nodes["id"].is_unique and links["id"].is_unique
+    # 影響を受けないノードは ID と座標を保持する
+    kept = previous.final_nodes.merge(nodes, on="id", suffixes=("", "_updated"))
+    assert len(kept) > 0.9 * len(previous.final_nodes)
+    assert (kept["x"] == kept["x_updated"]).all()
+
+
+def test_sweep_hosha_network_matches_develop(tmp_path):
+    node_gdf = gpd.read_file("sample_data/koenji_macro_node.geojson").to_crs("EPSG:4326")
+    link_gdf = gpd.read_file("sample_data/koenji_macro_link.geojson").to_crs("EPSG:4326")
+    configs = [{"veh_offset_angle": 5, "make_uturn": False}, {"ped_threshold_deg": 30}]
+
+    networks = sweep_hosha_network(link_gdf.copy(), node_gdf.copy(), configs, workers=2)
+
+    assert len(networks) == 2
+    for options, network in zip(configs, networks):
+        expected = develop_hosha_network(link_df=link_gdf.copy(), node_df=node_gdf.copy(), output_dir=None, **options)
+        pd.testing.assert_frame_equal(network.final_nodes, expected.final_nodes)
+        pd.testing.assert_frame_equal(network.final_links, expected.final_links)
+    with pytest.raises(ValueError):
+        sweep_hosha_network(link_gdf.copy(), node_gdf.copy(), [{"input_crs": "EPSG:3857"}])
+
+
+def test_develop_hosha_network_in_memory(tmp_path):
+    node_gdf = gpd.read_file("sample_data/koenji_macro_node.geojson").to_crs("EPSG:4326")
+    link_gdf = gpd.read_file("sample_data/koenji_macro_link.geojson").to_crs("EPSG:4326")
+
+    nodes, links = develop_hosha_network(link_df=link_gdf.copy(), node_df=node_gdf.copy(), output_dir=None)
+    develop_hosha_network(link_df=link_gdf.copy(), node_df=node_gdf.copy(), output_dir=str(tmp_path))
+
+    exported = gpd.read_file(tmp_path / "hosha_link.geojson")
+    assert sorted(links.columns) == sorted(exported.columns)
+    assert links["link_id"].tolist() == exported["link_id"].tolist()
+    assert links.crs == exported.crs
+    assert len(nodes) == len(pd.read_csv(tmp_path / "hosha_node.csv"))
+
+
+def test_develop_hosha_network_profile(tmp_path):
+    node_gdf = gpd.read_file("sample_data/koenji_macro_node.geojson").to_crs("EPSG:4326")
+    link_gdf = gpd.read_file("sample_data/koenji_macro_link.geojson").to_crs("EPSG:4326")
+
+    result = develop_hosha_network(link_df=link_gdf, node_df=node_gdf, output_dir=str(tmp_path),
+                                   profile=True, parallel_layers="process")
+
+    stages = {s["stage"]: s for s in result.profile["stages"]}
+    assert set(stages) == {"preprocess", "branch", "ped", "veh", "integrate", "finalize", "split", "bidirectionalize", "export"}
+    assert stages["export"]["rows"] == {"nodes": len(result.final_nodes), "links": len(result.final_links)}
+    assert all(s["wall_time"] >= 0 and "peak_traced" not in s for s in stages.values())
+    with open(tmp_path / "hosha_profile.json", encoding="utf-8") as f:
+        assert json.load(f)["total"]["wall_time"] == pytest.approx(result.profile["total"]["wall_time"])
+
+
+def test_develop_hosha_network_concurrent_threads():
+    node_gdf = gpd.read_file("sample_data/koenji_macro_node.geojson").to_crs("EPSG:4326")
+    link_gdf = gpd.read_file("sample_data/koenji_macro_link.geojson").to_crs("EPSG:4326")
+    configs = [{"veh_offset_angle": 5, "left_driving": False}, {"ped_offset_angle": 20, "ped_scale": 2.0}]
+
+    def build(options):
+        return develop_hosha_network(link_df=link_gdf.copy(), node_df=node_gdf.copy(), output_dir=None, **options)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        concurrent = list(executor.map(build, configs))
+
+    for options, network in zip(configs, concurrent):
+        expected = build(options)
+        pd.testing.assert_frame_equal(network.final_nodes, expected.final_nodes)
+        pd.testing.assert_frame_equal(network.final_links, expected.final_links)
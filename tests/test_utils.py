@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+utils.py の極座標・直交座標の変換に対するテスト
+"""
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from hosha_network.utils import polar_angle, to_polar, from_polar, ccw_angle_diff, RD
+
+
+def test_polar_round_trip_with_origin_arrays():
+    rng = np.random.default_rng(0)
+    origin_x, origin_y = rng.uniform(-1e5, 1e5, 50), rng.uniform(-1e5, 1e5, 50)
+    x, y = origin_x + rng.normal(size=50), origin_y + rng.normal(size=50)
+    r, degree = to_polar(x, y, origin_x, origin_y, degrees=True)
+    np.testing.assert_allclose(degree, polar_angle(x, y, origin_x, origin_y, degrees=True))
+    for i in range(0, 50, 7):
+        assert math.isclose(r[i], math.hypot(x[i] - origin_x[i], y[i] - origin_y[i]))
+        assert math.isclose(degree[i], math.degrees(math.atan2(y[i] - origin_y[i], x[i] - origin_x[i])))
+    back_x, back_y = from_polar(r, degree, origin_x, origin_y, degrees=True)
+    np.testing.assert_allclose(back_x, x, atol=1e-6)
+    np.testing.assert_allclose(back_y, y, atol=1e-6)
+
+
+def test_ccw_angle_diff_range():
+    diff = ccw_angle_diff(np.array([0.0, np.pi / 2, 3.0]), np.array([np.pi / 2, 0.0, -3.0]))
+    np.testing.assert_allclose(diff, [np.pi / 2, 3 * np.pi / 2, 2 * np.pi - 6.0])
+
+
+def test_from_polar_is_stateless_across_threads():
+    # 基準点を引数で受け取るため、異なる基準点での変換を同時に行っても互いに影響しない
+    def convert(origin):
+        return [from_polar(1.0, 90.0 * k, origin, -origin, degrees=True) for k in range(200)]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(convert, range(8)))
+    for origin, points in enumerate(results):
+        assert all(math.isclose(x, origin + math.cos(math.radians(90.0 * k)), abs_tol=1e-12)
+                   and math.isclose(y, -origin + math.sin(math.radians(90.0 * k)), abs_tol=1e-12)
+                   for k, (x, y) in enumerate(points))
+
+
+def test_rd_is_deprecated_wrapper():
+    with pytest.deprecated_call():
+        RD.set_origin(10.0, -5.0)
+    with pytest.deprecated_call():
+        r, degree = RD.getRD(13.0, -1.0)
+    assert math.isclose(r, 5.0) and math.isclose(degree, math.degrees(math.atan2(4.0, 3.0)))
+    with pytest.deprecated_call():
+        x, y = RD.getXY(r, degree)
+    assert math.isclose(x, 13.0) and math.isclose(y, -1.0)